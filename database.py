@@ -4,15 +4,26 @@ Stores and searches leadership team data
 """
 
 import sqlite3
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
+from src.search.profile_summary import summarize_profile
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DATABASE_PATH = "data/leadership.db"
 
+# Question words that would otherwise dominate a natural-language FTS query
+FTS_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'about', 'as', 'at', 'be', 'by', 'can', 'do', 'does',
+    'for', 'from', 'has', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'of', 'on',
+    'or', 'our', 'tell', 'the', 'their', 'there', 'this', 'to', 'what', 'which',
+    'who', 'whom', 'whose', 'with', 'you', 'your', 'team', 'member', 'members'
+}
+
 
 def init_database(db_path: str = DATABASE_PATH) -> None:
     """
@@ -40,6 +51,7 @@ def init_database(db_path: str = DATABASE_PATH) -> None:
             twitter TEXT,
             department TEXT,
             profile_url TEXT,
+            summary TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
@@ -85,16 +97,104 @@ def init_database(db_path: str = DATABASE_PATH) -> None:
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_department ON profiles(department)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_role ON profiles(role)")
     
+    init_change_tracking(cursor)
+    added_summary = ensure_summary_column(cursor)
+    
     conn.commit()
     conn.close()
     
+    # One-off backfill when the column is new; insert_profiles summarizes new rows
+    if added_summary:
+        update_profile_summaries(db_path)
+    
     logger.info("Database initialized successfully")
 
 
+def init_change_tracking(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the profiles change counter and the triggers that bump it.
+    
+    Every insert, update or delete on profiles increments a single
+    version number, so in-memory indexes can tell with one cheap query
+    whether they need to be rebuilt.
+    
+    Args:
+        cursor: Cursor on the profiles database
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS profiles_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO profiles_version (id, version) VALUES (1, 0)")
+    
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS profiles_version_{event.lower()} AFTER {event} ON profiles BEGIN
+                UPDATE profiles_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+
+
+def ensure_summary_column(cursor: sqlite3.Cursor) -> bool:
+    """
+    Add the summary column to databases created before it existed.
+    
+    Args:
+        cursor: Cursor on the profiles database
+        
+    Returns:
+        True if the column was added (existing rows need summaries)
+    """
+    cursor.execute("PRAGMA table_info(profiles)")
+    if "summary" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE profiles ADD COLUMN summary TEXT")
+        logger.info("Added summary column to database")
+        return True
+    return False
+
+
+def update_profile_summaries(db_path: str = DATABASE_PATH, force: bool = False) -> int:
+    """
+    Compute summaries for profiles that don't have one yet.
+    
+    insert_profiles stores a summary with every new row; this fills in
+    rows inserted before summaries existed (init_database runs it once,
+    when it adds the column), or recomputes all of them (force) after
+    PROFILE_SUMMARY_TOKENS changes.
+    
+    Args:
+        db_path: Path to SQLite database
+        force: Recompute every summary
+        
+    Returns:
+        Number of summaries written
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    where = "" if force else " WHERE summary IS NULL"
+    cursor.execute(f"SELECT id, bio FROM profiles{where}")
+    updates = [(summarize_profile(dict(row)), row['id']) for row in cursor.fetchall()]
+    
+    if updates:
+        cursor.executemany("UPDATE profiles SET summary = ? WHERE id = ?", updates)
+        conn.commit()
+        logger.info(f"Computed {len(updates)} profile summaries")
+    
+    conn.close()
+    return len(updates)
+
+
 def insert_profiles(profiles: List[Dict[str, Any]], db_path: str = DATABASE_PATH) -> int:
     """
     Insert leadership profiles into database.
     
+    A short summary of each bio is computed here and stored with the
+    row, so answer prompts don't have to cut bios on every question.
+    
     Args:
         profiles: List of profile dictionaries
         db_path: Path to SQLite database
@@ -109,8 +209,8 @@ def insert_profiles(profiles: List[Dict[str, Any]], db_path: str = DATABASE_PATH
     for profile in profiles:
         try:
             cursor.execute("""
-                INSERT INTO profiles (name, role, bio, photo_url, contact, phone, linkedin, twitter, department, profile_url)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO profiles (name, role, bio, photo_url, contact, phone, linkedin, twitter, department, profile_url, summary)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 profile.get('name', ''),
                 profile.get('role', ''),
@@ -121,7 +221,8 @@ def insert_profiles(profiles: List[Dict[str, Any]], db_path: str = DATABASE_PATH
                 profile.get('linkedin', ''),
                 profile.get('twitter', ''),
                 profile.get('department', ''),
-                profile.get('profile_url', '')
+                profile.get('profile_url', ''),
+                summarize_profile(profile)
             ))
             inserted += 1
         except sqlite3.Error as e:
@@ -181,6 +282,70 @@ def search_profiles(query: str, department: Optional[str] = None,
     return results
 
 
+def build_fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query.
+    
+    Each remaining word is quoted, so punctuation such as '?' or '-' can't
+    raise an FTS5 syntax error, and the words are OR-ed so bm25 ranks
+    profiles that match more of them higher.
+    
+    Args:
+        text: User question or keywords
+        
+    Returns:
+        FTS5 MATCH expression, or an empty string if nothing is left
+    """
+    terms = [term for term in re.findall(r"\w+", text.lower()) if term not in FTS_STOPWORDS]
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def keyword_search_profiles(query: str, limit: int = 20, department: Optional[str] = None,
+                            db_path: str = DATABASE_PATH) -> List[Tuple[int, float]]:
+    """
+    Rank profiles by FTS5 bm25 relevance, returning IDs only.
+    
+    Args:
+        query: Free-text query (converted with build_fts_query)
+        limit: Maximum number of results
+        department: Optional department filter
+        db_path: Path to SQLite database
+        
+    Returns:
+        List of (profile id, relevance) pairs, best first, where relevance
+        is the negated bm25 score (higher is better)
+    """
+    match = build_fts_query(query)
+    if not match:
+        return []
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    sql = """
+        SELECT p.id, bm25(profiles_fts) as rank
+        FROM profiles p
+        JOIN profiles_fts ON profiles_fts.rowid = p.id
+        WHERE profiles_fts MATCH ?
+    """
+    params: List[Any] = [match]
+    if department:
+        sql += " AND p.department = ?"
+        params.append(department)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    
+    try:
+        cursor.execute(sql, params)
+        results = [(row[0], -row[1]) for row in cursor.fetchall()]
+    except sqlite3.OperationalError as e:
+        logger.error(f"Keyword search failed for {match!r}: {e}")
+        results = []
+    
+    conn.close()
+    return results
+
+
 def get_all_profiles(db_path: str = DATABASE_PATH) -> List[Dict[str, Any]]:
     """
     Get all profiles from database.
@@ -203,6 +368,38 @@ def get_all_profiles(db_path: str = DATABASE_PATH) -> List[Dict[str, Any]]:
     return results
 
 
+def get_profiles_by_ids(profile_ids: List[int], db_path: str = DATABASE_PATH) -> List[Dict[str, Any]]:
+    """
+    Get full profile rows for a list of IDs with a single query.
+    
+    Args:
+        profile_ids: Profile IDs to fetch
+        db_path: Path to SQLite database
+        
+    Returns:
+        List of profiles in the same order as profile_ids (missing IDs are skipped)
+    """
+    if not profile_ids:
+        return []
+    
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    placeholders = ", ".join("?" for _ in profile_ids)
+    cursor.execute(f"""
+        SELECT id, name, role, bio, photo_url, contact, phone, linkedin, twitter,
+               department, profile_url, summary, updated_at
+        FROM profiles
+        WHERE id IN ({placeholders})
+    """, list(profile_ids))
+    
+    rows = {row['id']: dict(row) for row in cursor.fetchall()}
+    
+    conn.close()
+    return [rows[profile_id] for profile_id in profile_ids if profile_id in rows]
+
+
 def get_profiles_by_department(department: str, db_path: str = DATABASE_PATH) -> List[Dict[str, Any]]:
     """
     Get all profiles in a specific department.
@@ -4,14 +4,18 @@ User can add any website, scrape team info, and ask questions
 """
 
 import streamlit as st
-from database import (search_profiles, get_all_profiles, get_profiles_by_department, 
-                      get_departments, get_profile_count, init_database, insert_profiles, 
-                      clear_database)
+from database import (get_all_profiles, get_profiles_by_department, 
+                      get_profile_count, init_database, insert_profiles, 
+                      clear_database, DATABASE_PATH)
 from enhanced_scraper import (scrape_team_page, find_team_page, validate_url, 
                               scrape_with_discovery, scrape_individual_profile)
-from vector_db import vector_search_profiles, generate_ai_answer, update_vector_database
-from typing import List, Dict, Any
-import re
+from vector_db import hybrid_search_profiles, stream_ai_answer, update_vector_database
+from src.search.photo_marker import split_photo_marker
+from src.search.warmup import warm_up, get_cached_departments
+from src.search.query_router import route_query
+from src.search.intent_classifier import classify_query
+from src.search.single_flight import get_single_flight, question_key
+from typing import List, Dict, Any, Iterator
 import logging
 from datetime import datetime
 
@@ -126,14 +130,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# SCOPE ENFORCEMENT
-TEAM_KEYWORDS = [
-    'who', 'ceo', 'cto', 'cfo', 'president', 'director', 'head', 'lead', 'leader',
-    'team', 'leadership', 'executive', 'founder', 'manager', 'officer', 'chief',
-    'role', 'position', 'title', 'department', 'responsible', 'charge', 'oversee',
-    'name', 'person', 'people', 'staff', 'employee', 'member', 'contact', 'email'
-]
-
+# SCOPE ENFORCEMENT (TEAM_KEYWORDS and the off-topic patterns live in the intent classifier)
 OUT_OF_SCOPE_RESPONSES = [
     "I only have information about the team members from the scraped website. Try asking:\n- 'Who is the CEO?'\n- 'Show me the technology leaders'\n- 'List all team members'",
     "I'm specialized in answering questions about the team members. I can help you find information about people, their roles, and departments.",
@@ -143,73 +140,104 @@ OUT_OF_SCOPE_RESPONSES = [
 
 def is_team_question(query: str) -> bool:
     """Check if question is about team members."""
-    query_lower = query.lower()
-    
-    for keyword in TEAM_KEYWORDS:
-        if keyword in query_lower:
-            return True
-    
-    out_of_scope_patterns = [
-        r'\b(weather|stock|price|market|news|sport|food|restaurant|lunch|dinner)\b',
-        r'\b(how to|what is|when|where|why)\b.*\b(python|code|program|algorithm)\b',
-        r'\b(movie|music|game|tv show)\b'
-    ]
-    
-    for pattern in out_of_scope_patterns:
-        if re.search(pattern, query_lower):
-            return False
-    
-    return True
+    return classify_query(query).is_team_question
 
 
-def answer_question(query: str, department_filter: str = None) -> str:
-    """Answer questions about team members using AI-powered vector search."""
+def _profile_list_answer(results: List[Dict[str, Any]]) -> str:
+    """Plain listing of matched profiles, used when the AI answer is missing or too short."""
+    response = f"I found {len(results)} team member(s):\n\n"
+    for i, profile in enumerate(results[:5], 1):
+        response += f"**{i}. {profile['name']}**\n"
+        if profile.get('role'):
+            response += f"   - Role: {profile['role']}\n"
+        if profile.get('department'):
+            response += f"   - Department: {profile['department']}\n"
+        if profile.get('bio') and len(profile['bio']) > 10:
+            response += f"   - Bio: {profile['bio'][:100]}...\n"
+        response += "\n"
+    
+    if len(results) > 5:
+        response += f"\n_...and {len(results) - 5} more. Check the 'Browse Profiles' tab to see all results._"
+    
+    return response
+
+
+def stream_answer(query: str, department_filter: str = None) -> Iterator[str]:
+    """Answer questions about team members, yielding the AI answer as it is generated."""
     if not is_team_question(query):
         import random
-        return random.choice(OUT_OF_SCOPE_RESPONSES)
+        yield random.choice(OUT_OF_SCOPE_RESPONSES)
+        return
     
+    # Sessions asking the same question at once follow one shared stream
+    key = question_key(query, "chat_app", DATABASE_PATH, department_filter)
+    yield from get_single_flight().stream(key, lambda: _stream_team_answer(query, department_filter))
+
+
+def _stream_team_answer(query: str, department_filter: str = None) -> Iterator[str]:
+    """Route, retrieve and stream the AI answer to a team question."""
+    streamed = ""
     try:
-        # Use vector search for better semantic matching
-        results = vector_search_profiles(query, limit=5)
+        # Structured questions (lists, counts, "who is the CEO") come straight from SQLite
+        routed = route_query(query, DATABASE_PATH, department=department_filter)
+        if routed:
+            yield routed.answer
+            return
+        
+        # Keyword and semantic matches, retrieved together and fused
+        results = hybrid_search_profiles(query, limit=5, department=department_filter)
         
-        # Fallback to traditional search if vector search fails
+        # Fall back to browsing if neither retriever found anything
         if not results:
-            results = search_profiles(query, department=department_filter)
-            if not results:
-                if department_filter:
-                    results = get_profiles_by_department(department_filter)
-                else:
-                    results = get_all_profiles()
+            if department_filter:
+                results = get_profiles_by_department(department_filter)
+            else:
+                results = get_all_profiles()
         
         if not results:
-            return "I couldn't find any team members matching your query. Try browsing all profiles in the 'Browse Profiles' tab."
+            yield "I couldn't find any team members matching your query. Try browsing all profiles in the 'Browse Profiles' tab."
+            return
         
         # Generate AI-powered answer
-        ai_answer = generate_ai_answer(query, results)
+        for piece in stream_ai_answer(query, results):
+            streamed += piece
+            yield piece
         
         # Add fallback information if AI fails
-        if not ai_answer or len(ai_answer) < 50:
-            response = f"I found {len(results)} team member(s):\n\n"
-            for i, profile in enumerate(results[:5], 1):
-                response += f"**{i}. {profile['name']}**\n"
-                if profile.get('role'):
-                    response += f"   - Role: {profile['role']}\n"
-                if profile.get('department'):
-                    response += f"   - Department: {profile['department']}\n"
-                if profile.get('bio') and len(profile['bio']) > 10:
-                    response += f"   - Bio: {profile['bio'][:100]}...\n"
-                response += "\n"
-            
-            if len(results) > 5:
-                response += f"\n_...and {len(results) - 5} more. Check the 'Browse Profiles' tab to see all results._"
-            
-            return response
-        
-        return ai_answer
+        if len(streamed.strip()) < 50:
+            yield ("\n\n" if streamed.strip() else "") + _profile_list_answer(results)
         
     except Exception as e:
         logger.error(f"Error in answer_question: {e}")
-        return f"Sorry, I encountered an error: {str(e)}"
+        # Keep a partial answer as it is rather than append the error to it
+        if not streamed:
+            yield f"Sorry, I encountered an error: {str(e)}"
+
+
+def answer_question(query: str, department_filter: str = None) -> str:
+    """Answer questions about team members using AI-powered vector search."""
+    return "".join(stream_answer(query, department_filter))
+
+
+def render_answer(content: str) -> None:
+    """Render an answer, showing its photo (if any) below the text."""
+    # Split content and photo URL
+    text_part, photo_url = split_photo_marker(content)
+    
+    # Display text first
+    st.markdown(text_part)
+    
+    # Display photo if URL exists
+    if photo_url and photo_url.startswith('http'):
+        # Clean, centered photo display with better styling
+        st.markdown(f"""
+        <div style="text-align: center; margin: 20px 0;">
+            <img src="{photo_url}" 
+                 alt="Profile Photo"
+                 style="max-width: 300px; border-radius: 12px; box-shadow: 0 4px 12px rgba(0,0,0,0.15);"
+                 onerror="this.onerror=null; this.style.display='none'; this.parentElement.innerHTML='<p style=color:#999;>Photo unavailable</p>';">
+        </div>
+        """, unsafe_allow_html=True)
 
 
 def render_profile_card(profile: Dict[str, Any]) -> None:
@@ -279,6 +307,15 @@ if 'scrape_status' not in st.session_state:
 # Initialize database
 init_database()
 
+
+@st.cache_resource
+def warm_up_search():
+    """Load the search index once per process, from its snapshot when current."""
+    return warm_up(DATABASE_PATH)
+
+
+warm_up_search()
+
 # Check if database has data
 profile_count = get_profile_count()
 
@@ -435,7 +472,7 @@ else:
     st.sidebar.metric("Total Team Members", total_profiles)
     
     # Department filter
-    departments = get_departments()
+    departments = get_cached_departments(DATABASE_PATH)
     department_filter = st.sidebar.selectbox(
         "Filter by Department",
         options=["All Departments"] + departments,
@@ -506,9 +543,16 @@ else:
             # Add user message to the START of the list (newest first)
             st.session_state['messages'].insert(0, {"role": "user", "content": prompt})
             
-            # Generate response
-            with st.spinner("🔍 Searching..."):
-                response = answer_question(prompt, department_filter=selected_dept)
+            # Stream the response so the first words show up right away
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                placeholder.markdown("🔍 Searching...")
+                response = ""
+                for piece in stream_answer(prompt, department_filter=selected_dept):
+                    response += piece
+                    placeholder.markdown(split_photo_marker(response)[0] + " ▌")
+                placeholder.empty()
+                render_answer(response)
             
             # Add assistant response to the START of the list (newest first)
             st.session_state['messages'].insert(0, {"role": "assistant", "content": response})
@@ -522,31 +566,7 @@ else:
         st.markdown("### 💭 Conversation")
         for message in st.session_state['messages']:
             with st.chat_message(message["role"]):
-                content = message["content"]
-                
-                # Check if content has photo URL marker
-                if "📸PHOTO📸" in content:
-                    # Split content and photo URL
-                    parts = content.split("📸PHOTO📸")
-                    text_part = parts[0].strip()
-                    photo_url = parts[1].strip() if len(parts) > 1 else ""
-                    
-                    # Display text first
-                    st.markdown(text_part)
-                    
-                    # Display photo if URL exists
-                    if photo_url and photo_url.startswith('http'):
-                        # Clean, centered photo display with better styling
-                        st.markdown(f"""
-                        <div style="text-align: center; margin: 20px 0;">
-                            <img src="{photo_url}" 
-                                 alt="Profile Photo"
-                                 style="max-width: 300px; border-radius: 12px; box-shadow: 0 4px 12px rgba(0,0,0,0.15);"
-                                 onerror="this.onerror=null; this.style.display='none'; this.parentElement.innerHTML='<p style=color:#999;>Photo unavailable</p>';">
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.markdown(content)
+                render_answer(message["content"])
     
     # TAB 2: BROWSE PROFILES
     with tab2:
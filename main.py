@@ -2,14 +2,18 @@
 import streamlit as st
 import sys
 import os
+from dotenv import load_dotenv
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+load_dotenv()
+
 from src.services.chat_service import ChatService
 from src.services.knowledge_service import KnowledgeService
 from src.services.scraping_service import ScrapingService
 from src.ui.chat_interface import render_chat_interface
 from src.ui.browse_interface import render_browse_interface
 from src.ui.admin_interface import render_admin_interface
+from src.search.warmup import warm_up
 
 st.set_page_config(page_title="Smart Knowledge Repository", page_icon="", layout="wide")
 
@@ -20,10 +24,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def warm_up_search(db_path: str):
+    """Load the search index once per process, from its snapshot when current."""
+    return warm_up(db_path)
+
 def main():
     chat_service = ChatService()
     knowledge_service = KnowledgeService()
     scraping_service = ScrapingService()
+    warm_up_search(knowledge_service.db_path)
     
     with st.sidebar:
         st.title(" Smart Knowledge Repository")
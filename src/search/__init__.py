@@ -1 +1,9 @@
-﻿"""Search package"""
+﻿"""
+Search package
+
+Modules here read their settings from the environment when imported, so
+.env is loaded first, whichever entry point imports them.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
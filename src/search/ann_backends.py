@@ -0,0 +1,720 @@
+"""
+Approximate Nearest Neighbour Backends
+Pluggable search structures for the in-memory vector indexes
+
+Backends work on unit-length float32 rows and return row positions with
+inner-product (cosine) scores:
+    exact  NumPy brute force, the reference for recall checks
+    flat   FAISS IndexFlatIP (exact, SIMD-optimized)
+    ivf    FAISS IndexIVFFlat (inverted lists, probes nprobe of nlist cells)
+    hnsw   FAISS IndexHNSWFlat (graph search)
+    int8   NumPy scan over int8 codes with a per-vector scale (4x smaller)
+    float16  NumPy scan over half-precision rows (2x smaller)
+
+The quantized backends score every row in the compact space, then rescore
+a shortlist of the best candidates against the full-precision matrix, so
+the final ranking and scores are exact for the rows that reach it.
+
+Every backend also answers a batch of queries with search_many, scoring
+them together (one matrix-matrix product per block for the NumPy
+backends, one FAISS call otherwise).
+
+Every backend accepts an optional subset of row positions (a metadata
+filter's posting list) and only returns rows from it, so filtered
+queries still get k results when k matching rows exist.
+
+The backend is chosen with the VECTOR_BACKEND environment variable. FAISS
+is optional; without it the FAISS backends fall back to exact search.
+"""
+
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # pragma: no cover - depends on installed packages
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "exact")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/embeddings")
+IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "256"))
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "80"))
+RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+QUANTIZED_BLOCK_ROWS = 16384
+SCORE_BLOCK_ELEMENTS = 1 << 24  # Largest query-by-row score block (64MB of float32)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row to unit length so dot products are cosine similarities.
+
+    Zero rows are left as zeros.
+
+    Args:
+        matrix: 2-D array of vectors
+
+    Returns:
+        Contiguous float32 array of unit-length rows
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get the positions of the k highest scores, best first.
+
+    Uses argpartition so only the k winners are fully sorted.
+
+    Args:
+        scores: 1-D array of scores
+        k: Number of results
+
+    Returns:
+        Array of positions into scores
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_batch(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise top_k for a 2-D block of scores.
+
+    Args:
+        scores: Array of shape (queries, rows)
+        k: Number of results per query
+
+    Returns:
+        Array of shape (queries, min(k, rows)) with positions, best first
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def query_blocks(num_queries: int, num_rows: int):
+    """Split a query batch so each score block stays under SCORE_BLOCK_ELEMENTS"""
+    size = max(1, SCORE_BLOCK_ELEMENTS // max(1, num_rows))
+    for start in range(0, num_queries, size):
+        yield start, min(start + size, num_queries)
+
+
+def _empty_result() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+
+class SearchBackend(ABC):
+    """
+    Interface every search backend implements
+
+    Abstract, so a backend missing a method fails when it is created
+    rather than in the middle of a query.
+    """
+
+    name = "base"
+    persistent = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of rows indexed"""
+
+    @abstractmethod
+    def build(self, matrix: np.ndarray) -> None:
+        """Index unit-length float32 rows"""
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int,
+               subset: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, scores) of the k best rows, best first"""
+
+    @abstractmethod
+    def search_many(self, queries: np.ndarray, k: int,
+                    subset: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search for each of a batch of queries"""
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        """Persist the index (a no-op for backends that are cheap to rebuild)"""
+
+    @abstractmethod
+    def load(self, path: str) -> bool:
+        """Read a persisted index; True if it was loaded"""
+
+
+class ExactBackend(SearchBackend):
+    """Brute-force NumPy search over the full matrix"""
+
+    name = "exact"
+    persistent = False
+
+    def __init__(self, **params):
+        self.params = params
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self.matrix.shape[0])
+
+    def build(self, matrix: np.ndarray) -> None:
+        """Use the (already normalized) matrix as-is"""
+        self.matrix = matrix
+
+    def search(self, query: np.ndarray, k: int,
+               subset: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every row (or every row in subset) against a unit-length query.
+
+        Args:
+            query: Unit-length query vector
+            k: Number of results
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            Tuple of (row positions, scores), best first
+        """
+        if subset is not None:
+            scores = self.matrix[subset] @ query
+            best = top_k(scores, k)
+            return subset[best], scores[best]
+
+        scores = self.matrix @ query
+        positions = top_k(scores, k)
+        return positions, scores[positions]
+
+    def search_many(self, queries: np.ndarray, k: int,
+                    subset: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score a batch of queries with one matrix product per block.
+
+        Args:
+            queries: 2-D array of unit-length queries
+            k: Number of results per query
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            (row positions, scores) for each query, best first
+        """
+        matrix = self.matrix if subset is None else self.matrix[subset]
+        results = []
+        for start, stop in query_blocks(len(queries), matrix.shape[0]):
+            scores = queries[start:stop] @ matrix.T
+            for row_scores, positions in zip(scores, top_k_batch(scores, k)):
+                found = positions if subset is None else subset[positions]
+                results.append((found, row_scores[positions]))
+        return results
+
+    def save(self, path: str) -> None:
+        """Nothing to persist; the matrix is rebuilt from its source"""
+
+    def load(self, path: str) -> bool:
+        return False
+
+
+class FaissBackend(SearchBackend):
+    """Base class for FAISS inner-product indexes"""
+
+    name = "flat"
+    persistent = True
+
+    def __init__(self, **params):
+        self.params = params
+        self.index = None
+
+    def __len__(self) -> int:
+        return int(self.index.ntotal) if self.index is not None else 0
+
+    def _create(self, matrix: np.ndarray):
+        return faiss.IndexFlatIP(matrix.shape[1])
+
+    def _configure(self) -> None:
+        """Apply search-time parameters to a built or loaded index"""
+
+    def _search_parameters(self, selector):
+        """Search parameters restricting results to the selected rows"""
+        return faiss.SearchParameters(sel=selector)
+
+    def build(self, matrix: np.ndarray) -> None:
+        """
+        Build the FAISS index from unit-length rows.
+
+        Args:
+            matrix: Contiguous float32 matrix
+        """
+        self.index = self._create(matrix)
+        if not self.index.is_trained:
+            self.index.train(matrix)
+        self.index.add(matrix)
+        self._configure()
+
+    def search(self, query: np.ndarray, k: int,
+               subset: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for the k best rows.
+
+        Args:
+            query: Unit-length query vector
+            k: Number of results
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            Tuple of (row positions, scores), best first
+        """
+        return self.search_many(query.reshape(1, -1), k, subset=subset)[0]
+
+    def search_many(self, queries: np.ndarray, k: int,
+                    subset: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Search a batch of queries in one FAISS call.
+
+        Args:
+            queries: 2-D array of unit-length queries
+            k: Number of results per query
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            (row positions, scores) for each query, best first
+        """
+        k = min(k, len(self) if subset is None else len(subset))
+        if k <= 0:
+            return [_empty_result() for _ in range(len(queries))]
+
+        params = None
+        if subset is not None:
+            params = self._search_parameters(faiss.IDSelectorBatch(np.asarray(subset, dtype=np.int64)))
+        scores, positions = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k, params=params)
+        found = positions >= 0
+        return [(p[f], s[f]) for p, s, f in zip(positions, scores, found)]
+
+    def save(self, path: str) -> None:
+        """Write the index to disk"""
+        faiss.write_index(self.index, path)
+
+    def load(self, path: str) -> bool:
+        """
+        Read a previously saved index.
+
+        Args:
+            path: Index file path
+
+        Returns:
+            True if the index was loaded
+        """
+        try:
+            self.index = faiss.read_index(path)
+        except RuntimeError as e:
+            logger.warning(f"Could not read FAISS index {path}: {e}")
+            return False
+        self._configure()
+        return True
+
+
+class FaissIVFBackend(FaissBackend):
+    """Inverted-file index: probes nprobe of nlist clusters per query"""
+
+    name = "ivf"
+
+    def _create(self, matrix: np.ndarray):
+        # FAISS wants ~39 training points per centroid
+        nlist = max(1, min(self.params.get('nlist', IVF_NLIST), matrix.shape[0] // 39))
+        quantizer = faiss.IndexFlatIP(matrix.shape[1])
+        return faiss.IndexIVFFlat(quantizer, matrix.shape[1], nlist, faiss.METRIC_INNER_PRODUCT)
+
+    def _configure(self) -> None:
+        self.index.nprobe = min(self.params.get('nprobe', IVF_NPROBE), self.index.nlist)
+
+    def _search_parameters(self, selector):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+
+
+class FaissHNSWBackend(FaissBackend):
+    """Hierarchical navigable small-world graph index"""
+
+    name = "hnsw"
+
+    def _create(self, matrix: np.ndarray):
+        index = faiss.IndexHNSWFlat(matrix.shape[1], self.params.get('m', HNSW_M),
+                                    faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.params.get('ef_construction', HNSW_EF_CONSTRUCTION)
+        return index
+
+    def _configure(self) -> None:
+        self.index.hnsw.efSearch = self.params.get('ef_search', HNSW_EF_SEARCH)
+
+    def _search_parameters(self, selector):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=self.index.hnsw.efSearch)
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize rows to int8 with one scale per row.
+
+    Each row is divided by max(|x|) / 127, so the largest component maps
+    to +/-127 and row * scale reconstructs the original within half a step.
+
+    Args:
+        matrix: 2-D float array
+
+    Returns:
+        Tuple of (int8 codes, float32 scale per row)
+    """
+    scales = np.abs(matrix).max(axis=1).astype(np.float32) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedBackend(SearchBackend):
+    """
+    Base class for compact in-memory backends with exact rescoring
+
+    Subclasses hold a compressed copy of the matrix and score it in
+    blocks. The k * rescore_factor best candidates are then rescored
+    against the full-precision matrix, which may be a read-only memory
+    map so only the compact copy has to stay resident.
+    """
+
+    name = "quantized"
+    persistent = False
+
+    def __init__(self, **params):
+        self.params = params
+        self.rescore_factor = max(1, params.get('rescore_factor', RESCORE_FACTOR))
+        self.reference = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self.reference.shape[0])
+
+    @abstractmethod
+    def _compress(self, matrix: np.ndarray) -> None:
+        """Build the compact copy of the matrix"""
+
+    @abstractmethod
+    def _decode(self, rows) -> np.ndarray:
+        """Compact rows (a slice or positions) as float32"""
+
+    def _row_scales(self, rows) -> Optional[np.ndarray]:
+        """Per-row factors to apply to decoded scores, if any"""
+        return None
+
+    def _approximate_scores(self, queries: np.ndarray,
+                            subset: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Compact-space scores, decoded one block of rows at a time.
+
+        Args:
+            queries: 2-D array of unit-length queries
+            subset: Sorted row positions to score instead of every row
+
+        Returns:
+            Array of shape (queries, rows scored)
+        """
+        total = len(self) if subset is None else len(subset)
+        scores = np.empty((queries.shape[0], total), dtype=np.float32)
+        for start in range(0, total, QUANTIZED_BLOCK_ROWS):
+            stop = min(start + QUANTIZED_BLOCK_ROWS, total)
+            rows = slice(start, stop) if subset is None else subset[start:stop]
+            block_scores = queries @ self._decode(rows).T
+            scales = self._row_scales(rows)
+            if scales is not None:
+                block_scores *= scales
+            scores[:, start:stop] = block_scores
+        return scores
+
+    def build(self, matrix: np.ndarray) -> None:
+        """
+        Compress the (already normalized) matrix and keep it for rescoring.
+
+        Args:
+            matrix: Unit-length float32 rows (ndarray or memory map)
+        """
+        self.reference = matrix
+        self._compress(matrix)
+
+    def search(self, query: np.ndarray, k: int,
+               subset: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Shortlist in the compact space, then rescore at full precision.
+
+        Args:
+            query: Unit-length query vector
+            k: Number of results
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            Tuple of (row positions, exact scores), best first
+        """
+        return self.search_many(query.reshape(1, -1), k, subset=subset)[0]
+
+    def search_many(self, queries: np.ndarray, k: int,
+                    subset: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Shortlist a batch of queries together, then rescore each one.
+
+        Args:
+            queries: 2-D array of unit-length queries
+            k: Number of results per query
+            subset: Sorted row positions to restrict the search to
+
+        Returns:
+            (row positions, exact scores) for each query, best first
+        """
+        total = len(self) if subset is None else len(subset)
+        if not total or k <= 0:
+            return [_empty_result() for _ in range(len(queries))]
+
+        results = []
+        for start, stop in query_blocks(len(queries), total):
+            approximate = self._approximate_scores(queries[start:stop], subset)
+            shortlists = top_k_batch(approximate, k * self.rescore_factor)
+            for query, shortlist in zip(queries[start:stop], shortlists):
+                if subset is not None:
+                    shortlist = subset[shortlist]
+                # Sorted positions keep memory-mapped reads sequential
+                shortlist = np.sort(shortlist)
+                exact_scores = self.reference[shortlist] @ query
+                best = top_k(exact_scores, k)
+                results.append((shortlist[best], exact_scores[best]))
+        return results
+
+    def save(self, path: str) -> None:
+        """Nothing to persist; compression is cheap to redo"""
+
+    def load(self, path: str) -> bool:
+        return False
+
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        """Bytes held by the compact copy"""
+
+
+class Int8Backend(QuantizedBackend):
+    """int8 codes with a float32 scale per vector"""
+
+    name = "int8"
+
+    def _compress(self, matrix: np.ndarray) -> None:
+        codes = []
+        scales = []
+        for start in range(0, matrix.shape[0], QUANTIZED_BLOCK_ROWS):
+            block_codes, block_scales = quantize_int8(np.asarray(matrix[start:start + QUANTIZED_BLOCK_ROWS]))
+            codes.append(block_codes)
+            scales.append(block_scales)
+        self.codes = np.vstack(codes) if codes else np.zeros((0, matrix.shape[1]), dtype=np.int8)
+        self.scales = np.concatenate(scales) if scales else np.zeros(0, dtype=np.float32)
+
+    def _decode(self, rows) -> np.ndarray:
+        return self.codes[rows].astype(np.float32)
+
+    def _row_scales(self, rows) -> Optional[np.ndarray]:
+        return self.scales[rows]
+
+    def memory_bytes(self) -> int:
+        return int(self.codes.nbytes + self.scales.nbytes)
+
+
+class Float16Backend(QuantizedBackend):
+    """Half-precision copy of every vector"""
+
+    name = "float16"
+
+    def _compress(self, matrix: np.ndarray) -> None:
+        self.half = np.empty(matrix.shape, dtype=np.float16)
+        for start in range(0, matrix.shape[0], QUANTIZED_BLOCK_ROWS):
+            self.half[start:start + QUANTIZED_BLOCK_ROWS] = matrix[start:start + QUANTIZED_BLOCK_ROWS]
+
+    def _decode(self, rows) -> np.ndarray:
+        return self.half[rows].astype(np.float32)
+
+    def memory_bytes(self) -> int:
+        return int(self.half.nbytes)
+
+
+BACKENDS = {
+    'exact': ExactBackend,
+    'flat': FaissBackend,
+    'ivf': FaissIVFBackend,
+    'hnsw': FaissHNSWBackend,
+    'int8': Int8Backend,
+    'float16': Float16Backend
+}
+
+QUANTIZED_BACKENDS = ('int8', 'float16')
+
+
+def is_quantized(name: Optional[str] = None) -> bool:
+    """Whether a backend name (default VECTOR_BACKEND) keeps only a compact copy in memory"""
+    return (name or VECTOR_BACKEND).lower() in QUANTIZED_BACKENDS
+
+
+def create_backend(name: Optional[str] = None, **params):
+    """
+    Create a search backend.
+
+    Args:
+        name: exact, flat, ivf, hnsw, int8 or float16 (defaults to VECTOR_BACKEND)
+        **params: Backend parameters (nlist, nprobe, m, ef_search,
+            ef_construction, rescore_factor)
+
+    Returns:
+        An unbuilt backend instance
+    """
+    name = (name or VECTOR_BACKEND).lower()
+    if name not in BACKENDS:
+        logger.warning(f"Unknown vector backend '{name}', using exact search")
+        name = 'exact'
+    if issubclass(BACKENDS[name], FaissBackend) and faiss is None:
+        logger.warning(f"faiss is not installed, using exact search instead of '{name}'")
+        name = 'exact'
+    return BACKENDS[name](**params)
+
+
+def build_backend(matrix: np.ndarray, name: Optional[str] = None,
+                  cache_path: Optional[str] = None, cache_key: Optional[Dict[str, Any]] = None,
+                  **params):
+    """
+    Create a backend for a matrix, reusing a persisted index when possible.
+
+    A persisted index is reused only if the header saved next to it
+    matches cache_key (e.g. the source table's version) and the matrix
+    shape.
+
+    Args:
+        matrix: Unit-length float32 rows
+        name: Backend name (defaults to VECTOR_BACKEND)
+        cache_path: File to persist the index to (without extension)
+        cache_key: Values that must match for the persisted index to be reused
+        **params: Backend parameters
+
+    Returns:
+        A built backend
+    """
+    backend = create_backend(name, **params)
+
+    header = dict(cache_key or {})
+    header.update({
+        'backend': backend.name,
+        'params': params,
+        'count': int(matrix.shape[0]),
+        'dimension': int(matrix.shape[1])
+    })
+
+    if cache_path and backend.persistent:
+        index_file = f"{cache_path}.{backend.name}.faiss"
+        header_file = f"{cache_path}.{backend.name}.json"
+        try:
+            with open(header_file, "r", encoding="utf-8") as f:
+                saved_header = json.load(f)
+        except (OSError, ValueError):
+            saved_header = None
+
+        if saved_header == header and backend.load(index_file):
+            logger.info(f"Loaded {backend.name} index from {index_file}")
+            return backend
+
+        backend.build(matrix)
+        try:
+            os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+            backend.save(index_file)
+            with open(header_file, "w", encoding="utf-8") as f:
+                json.dump(header, f)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Could not persist {backend.name} index: {e}")
+        return backend
+
+    backend.build(matrix)
+    return backend
+
+
+def recall_at_k(candidate, reference, queries: np.ndarray, k: int = 10) -> float:
+    """
+    Measure how many of the exact top-k results a backend finds.
+
+    Args:
+        candidate: Backend under test
+        reference: Exact backend built on the same matrix
+        queries: 2-D array of unit-length queries
+        k: Cut-off
+
+    Returns:
+        Mean recall@k over the queries (1.0 means identical results)
+    """
+    if not len(queries):
+        return 0.0
+
+    total = 0.0
+    for query in queries:
+        expected, _ = reference.search(query, k)
+        found, _ = candidate.search(query, k)
+        if len(expected):
+            total += len(set(expected.tolist()) & set(found.tolist())) / len(expected)
+    return total / len(queries)
+
+
+def compare_backends(matrix: np.ndarray, queries: np.ndarray, k: int = 10,
+                     names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Compare recall and latency of several backends against exact search.
+
+    Args:
+        matrix: Unit-length float32 rows
+        queries: 2-D array of unit-length queries
+        k: Cut-off for recall@k
+        names: Backends to test (defaults to all)
+
+    Returns:
+        Dictionary mapping backend name to recall, build_ms, query_ms and
+        memory_mb (resident search structure, estimated as the float32
+        matrix for non-quantized backends)
+    """
+    reference = ExactBackend()
+    reference.build(matrix)
+
+    report = {}
+    for name in names or list(BACKENDS):
+        backend = create_backend(name)
+        if backend.name != name:
+            continue
+
+        start = time.perf_counter()
+        backend.build(matrix)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for query in queries:
+            backend.search(query, k)
+        query_ms = (time.perf_counter() - start) * 1000 / max(1, len(queries))
+
+        report[name] = {
+            'recall': recall_at_k(backend, reference, queries, k),
+            'build_ms': build_ms,
+            'query_ms': query_ms,
+            'memory_mb': (backend.memory_bytes() if hasattr(backend, 'memory_bytes')
+                          else matrix.nbytes) / (1024 * 1024)
+        }
+    return report
+
@@ -0,0 +1,297 @@
+"""
+Answer Cache
+Cache generated answers keyed by the question and the profiles it was answered from
+
+The key combines the normalized question with a fingerprint of the
+retrieved profiles (ID, updated_at and a digest of the fields the prompt
+uses, in retrieval order). A re-scrape or edit changes the fingerprint,
+so stale answers are never served; they simply stop being looked up and
+age out. Entries also expire after a TTL, so prompt or model changes
+take effect without clearing the cache by hand.
+
+Like the embedding cache, an in-memory LRU sits in front of a SQLite
+tier that survives Streamlit restarts and is trimmed by entry count.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.search.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "data/answer_cache.db")
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 60 * 60)))
+ANSWER_CACHE_MEMORY_ITEMS = int(os.getenv("ANSWER_CACHE_MEMORY_ITEMS", "512"))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", "10000"))
+
+# Profile fields that end up in the prompt
+FINGERPRINT_FIELDS = ('name', 'role', 'department', 'bio', 'summary', 'contact', 'linkedin', 'photo_url')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a question so trivially different phrasings share an entry.
+
+    Args:
+        query: Raw question
+
+    Returns:
+        Normalized question without trailing punctuation
+    """
+    return normalize_text(query).rstrip(" ?!.")
+
+
+def profile_fingerprint(profiles: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint the retrieved profiles an answer is based on.
+
+    Args:
+        profiles: Profiles in the order they are given to the model
+
+    Returns:
+        Hex SHA-256 digest of each profile's ID, updated_at and content
+    """
+    digest = hashlib.sha256()
+    for profile in profiles:
+        digest.update(f"{profile.get('id')}\0{profile.get('updated_at')}\0".encode("utf-8"))
+        for field in FINGERPRINT_FIELDS:
+            digest.update(f"{profile.get(field) or ''}\0".encode("utf-8"))
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+def answer_key(query: str, profiles: List[Dict[str, Any]], model: str) -> str:
+    """
+    Build the cache key for a question answered from a set of profiles.
+
+    Args:
+        query: Raw question
+        profiles: Retrieved profiles
+        model: Chat model name
+
+    Returns:
+        Hex SHA-256 digest of the model, normalized question and profile fingerprint
+    """
+    source = f"{model}\0{normalize_query(query)}\0{profile_fingerprint(profiles)}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """In-memory LRU tier backed by a SQLite tier, with a TTL on both"""
+
+    def __init__(self, db_path: Optional[str] = ANSWER_CACHE_PATH,
+                 ttl: float = ANSWER_CACHE_TTL,
+                 memory_items: int = ANSWER_CACHE_MEMORY_ITEMS,
+                 max_items: int = ANSWER_CACHE_MAX_ITEMS):
+        """
+        Initialize answer cache
+
+        Args:
+            db_path: Path to the SQLite cache file (None for memory only)
+            ttl: Seconds an answer stays valid (0 disables the cache)
+            memory_items: Number of answers kept in the LRU tier
+            max_items: Number of answers kept in the SQLite tier
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self.max_items = max_items
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_items = 0
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'writes': 0,
+            'evictions': 0
+        }
+
+        if db_path and self.enabled:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether answers are cached at all"""
+        return self.ttl > 0
+
+    def _open(self) -> None:
+        """Open the SQLite tier, creating the table if needed"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    key TEXT PRIMARY KEY,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_answer_last_used ON answer_cache(last_used)")
+            cursor.execute("DELETE FROM answer_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            cursor.execute("SELECT COUNT(*) FROM answer_cache")
+            self._disk_items = cursor.fetchone()[0]
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Answer cache disabled on disk ({self.db_path}): {e}")
+            self._conn = None
+
+    def _remember(self, key: str, answer: str, created_at: float) -> None:
+        """Put an entry in the LRU tier (caller holds the lock)"""
+        self._memory[key] = (answer, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, query: str, profiles: List[Dict[str, Any]], model: str) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            query: User question
+            profiles: Profiles retrieved for the question
+            model: Chat model name
+
+        Returns:
+            The answer, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+
+        key = answer_key(query, profiles, model)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    cursor = self._conn.cursor()
+                    cursor.execute("SELECT answer, created_at FROM answer_cache WHERE key = ?", (key,))
+                    row = cursor.fetchone()
+                    if row and now - row[1] <= self.ttl:
+                        cursor.execute("UPDATE answer_cache SET last_used = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, row[0], row[1])
+                        self.stats['disk_hits'] += 1
+                        return row[0]
+                    if row:
+                        cursor.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+                        self._conn.commit()
+                        self._disk_items -= 1
+                        entry = row
+                except sqlite3.Error as e:
+                    logger.warning(f"Answer cache read failed: {e}")
+
+            self.stats['expired' if entry is not None else 'misses'] += 1
+            return None
+
+    def put(self, query: str, profiles: List[Dict[str, Any]], model: str, answer: str) -> None:
+        """
+        Store an answer in both tiers.
+
+        Args:
+            query: User question
+            profiles: Profiles the answer was generated from
+            model: Chat model name
+            answer: Complete answer, including any photo marker
+        """
+        if not self.enabled or not answer:
+            return
+
+        key = answer_key(query, profiles, model)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, answer, now)
+
+            if self._conn is None:
+                return
+
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute("SELECT 1 FROM answer_cache WHERE key = ?", (key,))
+                exists = cursor.fetchone() is not None
+                cursor.execute("""
+                    INSERT OR REPLACE INTO answer_cache (key, answer, created_at, last_used)
+                    VALUES (?, ?, ?, ?)
+                """, (key, answer, now, now))
+                self._disk_items += 0 if exists else 1
+                self.stats['writes'] += 1
+
+                if self._disk_items > self.max_items:
+                    self._evict(cursor)
+
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache write failed: {e}")
+
+    def _evict(self, cursor: sqlite3.Cursor) -> None:
+        """Drop expired rows, then least recently used ones until under 90% of the limit"""
+        cursor.execute("DELETE FROM answer_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        expired = cursor.rowcount
+        self._disk_items -= expired
+
+        excess = self._disk_items - int(self.max_items * 0.9)
+        if excess > 0:
+            cursor.execute("""
+                DELETE FROM answer_cache WHERE key IN (
+                    SELECT key FROM answer_cache ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+            self._disk_items -= excess
+
+        self.stats['evictions'] += expired + max(0, excess)
+        logger.info(f"Evicted {expired + max(0, excess)} entries from answer cache")
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answer_cache")
+                self._conn.commit()
+            self._disk_items = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses'] + stats['expired']
+            stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+            stats['memory_items'] = len(self._memory)
+            stats['disk_items'] = self._disk_items
+            return stats
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get the process-wide answer cache, creating it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+        return _cache
@@ -0,0 +1,282 @@
+"""
+Async Embedding Client
+Bounded-concurrency embedding requests with retries and backoff
+
+Batches are sent concurrently up to a fixed limit. Throttled or
+transient failures (429, 5xx, timeouts, connection errors) are retried
+with full-jitter exponential backoff, honouring Retry-After when the
+provider sends it, so indexing runs at the provider's rate ceiling
+instead of dropping items. Synchronous wrappers are provided for the
+existing callers.
+
+The timeout is passed to the provider, whose HTTP client drops the
+connection when it expires, so a timed-out request is really gone before
+its retry starts and the concurrency limit holds.
+
+Interactive queries (one chat question) use embed_query instead: a
+short retry budget of their own, run on the calling thread without an
+event loop, so a slow provider costs a user seconds rather than minutes.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.search.embedding_providers import get_embedding_provider
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+EMBEDDING_REQUEST_TIMEOUT = float(os.getenv("EMBEDDING_REQUEST_TIMEOUT", "30"))
+EMBEDDING_BACKOFF_BASE = 0.5
+EMBEDDING_BACKOFF_MAX = 30.0
+
+# Budget for a single interactive query
+EMBEDDING_QUERY_MAX_RETRIES = int(os.getenv("EMBEDDING_QUERY_MAX_RETRIES", "1"))
+EMBEDDING_QUERY_TIMEOUT = float(os.getenv("EMBEDDING_QUERY_TIMEOUT", "5"))
+EMBEDDING_QUERY_BACKOFF_MAX = 1.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Args:
+        error: Exception raised by the provider
+
+    Returns:
+        True for throttling, server errors, timeouts and connection errors
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+
+    # openai raises APIConnectionError / APITimeoutError without a status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Read the server's requested delay from a failed response.
+
+    Args:
+        error: Exception raised by the provider
+
+    Returns:
+        Seconds to wait, or None if the response gave no hint
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # Retry-After can also be an HTTP date; fall back to our own backoff
+        return None
+    return None
+
+
+class AsyncEmbeddingClient:
+    """Concurrency-limited embedding client with jittered exponential backoff"""
+
+    def __init__(self, model: Optional[str] = None,
+                 max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+                 max_retries: int = EMBEDDING_MAX_RETRIES,
+                 timeout: float = EMBEDDING_REQUEST_TIMEOUT,
+                 backoff_base: float = EMBEDDING_BACKOFF_BASE,
+                 backoff_max: float = EMBEDDING_BACKOFF_MAX,
+                 query_max_retries: int = EMBEDDING_QUERY_MAX_RETRIES,
+                 query_timeout: float = EMBEDDING_QUERY_TIMEOUT):
+        """
+        Initialize async embedding client
+
+        Args:
+            model: Embedding model (defaults to the configured provider)
+            max_concurrency: Requests allowed in flight at once
+            max_retries: Retries per batch after the first attempt
+            timeout: Seconds allowed per request
+            backoff_base: First backoff ceiling in seconds
+            backoff_max: Largest backoff ceiling in seconds
+            query_max_retries: Retries for a single interactive query
+            query_timeout: Seconds allowed per interactive query request
+        """
+        self.provider = get_embedding_provider(model)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.query_max_retries = query_max_retries
+        self.query_timeout = query_timeout
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'failed_batches': 0
+        }
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter backoff, never shorter than the server's Retry-After"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def embed_batch(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[List[float]]:
+        """
+        Embed one batch, retrying transient failures.
+
+        Args:
+            texts: Texts for a single request
+            semaphore: Limits requests in flight
+
+        Returns:
+            One embedding per text, or an empty list if the batch failed
+        """
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                self.stats['requests'] += 1
+                try:
+                    # The provider enforces the timeout, so the slot is
+                    # held until the request has actually ended
+                    return await asyncio.to_thread(self.provider.embed, texts, self.timeout)
+                except Exception as e:
+                    error = e
+
+            if getattr(error, "status_code", None) == 429:
+                self.stats['throttled'] += 1
+
+            if attempt >= self.max_retries or not is_retryable(error):
+                logger.error(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempt(s): {error}")
+                self.stats['failed_batches'] += 1
+                return []
+
+            delay = self._backoff(attempt, error)
+            self.stats['retries'] += 1
+            logger.warning(f"Embedding request failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        return []
+
+    async def embed_batches(self, batches: List[List[str]]) -> List[List[List[float]]]:
+        """
+        Embed several batches concurrently.
+
+        Args:
+            batches: Lists of texts, one list per request
+
+        Returns:
+            Embeddings for each batch, in order (empty list for failed batches)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self.embed_batch(batch, semaphore) for batch in batches))
+
+    def embed_batches_sync(self, batches: List[List[str]]) -> List[List[List[float]]]:
+        """Blocking wrapper around embed_batches for synchronous callers"""
+        return run_sync(self.embed_batches(batches))
+
+    def embed_sync(self, texts: List[str]) -> List[List[float]]:
+        """Blocking wrapper that embeds texts as a single request"""
+        return self.embed_batches_sync([texts])[0]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed one interactive query on the calling thread.
+
+        Uses the short query budget (EMBEDDING_QUERY_*) instead of the
+        indexing policy, and gives up rather than wait out a long
+        Retry-After.
+
+        Args:
+            text: Query text
+
+        Returns:
+            The embedding, or an empty list if the request failed
+        """
+        for attempt in range(self.query_max_retries + 1):
+            self.stats['requests'] += 1
+            try:
+                return self.provider.embed([text], self.query_timeout)[0]
+            except Exception as e:
+                error = e
+
+            if getattr(error, "status_code", None) == 429:
+                self.stats['throttled'] += 1
+
+            delay = self._backoff(attempt, error)
+            if attempt >= self.query_max_retries or not is_retryable(error) or delay > EMBEDDING_QUERY_BACKOFF_MAX:
+                logger.error(f"Query embedding failed after {attempt + 1} attempt(s): {error}")
+                return []
+
+            self.stats['retries'] += 1
+            logger.warning(f"Query embedding failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        return []
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    If the calling thread already has a running event loop (e.g. inside
+    an async framework), the coroutine runs on a separate thread with its
+    own loop instead of failing.
+
+    Args:
+        coroutine: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    result = {}
+
+    def runner():
+        try:
+            result['value'] = asyncio.run(coroutine)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+_clients: Dict[Optional[str], AsyncEmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(model: Optional[str] = None) -> AsyncEmbeddingClient:
+    """Get a shared client for a model (defaults to the configured provider)"""
+    with _clients_lock:
+        if model not in _clients:
+            _clients[model] = AsyncEmbeddingClient(model)
+        return _clients[model]
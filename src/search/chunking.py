@@ -0,0 +1,82 @@
+"""
+Text Chunking
+Split long texts into overlapping, sentence-aligned chunks for embedding
+
+One vector for a long biography or article averages every topic in it,
+so a query about one of them matches weakly. Embedding each chunk
+separately and scoring a parent by its best chunk (max-sim) keeps the
+match sharp.
+"""
+
+import os
+import re
+from typing import List
+
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "150"))
+
+_sentence_end = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence ends and blank lines"""
+    return [sentence.strip() for sentence in _sentence_end.split(text) if sentence and sentence.strip()]
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS,
+               overlap: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """
+    Pack sentences into chunks of at most max_chars characters.
+
+    Each chunk after the first starts with the trailing sentences of the
+    previous one (up to overlap characters), so a statement that spans a
+    boundary is still embedded whole once. Sentences longer than max_chars
+    are cut at word boundaries.
+
+    Args:
+        text: Text to split
+        max_chars: Largest chunk size (0 disables chunking)
+        overlap: Characters carried over between consecutive chunks
+
+    Returns:
+        List of chunks (a single chunk when the text already fits)
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    current: List[str] = []
+    length = 0
+    for piece in pieces:
+        if current and length + 1 + len(piece) > max_chars:
+            chunks.append(" ".join(current))
+            # Carry trailing sentences over as overlap
+            carried: List[str] = []
+            carried_length = 0
+            for previous in reversed(current):
+                if carried_length + len(previous) + 1 > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_length += len(previous) + 1
+            if carried_length + len(piece) > max_chars:
+                carried, carried_length = [], 0
+            current, length = carried, carried_length
+        current.append(piece)
+        length += len(piece) + (1 if length else 0)
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -0,0 +1,250 @@
+"""
+Embedding Cache
+Two-tier cache for text embeddings: in-memory LRU in front of SQLite
+
+Entries are keyed by (model, hash of normalized text), so repeated or
+trivially different questions ("Who is the CEO?" / "who is the  CEO?")
+reuse one embedding instead of making another API call. The SQLite tier
+survives Streamlit restarts and is trimmed by total size.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.search.vector_codec import encode_embedding, decode_embedding, VectorFormatError
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.db")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "2048"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so equivalent inputs share a cache entry.
+
+    Applies Unicode NFKC, case folding and whitespace collapsing.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.casefold().split())
+
+
+def cache_key(text: str, model: str) -> str:
+    """
+    Build the cache key for a text and model.
+
+    Args:
+        text: Raw text
+        model: Embedding model name
+
+    Returns:
+        Hex SHA-256 digest of the model and normalized text
+    """
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """In-memory LRU tier backed by a size-bounded SQLite tier"""
+
+    def __init__(self, db_path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS,
+                 max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        """
+        Initialize embedding cache
+
+        Args:
+            db_path: Path to the SQLite cache file (None for memory only)
+            memory_items: Number of embeddings kept in the LRU tier
+            max_bytes: Size limit for vectors stored in the SQLite tier
+        """
+        self.db_path = db_path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        # Immutable tuples: callers get a fresh list and cannot alter an entry
+        self._memory: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0
+        }
+
+        if db_path:
+            self._open()
+
+    def _open(self) -> None:
+        """Open the SQLite tier, creating the table if needed"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON embedding_cache(last_used)")
+            cursor.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache")
+            self._disk_bytes = cursor.fetchone()[0]
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache disabled on disk ({self.db_path}): {e}")
+            self._conn = None
+
+    def _remember(self, key: str, embedding: Sequence[float]) -> None:
+        """Put an entry in the LRU tier (caller holds the lock)"""
+        self._memory[key] = tuple(embedding)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+
+        Args:
+            text: Text that was embedded
+            model: Embedding model name
+
+        Returns:
+            A copy of the embedding, or None on a miss
+        """
+        key = cache_key(text, model)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return list(cached)
+
+            if self._conn is not None:
+                try:
+                    cursor = self._conn.cursor()
+                    cursor.execute("SELECT vector FROM embedding_cache WHERE key = ?", (key,))
+                    row = cursor.fetchone()
+                    if row:
+                        embedding = decode_embedding(row[0]).tolist()
+                        cursor.execute("UPDATE embedding_cache SET last_used = ? WHERE key = ?",
+                                       (time.time(), key))
+                        self._conn.commit()
+                        self._remember(key, embedding)
+                        self.stats['disk_hits'] += 1
+                        return embedding
+                except (sqlite3.Error, VectorFormatError) as e:
+                    logger.warning(f"Embedding cache read failed: {e}")
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, text: str, model: str, embedding: List[float]) -> None:
+        """
+        Store an embedding in both tiers.
+
+        Args:
+            text: Text that was embedded
+            model: Embedding model name
+            embedding: Embedding values
+        """
+        if not embedding:
+            return
+
+        key = cache_key(text, model)
+
+        with self._lock:
+            self._remember(key, embedding)
+
+            if self._conn is None:
+                return
+
+            try:
+                blob = encode_embedding(embedding, model)
+                cursor = self._conn.cursor()
+                cursor.execute("SELECT size FROM embedding_cache WHERE key = ?", (key,))
+                row = cursor.fetchone()
+                cursor.execute("""
+                    INSERT OR REPLACE INTO embedding_cache (key, model, vector, size, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (key, model, blob, len(blob), time.time()))
+                self._disk_bytes += len(blob) - (row[0] if row else 0)
+                self.stats['writes'] += 1
+
+                if self._disk_bytes > self.max_bytes:
+                    self._evict(cursor)
+
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def _evict(self, cursor: sqlite3.Cursor) -> None:
+        """Drop least recently used rows until the SQLite tier is under 90% of its limit"""
+        target = int(self.max_bytes * 0.9)
+        cursor.execute("SELECT key, size FROM embedding_cache ORDER BY last_used")
+
+        doomed = []
+        for key, size in cursor.fetchall():
+            if self._disk_bytes <= target:
+                break
+            doomed.append((key,))
+            self._disk_bytes -= size
+
+        cursor.executemany("DELETE FROM embedding_cache WHERE key = ?", doomed)
+        self.stats['evictions'] += len(doomed)
+        logger.info(f"Evicted {len(doomed)} entries from embedding cache")
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embedding_cache")
+                self._conn.commit()
+            self._disk_bytes = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+            stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+            stats['memory_items'] = len(self._memory)
+            stats['disk_bytes'] = self._disk_bytes
+            return stats
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache, creating it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
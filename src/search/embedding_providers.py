@@ -0,0 +1,304 @@
+"""
+Embedding Providers
+Interchangeable backends behind get_embedding / create_embedding
+
+    openai   OpenAI embeddings API (text-embedding-3-small by default)
+    local    sentence-transformers model on CPU, no network round-trip
+    hashing  Deterministic feature-hashing embedder for offline tests
+
+Select one with EMBEDDING_PROVIDER. Every provider reports a model name,
+which is stored next to each vector so vectors from different models are
+never mixed.
+
+EMBEDDING_DIMENSIONS shrinks vectors for the openai and local providers:
+OpenAI's text-embedding-3 models return shortened vectors natively, and
+local vectors are projected with a PCA fitted by reduce_dimensions. The
+reduced size is part of the model name (e.g. text-embedding-3-small@256),
+so full-size and reduced vectors are never compared with each other.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LOCAL_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(os.cpu_count() or 1)))
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "384"))
+# Left blank in .env.example for full-size vectors
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "").strip() or 0) or None
+PROJECTION_DIR = os.getenv("VECTOR_INDEX_DIR", "data/embeddings")
+
+
+def split_model_name(model: str) -> Tuple[str, Optional[int]]:
+    """
+    Split a model name into the base model and its reduced dimension.
+
+    Args:
+        model: e.g. "text-embedding-3-small@256" or "all-MiniLM-L6-v2"
+
+    Returns:
+        Tuple of (base model, dimensions or None for full size)
+    """
+    base, _, dimensions = model.partition("@")
+    return base, int(dimensions) if dimensions.isdigit() else None
+
+
+def reduced_model_name(base: str, dimensions: Optional[int]) -> str:
+    """Model name recorded for vectors of base reduced to dimensions"""
+    return f"{base}@{dimensions}" if dimensions else base
+
+
+def projection_path(base: str, dimensions: int) -> str:
+    """File holding the PCA projection of a local model to dimensions"""
+    safe = re.sub(r"[^\w.-]+", "_", base)
+    return os.path.join(PROJECTION_DIR, f"pca_{safe}_{dimensions}.npz")
+
+
+class EmbeddingProvider(ABC):
+    """Base class for embedding providers"""
+
+    provider = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        Embed several texts.
+
+        Args:
+            texts: Non-empty texts to embed
+            timeout: Seconds allowed for a remote request (local
+                providers run in-process and ignore it)
+
+        Returns:
+            One embedding per text, in order
+        """
+
+    def embed_one(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed([text])[0]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}(model='{self.model}')>"
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API"""
+
+    provider = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, dimensions: Optional[int] = None):
+        """
+        Initialize OpenAI provider
+
+        Args:
+            model: OpenAI embedding model
+            dimensions: Shortened output size (text-embedding-3 models only)
+        """
+        super().__init__(reduced_model_name(model, dimensions))
+        self.api_model = model
+        self.dimensions = dimensions
+        self._client = None
+
+    def _get_client(self):
+        """
+        Client used for embedding requests.
+
+        The SDK's own retries are turned off: AsyncEmbeddingClient owns the
+        retry policy, and a request that times out must really stop rather
+        than be retried behind its back.
+        """
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=openai.api_key or os.getenv("OPENAI_API_KEY"),
+                                         max_retries=0)
+        return self._client
+
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        params = {'dimensions': self.dimensions} if self.dimensions else {}
+        if timeout is not None:
+            # Enforced by the HTTP client, so the connection is dropped on expiry
+            params['timeout'] = timeout
+        response = self._get_client().embeddings.create(
+            input=texts,
+            model=self.api_model,
+            **params
+        )
+        # The API returns one item per input, tagged with its position
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Local sentence-transformers model running on CPU"""
+
+    provider = "local"
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL,
+                 batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+                 threads: int = EMBEDDING_THREADS,
+                 dimensions: Optional[int] = None):
+        """
+        Initialize local provider (the model is loaded on first use)
+
+        Args:
+            model: sentence-transformers model name or path
+            batch_size: Texts per forward pass
+            threads: CPU threads used for encoding
+            dimensions: Project to this size with the saved PCA
+        """
+        super().__init__(reduced_model_name(model, dimensions))
+        self.base_model = model
+        self.batch_size = batch_size
+        self.threads = threads
+        self.dimensions = dimensions
+        self._model = None
+        self._projection = None
+        self._lock = threading.Lock()
+
+    def _load_projection(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Load the PCA (mean, components) fitted by reduce_dimensions"""
+        if self._projection is None:
+            path = projection_path(self.base_model, self.dimensions)
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"No PCA projection for {self.base_model} at {self.dimensions} dimensions; "
+                    f"run python -m src.search.reduce_dimensions --dimensions {self.dimensions} --apply"
+                )
+            with np.load(path) as data:
+                self._projection = (data['mean'], data['components'])
+        return self._projection
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                torch.set_num_threads(self.threads)
+                logger.info(f"Loading local embedding model {self.base_model} ({self.threads} threads)")
+                # self.model carries the @dimensions suffix, which is not a model name
+                self._model = SentenceTransformer(self.base_model, device="cpu")
+            return self._model
+
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        vectors = self._load().encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        if self.dimensions:
+            mean, components = self._load_projection()
+            vectors = (vectors - mean) @ components.T
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+        return vectors.astype(np.float32).tolist()
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic bag-of-words embedder using signed feature hashing
+
+    Same text always gives the same vector, with no model download or
+    network access, so tests and offline runs are reproducible. Shared
+    words and word pairs raise cosine similarity, which is enough to
+    exercise the search pipeline end to end.
+    """
+
+    provider = "hashing"
+
+    _token_pattern = re.compile(r"\w+")
+
+    def __init__(self, dimensions: int = HASHING_EMBEDDING_DIM):
+        super().__init__(f"hashing-{dimensions}")
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        tokens = self._token_pattern.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                matrix[row, (value >> 1) % self.dimensions] += sign
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+
+def _create_provider(name: str, model: Optional[str] = None) -> EmbeddingProvider:
+    if model:
+        base, dimensions = split_model_name(model)
+    else:
+        base, dimensions = None, EMBEDDING_DIMENSIONS
+
+    if name == "local":
+        return SentenceTransformerProvider(base or LOCAL_EMBEDDING_MODEL, dimensions=dimensions)
+    if name == "hashing":
+        size = int(base.split("-")[-1]) if base else HASHING_EMBEDDING_DIM
+        return HashingEmbeddingProvider(size)
+    if name != "openai":
+        logger.warning(f"Unknown embedding provider '{name}', using OpenAI")
+    return OpenAIEmbeddingProvider(base or OPENAI_EMBEDDING_MODEL, dimensions=dimensions)
+
+
+def _provider_for_model(model: str) -> str:
+    """Guess which provider serves a model name"""
+    if model.startswith("text-embedding-"):
+        return "openai"
+    if model.startswith("hashing-"):
+        return "hashing"
+    return "local"
+
+
+_providers: Dict[Optional[str], EmbeddingProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(model: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Get a shared embedding provider.
+
+    Args:
+        model: Model name to embed with (defaults to the configured provider)
+
+    Returns:
+        The configured provider, or a provider for the requested model
+    """
+    with _providers_lock:
+        if None not in _providers:
+            _providers[None] = _create_provider(EMBEDDING_PROVIDER)
+
+        default = _providers[None]
+        if model is None or model == default.model:
+            return default
+
+        if model not in _providers:
+            _providers[model] = _create_provider(_provider_for_model(model), model)
+        return _providers[model]
+
+
+def get_embedding_model() -> str:
+    """Name of the configured embedding model"""
+    return get_embedding_provider().model
@@ -0,0 +1,86 @@
+"""
+Rank Fusion
+Combine ranked lists from different retrievers into one ranking
+
+    rrf       Reciprocal rank fusion: score = sum(weight / (k + rank)).
+              Only positions matter, so bm25 and cosine scores never
+              have to be put on the same scale.
+    weighted  Min-max normalize each retriever's scores to [0, 1] and
+              add them with per-retriever weights.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf").lower()
+RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+Ranking = Sequence[Tuple[int, float]]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Ranking], k: int = RRF_K,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """
+    Fuse rankings by reciprocal rank.
+
+    Args:
+        rankings: Lists of (id, score) pairs, each best first
+        k: Damping constant; larger values flatten the advantage of top ranks
+        weights: Weight per ranking (defaults to 1.0 each)
+
+    Returns:
+        List of (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (item_id, _) in enumerate(ranking, 1):
+            fused[item_id] = fused.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def weighted_score_fusion(rankings: Sequence[Ranking],
+                          weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """
+    Fuse rankings by weighted, min-max normalized scores.
+
+    Scores must be "higher is better" in every ranking (negate bm25
+    first). An item missing from a ranking gets 0 from it.
+
+    Args:
+        rankings: Lists of (id, score) pairs, each best first
+        weights: Weight per ranking (defaults to 1.0 each)
+
+    Returns:
+        List of (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if not ranking:
+            continue
+        scores = [score for _, score in ranking]
+        low, high = min(scores), max(scores)
+        spread = high - low
+        for item_id, score in ranking:
+            normalized = (score - low) / spread if spread else 1.0
+            fused[item_id] = fused.get(item_id, 0.0) + weight * normalized
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def fuse_rankings(rankings: Sequence[Ranking], method: Optional[str] = None,
+                  weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """
+    Fuse rankings with the configured method.
+
+    Args:
+        rankings: Lists of (id, score) pairs, each best first
+        method: rrf or weighted (defaults to HYBRID_FUSION)
+        weights: Weight per ranking
+
+    Returns:
+        List of (id, fused score) pairs, best first
+    """
+    if (method or HYBRID_FUSION) == "weighted":
+        return weighted_score_fusion(rankings, weights)
+    return reciprocal_rank_fusion(rankings, weights=weights)
@@ -1,356 +1,544 @@
-""""""
-
-Indexing module for vector embeddingsContent Indexing - Build and manage search indices
-
-Handles creation and management of vector embeddings for semantic search"""
-
+"""
+Content Indexing - Build and manage search indices
+Handles creation and management of vector embeddings for semantic search
 """
 
+import openai
+import numpy as np
 import logging
-
-import openaifrom typing import List, Dict, Optional
-
-import numpy as npfrom datetime import datetime
-
-import loggingimport os
-
-from typing import List, Dict, Any, Optionalimport json
-
+from typing import List, Dict, Any, Optional
 import os
-
-from dotenv import load_dotenvlogger = logging.getLogger(__name__)
-
-
+import hashlib
+from collections import Counter
+from dotenv import load_dotenv
+
+from src.search.embedding_cache import get_embedding_cache
+from src.search.embedding_providers import get_embedding_provider, EMBEDDING_PROVIDER
+from src.search.async_embedding_client import get_embedding_client
+from src.search.vector_store import save_vectors, load_vectors, map_vectors
+from src.search.ann_backends import build_backend, is_quantized, normalize_rows
+from src.search.vector_index import VectorIndex
+from src.search.chunking import chunk_text
 
 load_dotenv()
 
-class ContentIndexer:
-
-logging.basicConfig(level=logging.INFO)    """Build and manage search indices for knowledge items"""
-
-logger = logging.getLogger(__name__)    
-
-    def __init__(self, repository, vector_search):
-
-# Configure OpenAI        """
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configure OpenAI
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+if not OPENAI_API_KEY and EMBEDDING_PROVIDER == "openai":
+    raise ValueError("OPENAI_API_KEY not found in environment variables")
+openai.api_key = OPENAI_API_KEY
+
+EMBEDDING_MODEL = get_embedding_provider().model
+
+# Batched embedding limits. OpenAI accepts up to 2048 inputs and ~300k
+# tokens per request; stay well below that to keep requests fast.
+EMBEDDING_BATCH_MAX_TOKENS = 100000
+EMBEDDING_BATCH_MAX_ITEMS = 256
+EMBEDDING_MAX_INPUT_CHARS = 30000  # ~7.5k tokens, under the 8191 input limit
+CHARS_PER_TOKEN = 4
+
+
+def create_embedding(text: str, model: str = EMBEDDING_MODEL) -> List[float]:
+    """
+    Create an embedding vector for text using the configured provider.
+    Repeated texts are served from the shared embedding cache.
+
+    Args:
+        text: Text to embed
+        model: Embedding model to use
+
+    Returns:
+        List of floats representing the embedding vector
+    """
+    cache = get_embedding_cache()
+    cached = cache.get(text, model)
+    if cached is not None:
+        return cached
+
+    try:
+        result = get_embedding_client(model).embed_sync([text])
+        if not result:
+            return []
+        embedding = result[0]
+        cache.put(text, model, embedding)
+        return embedding
+    except Exception as e:
+        logger.error(f"Error creating embedding: {e}")
+        return []
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of tokens in text.
+
+    Uses the common ~4 characters per token heuristic for English text,
+    which is close enough for sizing embedding requests.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def batch_by_token_budget(texts: List[str], max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+                          max_items: int = EMBEDDING_BATCH_MAX_ITEMS) -> List[List[int]]:
+    """
+    Split texts into request-sized batches.
+
+    A batch is closed when adding the next text would exceed either the
+    estimated token budget or the maximum number of inputs per request.
+
+    Args:
+        texts: Texts to split
+        max_tokens: Estimated token budget per batch
+        max_items: Maximum number of texts per batch
+
+    Returns:
+        List of batches, each a list of indexes into texts
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def create_embeddings_batch(texts: List[str], model: str = EMBEDDING_MODEL,
+                            max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+                            max_items: int = EMBEDDING_BATCH_MAX_ITEMS) -> List[List[float]]:
+    """
+    Create embeddings for many texts using batched requests.
+
+    Texts are split into batches by estimated tokens and count, and the
+    batches are sent concurrently through the async embedding client,
+    which retries throttled requests with backoff. If a batch still
+    fails, each text in it is retried on its own so that one bad input
+    does not cost the whole batch.
+
+    Args:
+        texts: Texts to embed
+        model: Embedding model to use
+        max_tokens: Estimated token budget per request
+        max_items: Maximum number of texts per request
+
+    Returns:
+        List of embeddings aligned with texts (empty list for failures)
+    """
+    # Keep each input under the model's per-input limit
+    texts = [text.replace("\n", " ").strip()[:EMBEDDING_MAX_INPUT_CHARS] for text in texts]
+    embeddings: List[List[float]] = [[] for _ in texts]
+
+    client = get_embedding_client(model)
+    batches = batch_by_token_budget(texts, max_tokens=max_tokens, max_items=max_items)
+    results = client.embed_batches_sync([[texts[i] for i in batch] for batch in batches])
+
+    retry = []
+    for batch_num, (batch, batch_embeddings) in enumerate(zip(batches, results), 1):
+        if len(batch_embeddings) == len(batch):
+            for i, embedding in zip(batch, batch_embeddings):
+                embeddings[i] = embedding
+            logger.info(f"Embedded batch {batch_num}/{len(batches)} ({len(batch)} texts)")
+        else:
+            logger.warning(f"Batch {batch_num}/{len(batches)} failed, falling back to single requests")
+            retry.extend(batch)
+
+    if retry:
+        singles = client.embed_batches_sync([[texts[i]] for i in retry])
+        for i, result in zip(retry, singles):
+            embeddings[i] = result[0] if result else []
+
+    return embeddings
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")        Initialize content indexer
 
-if not OPENAI_API_KEY:        
+def create_profile_embedding(profile: Dict[str, Any]) -> List[float]:
+    """
+    Create a comprehensive embedding for a profile.
+    Combines name, role, bio, and department information.
+
+    Args:
+        profile: Profile dictionary
+
+    Returns:
+        Embedding vector for the profile
+    """
+    # Combine relevant fields for embedding
+    text_parts = []
+
+    if profile.get('name'):
+        text_parts.append(f"Name: {profile['name']}")
+    if profile.get('role'):
+        text_parts.append(f"Role: {profile['role']}")
+    if profile.get('department'):
+        text_parts.append(f"Department: {profile['department']}")
+    if profile.get('bio'):
+        text_parts.append(f"Bio: {profile['bio']}")
+
+    combined_text = " | ".join(text_parts)
+
+    if not combined_text:
+        logger.warning(f"Empty profile data for embedding: {profile.get('name', 'Unknown')}")
+        return []
+
+    return create_embedding(combined_text)
+
+
+def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+    """
+    Calculate cosine similarity between two vectors.
+
+    Args:
+        vec1: First vector
+        vec2: Second vector
+
+    Returns:
+        Cosine similarity score (0 to 1)
+    """
+    if not vec1 or not vec2:
+        return 0.0
 
-    raise ValueError("OPENAI_API_KEY not found in environment variables")        Args:
+    vec1_arr = np.array(vec1)
+    vec2_arr = np.array(vec2)
 
-openai.api_key = OPENAI_API_KEY            repository: KnowledgeRepository instance
+    dot_product = np.dot(vec1_arr, vec2_arr)
+    norm1 = np.linalg.norm(vec1_arr)
+    norm2 = np.linalg.norm(vec2_arr)
+
+    if norm1 == 0 or norm2 == 0:
+        return 0.0
+
+    return float(dot_product / (norm1 * norm2))
 
-            vector_search: VectorSearch instance
-
-        """
 
-def create_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:        self.repository = repository
+def update_index(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Update embeddings for a list of profiles.
 
-    """        self.vector_search = vector_search
+    Args:
+        profiles: List of profile dictionaries
 
-    Create an embedding vector for text using OpenAI's API.        self.index_path = "data/embeddings/"
+    Returns:
+        List of profiles with updated embeddings
+    """
+    logger.info(f"Updating embeddings for {len(profiles)} profiles...")
 
-            
+    updated_profiles = []
+    for profile in profiles:
+        embedding = create_profile_embedding(profile)
+        if embedding:
+            profile['embedding'] = embedding
+            updated_profiles.append(profile)
+        else:
+            logger.warning(f"Failed to create embedding for: {profile.get('name', 'Unknown')}")
 
-    Args:        # Create embeddings directory if it doesn't exist
+    logger.info(f"✅ Successfully updated {len(updated_profiles)} embeddings")
+    return updated_profiles
 
-        text: Text to embed        os.makedirs(self.index_path, exist_ok=True)
 
-        model: OpenAI embedding model to use    
-
-            def index_knowledge_item(self, item_id: int) -> bool:
-
-    Returns:        """
-
-        List of floats representing the embedding vector        Create search index for a single knowledge item
-
-    """        
-
-    try:        Args:
-
-        response = openai.embeddings.create(            item_id: ID of knowledge item to index
-
-            input=text,            
+class ContentIndexer:
+    """Build and manage search indices for knowledge items"""
 
-            model=model        Returns:
+    def __init__(self, repository, vector_search):
+        """
+        Initialize content indexer
 
-        )            True if successful, False otherwise
+        Args:
+            repository: KnowledgeRepository instance
+            vector_search: VectorSearch instance
+        """
+        self.repository = repository
+        self.vector_search = vector_search
+        self.index_path = "data/embeddings/"
 
-        return response.data[0].embedding        """
+        # Create embeddings directory if it doesn't exist
+        os.makedirs(self.index_path, exist_ok=True)
 
-    except Exception as e:        try:
+    def index_knowledge_item(self, item_id: int) -> bool:
+        """
+        Create search index for a single knowledge item
 
-        logger.error(f"Error creating embedding: {e}")            # Get knowledge item from database
+        Long content is split into chunks, each stored as its own
+        SearchIndex row under the item's ID; searches score the item by
+        its best chunk.
 
-        return []            session = self.repository.get_session()
+        Args:
+            item_id: ID of knowledge item to index
 
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            # Get knowledge item from database
+            session = self.repository.get_session()
             from database.models import KnowledgeItem
 
-            
-
-def create_embeddings_batch(texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:            item = session.query(KnowledgeItem).filter(
-
-    """                KnowledgeItem.id == item_id
-
-    Create embeddings for multiple texts in a batch.            ).first()
-
-                
-
-    Args:            if not item:
-
-        texts: List of texts to embed                logger.error(f"Knowledge item {item_id} not found")
-
-        model: OpenAI embedding model to use                session.close()
-
-                        return False
-
-    Returns:            
-
-        List of embedding vectors            # Prepare text for embedding
-
-    """            text_content = f"{item.title}\n\n{item.content}"
-
-    try:            
-
-        response = openai.embeddings.create(            # Generate embedding
-
-            input=texts,            embedding = self.vector_search.generate_embedding(text_content)
-
-            model=model            
-
-        )            if not embedding:
-
-        return [data.embedding for data in response.data]                logger.error(f"Failed to generate embedding for item {item_id}")
-
-    except Exception as e:                session.close()
-
-        logger.error(f"Error creating embeddings batch: {e}")                return False
-
-        return []            
+            item = session.query(KnowledgeItem).filter(
+                KnowledgeItem.id == item_id
+            ).first()
+
+            if not item:
+                logger.error(f"Knowledge item {item_id} not found")
+                session.close()
+                return False
+
+            # Prepare one text per chunk, each titled so it stands on its own
+            chunks = chunk_text(item.content or "") or [""]
+            texts = [f"{item.title}\n\n{chunk}" for chunk in chunks]
+
+            # Generate embeddings, reusing cached ones for unchanged text
+            # and embedding the rest in one batch
+            cache = get_embedding_cache()
+            model_name = self.vector_search.model_name
+            embeddings = [cache.get(text_content, model_name) for text_content in texts]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                created = create_embeddings_batch([texts[i] for i in missing], model_name)
+                for i, embedding in zip(missing, created):
+                    if embedding:
+                        cache.put(texts[i], model_name, embedding)
+                        embeddings[i] = embedding
+
+            if not all(embeddings):
+                logger.error(f"Failed to generate embedding for item {item_id}")
+                session.close()
+                return False
 
             # Get scope from category
-
             scope = item.category.name if item.category else 'general'
 
-def create_profile_embedding(profile: Dict[str, Any]) -> List[float]:            
-
-    """            # Add to database
-
-    Create a comprehensive embedding for a profile.            self.repository.add_search_index(
-
-    Combines name, role, bio, and department information.                knowledge_item_id=item_id,
-
-                    embedding=embedding,
-
-    Args:                embedding_model=self.vector_search.model_name,
-
-        profile: Profile dictionary                text_content=text_content,
-
+            # Replace any earlier entries (the chunk count may have changed)
+            # in one transaction, so searches never see the item unindexed
+            from database.models import SearchIndex
+            try:
+                session.query(SearchIndex).filter(
+                    SearchIndex.knowledge_item_id == item_id
+                ).delete()
+                for text_content, embedding in zip(texts, embeddings):
+                    session.add(SearchIndex(
+                        knowledge_item_id=item_id,
+                        embedding=embedding,
+                        embedding_model=model_name,
+                        text_content=text_content,
                         scope=scope
+                    ))
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
 
-    Returns:            )
-
-        Embedding vector for the profile            
-
-    """            session.close()
-
-    # Combine relevant fields for embedding            logger.info(f"Indexed knowledge item: {item_id}")
-
-    text_parts = []            return True
-
-                
-
-    if profile.get('name'):        except Exception as e:
-
-        text_parts.append(f"Name: {profile['name']}")            logger.error(f"Error indexing item {item_id}: {str(e)}")
-
-    if profile.get('role'):            return False
-
-        text_parts.append(f"Role: {profile['role']}")    
-
-    if profile.get('department'):    def index_all_items(self, reindex: bool = False) -> Dict[str, int]:
-
-        text_parts.append(f"Department: {profile['department']}")        """
-
-    if profile.get('bio'):        Index all knowledge items
-
-        text_parts.append(f"Bio: {profile['bio']}")        
-
-            Args:
-
-    combined_text = " | ".join(text_parts)            reindex: If True, recreate indices even if they exist
+            logger.info(f"Indexed knowledge item: {item_id} ({len(texts)} chunks)")
+            return True
 
-                
-
-    if not combined_text:        Returns:
-
-        logger.warning(f"Empty profile data for embedding: {profile.get('name', 'Unknown')}")            Dictionary with indexing statistics
-
-        return []        """
+        except Exception as e:
+            logger.error(f"Error indexing item {item_id}: {str(e)}")
+            return False
 
-            stats = {
+    def index_all_items(self, reindex: bool = False) -> Dict[str, int]:
+        """
+        Index all knowledge items
 
-    return create_embedding(combined_text)            'total': 0,
+        Args:
+            reindex: If True, recreate indices even if they exist
 
+        Returns:
+            Dictionary with indexing statistics
+        """
+        stats = {
+            'total': 0,
             'indexed': 0,
-
             'skipped': 0,
+            'failed': 0
+        }
 
-def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:            'failed': 0
-
-    """        }
-
-    Calculate cosine similarity between two vectors.        
-
-            try:
-
-    Args:            # Get all knowledge items
-
-        vec1: First vector            items = self.repository.get_all_knowledge_items(limit=10000)
-
-        vec2: Second vector            stats['total'] = len(items)
-
-                    
-
-    Returns:            logger.info(f"Indexing {len(items)} knowledge items...")
-
-        Cosine similarity score (0 to 1)            
-
-    """            for item in items:
-
-    if not vec1 or not vec2:                # Check if already indexed
-
-        return 0.0                if not reindex:
-
-                        session = self.repository.get_session()
-
-    vec1_arr = np.array(vec1)                    from database.models import SearchIndex
-
-    vec2_arr = np.array(vec2)                    
-
-                        existing = session.query(SearchIndex).filter(
-
-    dot_product = np.dot(vec1_arr, vec2_arr)                        SearchIndex.knowledge_item_id == item.id
-
-    norm1 = np.linalg.norm(vec1_arr)                    ).first()
-
-    norm2 = np.linalg.norm(vec2_arr)                    session.close()
-
-                        
+        try:
+            # Get all knowledge items
+            items = self.repository.get_all_knowledge_items(limit=10000)
+            stats['total'] = len(items)
 
-    if norm1 == 0 or norm2 == 0:                    if existing:
+            logger.info(f"Indexing {len(items)} knowledge items...")
 
-        return 0.0                        stats['skipped'] += 1
+            for item in items:
+                # Check if already indexed
+                if not reindex:
+                    session = self.repository.get_session()
+                    from database.models import SearchIndex
 
-                            continue
+                    existing = session.query(SearchIndex).filter(
+                        SearchIndex.knowledge_item_id == item.id
+                    ).first()
+                    session.close()
 
-    return float(dot_product / (norm1 * norm2))                
+                    if existing:
+                        stats['skipped'] += 1
+                        continue
 
                 # Index the item
-
                 success = self.index_knowledge_item(item.id)
 
-def update_index(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:                
-
-    """                if success:
-
-    Update embeddings for a list of profiles.                    stats['indexed'] += 1
-
-                    else:
-
-    Args:                    stats['failed'] += 1
+                if success:
+                    stats['indexed'] += 1
+                else:
+                    stats['failed'] += 1
 
-        profiles: List of profile dictionaries            
-
-                    logger.info(f"Indexing complete: {stats}")
-
-    Returns:            return stats
-
-        List of profiles with updated embeddings            
-
-    """        except Exception as e:
+            logger.info(f"Indexing complete: {stats}")
+            return stats
 
-    logger.info(f"Updating embeddings for {len(profiles)} profiles...")            logger.error(f"Error in bulk indexing: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error in bulk indexing: {str(e)}")
+            return stats
 
-                return stats
+    def build_embedding_cache(self, scope: Optional[str] = None) -> Dict[int, List[float]]:
+        """
+        Build in-memory cache of embeddings for fast search
 
-    updated_profiles = []    
+        Args:
+            scope: Optional scope to filter by
 
-    for profile in profiles:    def build_embedding_cache(self, scope: Optional[str] = None) -> Dict[int, List[float]]:
+        Returns:
+            Dictionary mapping item IDs to embeddings
+        """
+        session = self.repository.get_session()
+        try:
+            from database.models import SearchIndex
 
-        embedding = create_profile_embedding(profile)        """
+            query = session.query(SearchIndex)
 
-        if embedding:        Build in-memory cache of embeddings for fast search
+            if scope:
+                query = query.filter(SearchIndex.scope == scope)
 
-            profile['embedding'] = embedding        
+            indices = query.all()
 
-            updated_profiles.append(profile)        Args:
+            # Chunked items keep their first chunk (title and opening text)
+            cache = {}
+            for index in indices:
+                if index.embedding:
+                    cache.setdefault(index.knowledge_item_id, index.embedding)
 
-        else:            scope: Optional scope to filter by
+            logger.info(f"Built embedding cache with {len(cache)} items")
+            return cache
 
-            logger.warning(f"Failed to create embedding for: {profile.get('name', 'Unknown')}")            
+        finally:
+            session.close()
 
-            Returns:
+    def build_vector_index(self, scope: Optional[str] = None,
+                           backend: Optional[str] = None) -> VectorIndex:
+        """
+        Build a searchable vector index over SearchIndex embeddings
 
-    logger.info(f"✅ Successfully updated {len(updated_profiles)} embeddings")            Dictionary mapping item IDs to embeddings
+        The ANN structure is persisted under data/embeddings and reused
+        while the underlying embeddings are unchanged. Each row carries its
+        scope as metadata, so one index over all scopes can be searched
+        with filters={'scope': ...} without losing results to the filter.
 
-    return updated_profiles        """
+        Args:
+            scope: Optional scope to restrict the index to
+            backend: exact, flat, ivf, hnsw, int8 or float16 (defaults to VECTOR_BACKEND)
 
+        Returns:
+            VectorIndex keyed by knowledge item ID
+        """
         session = self.repository.get_session()
         try:
             from database.models import SearchIndex
-            
-            query = session.query(SearchIndex)
-            
+
+            query = session.query(SearchIndex.knowledge_item_id, SearchIndex.embedding, SearchIndex.scope)
             if scope:
                 query = query.filter(SearchIndex.scope == scope)
-            
-            indices = query.all()
-            
-            cache = {
-                index.knowledge_item_id: index.embedding
-                for index in indices
-                if index.embedding
-            }
-            
-            logger.info(f"Built embedding cache with {len(cache)} items")
-            return cache
-            
+            rows = [row for row in query.all() if row[1]]
         finally:
             session.close()
-    
-    def save_embedding_cache(self, cache: Dict[int, List[float]], 
-                            filename: str = "embeddings_cache.json"):
-        """Save embedding cache to file"""
+
+        if not rows:
+            return VectorIndex([], np.zeros((0, 0), dtype=np.float32))
+
+        # Vectors of another size come from a different model or dimension
+        # setting; index the size most entries have
+        dimensions = Counter(len(row[1]) for row in rows)
+        dimension, count = dimensions.most_common(1)[0]
+        if count < len(rows):
+            logger.warning(f"Skipping {len(rows) - count} search index entries that are not "
+                           f"{dimension}-dimensional (found sizes {sorted(dimensions)})")
+            rows = [row for row in rows if len(row[1]) == dimension]
+
+        ids = [item_id for item_id, _, _ in rows]
+        scopes = [item_scope or 'general' for _, _, item_scope in rows]
+        matrix = normalize_rows(np.asarray([embedding for _, embedding, _ in rows], dtype=np.float32))
+        content_hash = hashlib.sha1(np.asarray(ids, dtype=np.int64).tobytes() + matrix.tobytes()).hexdigest()
+        cache_path = os.path.join(self.index_path, f"knowledge_{scope or 'all'}")
+
+        if is_quantized(backend):
+            # Keep full precision on disk for rescoring; only the codes stay in memory
+            matrix = map_vectors(f"{cache_path}.reference", ids, matrix,
+                                 model=self.vector_search.model_name,
+                                 extra_meta={'content_hash': content_hash}).vectors
+
+        search_backend = build_backend(
+            matrix,
+            name=backend,
+            cache_path=cache_path,
+            cache_key={'content_hash': content_hash}
+        )
+        return VectorIndex(ids, matrix, model=self.vector_search.model_name,
+                           backend=search_backend, normalized=True,
+                           metadata={'scope': scopes})
+
+    def save_embedding_cache(self, cache: Dict[int, List[float]],
+                            filename: str = "embeddings_cache"):
+        """Save embedding cache as a memory-mappable vector store"""
         filepath = os.path.join(self.index_path, filename)
-        self.vector_search.save_index(cache, filepath)
-    
-    def load_embedding_cache(self, filename: str = "embeddings_cache.json") -> Dict[int, List[float]]:
-        """Load embedding cache from file"""
+        ids = list(cache.keys())
+        vectors = [cache[item_id] for item_id in ids]
+        save_vectors(filepath, ids, vectors, model=self.vector_search.model_name)
+
+    def load_embedding_cache(self, filename: str = "embeddings_cache") -> Dict[int, np.ndarray]:
+        """Load embedding cache by memory-mapping the vector store"""
         filepath = os.path.join(self.index_path, filename)
-        return self.vector_search.load_index(filepath)
-    
+        stored = load_vectors(filepath)
+        if stored is None:
+            return {}
+        if stored.meta.get('model') != self.vector_search.model_name:
+            logger.warning(f"Embedding cache was built with {stored.meta.get('model')}, ignoring it")
+            return {}
+        return stored.as_dict()
+
     def get_index_stats(self) -> Dict[str, any]:
         """Get statistics about indexed content"""
         session = self.repository.get_session()
         try:
             from database.models import SearchIndex, KnowledgeItem
-            
+
             total_items = session.query(KnowledgeItem).count()
             indexed_items = session.query(SearchIndex).count()
-            
+
             # Get unique scopes
             scopes = session.query(SearchIndex.scope).distinct().all()
             scope_counts = {}
-            
+
             for (scope,) in scopes:
                 count = session.query(SearchIndex).filter(
                     SearchIndex.scope == scope
                 ).count()
                 scope_counts[scope or 'general'] = count
-            
+
             stats = {
                 'total_knowledge_items': total_items,
                 'indexed_items': indexed_items,
@@ -358,37 +546,37 @@ def update_index(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                 'scope_distribution': scope_counts,
                 'embedding_model': self.vector_search.model_name
             }
-            
+
             return stats
-            
+
         finally:
             session.close()
-    
+
     def remove_stale_indices(self) -> int:
         """Remove indices for deleted knowledge items"""
         session = self.repository.get_session()
         removed = 0
-        
+
         try:
             from database.models import SearchIndex, KnowledgeItem
-            
+
             # Get all search indices
             indices = session.query(SearchIndex).all()
-            
+
             for index in indices:
                 # Check if knowledge item exists
                 item = session.query(KnowledgeItem).filter(
                     KnowledgeItem.id == index.knowledge_item_id
                 ).first()
-                
+
                 if not item:
                     session.delete(index)
                     removed += 1
-            
+
             session.commit()
             logger.info(f"Removed {removed} stale indices")
             return removed
-            
+
         except Exception as e:
             logger.error(f"Error removing stale indices: {str(e)}")
             session.rollback()
@@ -0,0 +1,178 @@
+"""
+Query Intent Classifier
+Answer every keyword question about a query in one regex pass
+
+The chat pipeline asks several questions of each query: is it about the
+team, does it name another company, does it ask about one person, about
+many, or about "the <role>". Each used to be its own any(k in text) scan
+over a hard-coded list. Here all the vocabularies are compiled into one
+alternation, scanned with an overlapping lookahead so every start
+position is tried:
+
+    (?=(a(?:bout|ll the|...)|...|w(?:h(?:at about|o(?: (?:are|is))?))))
+
+The alternation is factored into a prefix trie, so at each position the
+regex reports the longest keyword that starts there. Any shorter keyword
+starting at the same position is a prefix of it ("member" / "members",
+"who" / "who is"), so each keyword also carries the categories of every
+vocabulary keyword it contains, precomputed as a bit mask. That keeps
+the substring semantics of the old scans exactly.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Sequence
+
+TEAM_KEYWORDS = [
+    'who', 'ceo', 'cto', 'cfo', 'president', 'director', 'head', 'lead', 'leader',
+    'team', 'leadership', 'executive', 'founder', 'manager', 'officer', 'chief',
+    'role', 'position', 'title', 'department', 'responsible', 'charge', 'oversee',
+    'name', 'person', 'people', 'staff', 'employee', 'member', 'contact', 'email'
+]
+
+EXTERNAL_COMPANIES = ['microsoft', 'google', 'amazon', 'apple', 'meta', 'facebook',
+                      'tesla', 'netflix', 'ibm', 'oracle', 'salesforce', 'adobe']
+
+# Keywords that indicate asking about a SPECIFIC person (singular)
+SINGLE_PERSON_KEYWORDS = ['who is', 'about', 'tell me about', 'what about',
+                          'describe', 'info on', 'details about', 'information about',
+                          'photo of', 'picture of']
+
+# General/plural keywords that indicate asking about MULTIPLE people
+GENERAL_KEYWORDS = ['list', 'show all', 'give me all', 'who are', 'all the',
+                    'show me the', 'list all', 'find all', 'get all', 'members']
+
+# Role-specific queries (asking for THE specific person with that title)
+SINGULAR_ROLE_KEYWORDS = ['the ceo', 'the cto', 'the president', 'the director',
+                          'the head', 'the chief', 'the manager', 'the lead']
+
+OUT_OF_SCOPE_PATTERNS = [
+    r'\b(weather|stock|price|market|news|sport|food|restaurant|lunch|dinner)\b',
+    r'\b(how to|what is|when|where|why)\b.*\b(python|code|program|algorithm)\b',
+    r'\b(movie|music|game|tv show)\b'
+]
+
+VOCABULARIES: Dict[str, Sequence[str]] = {
+    'team': TEAM_KEYWORDS,
+    'company': EXTERNAL_COMPANIES,
+    'single_person': SINGLE_PERSON_KEYWORDS,
+    'general': GENERAL_KEYWORDS,
+    'singular_role': SINGULAR_ROLE_KEYWORDS,
+}
+
+
+class QueryIntent(NamedTuple):
+    """Everything the keyword vocabularies say about one query"""
+    team: bool
+    out_of_scope: bool
+    external_company: Optional[str]
+    single_person: bool
+    general: bool
+    singular_role: bool
+
+    @property
+    def is_team_question(self) -> bool:
+        """Team vocabulary wins; otherwise anything not clearly off-topic is allowed"""
+        return self.team or not self.out_of_scope
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """
+    Regex matching any of the keywords, factored as a prefix trie.
+
+    Python's re tries a flat alternation one branch at a time; a trie
+    shares each prefix, so a position is rejected after one character
+    check instead of one per keyword. Longer continuations come before
+    the end of a shorter keyword, so the longest keyword wins.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here: the continuation is optional
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+_CATEGORY_BITS = {name: 1 << bit for bit, name in enumerate(VOCABULARIES)}
+
+
+def _compile(vocabularies: Dict[str, Sequence[str]]):
+    """
+    Build the scanner regex and, per keyword, what finding it implies.
+
+    Returns:
+        Tuple of (scanner, category bit mask of every keyword each keyword
+        contains, lowest EXTERNAL_COMPANIES index each keyword contains)
+    """
+    keywords = sorted({keyword for words in vocabularies.values() for keyword in words})
+    scanner = re.compile("(?=(" + _trie_pattern(keywords) + "))")
+
+    masks: Dict[str, int] = {}
+    company_rank: Dict[str, int] = {}
+    for keyword in keywords:
+        contained = [other for other in keywords if other in keyword]
+        masks[keyword] = 0
+        for name, words in vocabularies.items():
+            if any(other in words for other in contained):
+                masks[keyword] |= _CATEGORY_BITS[name]
+        ranks = [EXTERNAL_COMPANIES.index(other) for other in contained if other in EXTERNAL_COMPANIES]
+        if ranks:
+            company_rank[keyword] = min(ranks)
+    return scanner, masks, company_rank
+
+
+_scanner, _masks, _company_rank = _compile(VOCABULARIES)
+_out_of_scope = re.compile("|".join(f"(?:{pattern})" for pattern in OUT_OF_SCOPE_PATTERNS))
+
+_TEAM = _CATEGORY_BITS['team']
+_SINGLE_PERSON = _CATEGORY_BITS['single_person']
+_GENERAL = _CATEGORY_BITS['general']
+_SINGULAR_ROLE = _CATEGORY_BITS['singular_role']
+
+
+@lru_cache(maxsize=1024)
+def classify_query(query: str) -> QueryIntent:
+    """
+    Classify a query against every vocabulary at once.
+
+    The chat pipeline classifies the same query several times (scope
+    check, company check, photo decision), so results are cached.
+
+    Args:
+        query: User question
+
+    Returns:
+        QueryIntent for the query
+    """
+    text = query.lower()
+    mask = 0
+    company = len(EXTERNAL_COMPANIES)
+    # findall returns the captured keywords without building Match objects
+    for keyword in _scanner.findall(text):
+        mask |= _masks[keyword]
+        company = min(company, _company_rank.get(keyword, company))
+
+    team = bool(mask & _TEAM)
+    return QueryIntent(
+        team=team,
+        # Only consulted when there is no team vocabulary
+        out_of_scope=not team and _out_of_scope.search(text) is not None,
+        # First company in list order, as the old next(...) scan picked
+        external_company=EXTERNAL_COMPANIES[company] if company < len(EXTERNAL_COMPANIES) else None,
+        single_person=bool(mask & _SINGLE_PERSON),
+        general=bool(mask & _GENERAL),
+        singular_role=bool(mask & _SINGULAR_ROLE),
+    )
+
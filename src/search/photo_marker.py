@@ -0,0 +1,28 @@
+"""
+Photo Marker
+The marker that attaches a profile photo to the end of an answer
+
+Answers are plain text; when one is about a single person it ends with
+PHOTO_MARKER followed by the photo URL, and the UI renders the image in
+its place. Everything that writes or reads the marker imports it here.
+"""
+
+from typing import Tuple
+
+PHOTO_MARKER = "📸PHOTO📸"
+
+
+def split_photo_marker(content: str) -> Tuple[str, str]:
+    """
+    Separate an answer's text from its photo marker.
+
+    Args:
+        content: Answer, possibly ending with a photo marker
+
+    Returns:
+        Tuple of (text, photo URL or empty string)
+    """
+    if PHOTO_MARKER not in content:
+        return content, ""
+    text, photo_url = content.split(PHOTO_MARKER, 1)
+    return text.strip(), photo_url.strip()
@@ -0,0 +1,59 @@
+"""
+Profile Summaries
+Short, token-bounded bio summaries computed once at ingest time
+
+Answer prompts only need the gist of each biography. Summaries are
+extractive: whole leading sentences of the bio, in order, up to
+PROFILE_SUMMARY_TOKENS. Scraped bios put the essentials (current role,
+scope, background) first, so the lead is a good summary and costs no API
+calls. A first sentence longer than the limit is cut at a word boundary.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from src.search.chunking import split_sentences
+from src.search.prompt_context import count_tokens, truncate_to_tokens
+
+PROFILE_SUMMARY_TOKENS = int(os.getenv("PROFILE_SUMMARY_TOKENS", "80"))
+
+
+def summarize_bio(bio: Optional[str], max_tokens: int = PROFILE_SUMMARY_TOKENS) -> str:
+    """
+    Summarize a biography by its leading sentences.
+
+    Args:
+        bio: Biography text
+        max_tokens: Token limit for the summary
+
+    Returns:
+        Summary text (empty for an empty bio)
+    """
+    bio = " ".join((bio or "").split())
+    if not bio:
+        return ""
+    if count_tokens(bio) <= max_tokens:
+        return bio
+
+    summary = ""
+    for sentence in split_sentences(bio):
+        candidate = f"{summary} {sentence}".strip()
+        if count_tokens(candidate) > max_tokens:
+            break
+        summary = candidate
+
+    return summary or truncate_to_tokens(bio, max_tokens)
+
+
+def summarize_profile(profile: Dict[str, Any], max_tokens: int = PROFILE_SUMMARY_TOKENS) -> str:
+    """
+    Summary to store with a profile row.
+
+    Args:
+        profile: Profile dictionary
+        max_tokens: Token limit for the summary
+
+    Returns:
+        Summary of the profile's bio
+    """
+    return summarize_bio(profile.get('bio'), max_tokens)
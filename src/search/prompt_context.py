@@ -0,0 +1,184 @@
+"""
+Prompt Context Builder
+Fit retrieved profiles into a token budget, most relevant first
+
+Every answer request has a fixed budget (PROMPT_TOKEN_BUDGET) covering
+the instructions, the profile context and the answer itself. The answer
+gets its ANSWER_MAX_TOKENS up front. What remains after the instructions
+is filled with profiles in relevance order:
+
+    1. the whole profile, with its bio capped at PROMPT_BIO_MAX_TOKENS
+       so one long biography cannot crowd out the next person (the
+       stored summary stands in for the bio when there is one)
+    2. if that does not fit, the profile with its bio cut to what is left
+       (at least PROMPT_MIN_BIO_TOKENS)
+    3. otherwise the profile without a bio, if the header lines fit
+    4. otherwise the profile is left out
+
+Tokens are counted with tiktoken when it is installed and its encoding
+can be loaded, and estimated at four characters per token otherwise.
+"""
+
+import logging
+import math
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on installed packages
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2500"))
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", "500"))
+PROMPT_BIO_MAX_TOKENS = int(os.getenv("PROMPT_BIO_MAX_TOKENS", "200"))
+PROMPT_MIN_BIO_TOKENS = int(os.getenv("PROMPT_MIN_BIO_TOKENS", "30"))
+
+# Tokens the chat format adds around each message and before the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None to estimate"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Count the tokens a text takes for a model.
+
+    Args:
+        text: Text to measure
+        model: Chat model name
+
+    Returns:
+        Token count (estimated from length without tiktoken)
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Cut a text to at most max_tokens tokens, at a word boundary.
+
+    Args:
+        text: Text to cut
+        max_tokens: Token limit, including the trailing "..."
+        model: Chat model name
+
+    Returns:
+        The text itself if it fits, otherwise its start followed by "..."
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+
+    encoding = _encoding(model)
+    if encoding is None:
+        cut = text[:(max_tokens - 1) * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens - 1])
+
+    # Drop a partial trailing word
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut.rstrip(" ,;:") + "..."
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """Tokens a list of chat messages takes, including the chat format overhead"""
+    return sum(count_tokens(message["content"], model) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages) + REPLY_OVERHEAD_TOKENS
+
+
+def _profile_header(profile: Dict[str, Any], number: int) -> str:
+    """Profile lines other than the bio"""
+    header = f"Person {number}: {profile['name']}\n"
+    if profile.get('role'):
+        header += f"Position: {profile['role']}\n"
+    if profile.get('department'):
+        header += f"Department: {profile['department']}\n"
+    if profile.get('contact'):
+        header += f"Email: {profile['contact']}\n"
+    if profile.get('linkedin'):
+        header += f"LinkedIn: {profile['linkedin']}\n"
+    return header
+
+
+def build_profile_context(profiles: List[Dict[str, Any]], budget: int,
+                          model: str = "gpt-3.5-turbo",
+                          bio_max_tokens: int = PROMPT_BIO_MAX_TOKENS,
+                          min_bio_tokens: int = PROMPT_MIN_BIO_TOKENS) -> Tuple[str, Dict[str, int]]:
+    """
+    Describe as many profiles as fit in a token budget.
+
+    Args:
+        profiles: Profiles in relevance order, most relevant first
+        budget: Tokens available for the context
+        model: Chat model name
+        bio_max_tokens: Largest bio excerpt for any one profile
+        min_bio_tokens: Smallest bio excerpt worth including
+
+    Returns:
+        Tuple of (context text, stats) where stats has tokens, budget,
+        included, truncated (bios cut or dropped to fit) and omitted counts
+    """
+    blocks: List[str] = []
+    used = 0
+    stats = {'tokens': 0, 'budget': budget, 'included': 0, 'truncated': 0, 'omitted': 0}
+
+    for profile in profiles:
+        number = stats['included'] + 1
+        header = _profile_header(profile, number)
+        header_tokens = count_tokens(header + "\n", model)
+        remaining = budget - used
+
+        if header_tokens > remaining:
+            stats['omitted'] += 1
+            continue
+
+        block = header
+        # Prefer the summary computed at ingest time over the raw bio
+        bio = (profile.get('summary') or profile.get('bio') or "").strip()
+        if bio:
+            bio_room = remaining - header_tokens - count_tokens("Background: \n", model)
+            if bio_room >= min_bio_tokens:
+                limit = min(bio_max_tokens, bio_room)
+                excerpt = truncate_to_tokens(bio, limit, model)
+                # Only count cuts the budget forced, not the per-profile cap
+                if limit < bio_max_tokens and excerpt != bio:
+                    stats['truncated'] += 1
+                block += f"Background: {excerpt}\n"
+            else:
+                stats['truncated'] += 1
+        block += "\n"
+
+        blocks.append(block)
+        used += count_tokens(block, model)
+        stats['included'] += 1
+
+    stats['tokens'] = used
+    return "".join(blocks), stats
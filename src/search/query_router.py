@@ -0,0 +1,278 @@
+"""
+Query Router
+Answer structured questions straight from SQLite, before any embedding or LLM call
+
+    count        "how many people are in Finance?"      COUNT(*) by department
+    department   "list the marketing team"              get_profiles_by_department
+    everyone     "list all team members"                get_all_profiles
+    departments  "what departments are there?"          get_cached_departments
+    title        "who is the CEO?"                      profiles whose role holds the title
+
+Patterns match the whole (normalized) question, so anything with an extra
+clause ("who is the CEO of Google?", "list the marketing team's LinkedIn
+profiles") is left alone. Department words are resolved against the
+departments in the database, then through DEPARTMENT_SYNONYMS, whole
+phrases only ("engineering team" -> Technology, but "the directors" does
+not resolve). A question that does not resolve, or a title that nobody
+holds, returns None and goes down the usual retrieval + LLM path.
+"""
+
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.search.photo_marker import PHOTO_MARKER
+
+logger = logging.getLogger(__name__)
+
+ROUTER_LIST_LIMIT = 50
+
+# Title -> regex over the lower-cased role
+TITLE_PATTERNS = {
+    'ceo': r"\bceo\b|chief executive",
+    'chief executive officer': r"\bceo\b|chief executive",
+    'cto': r"\bcto\b|chief technology",
+    'chief technology officer': r"\bcto\b|chief technology",
+    'cfo': r"\bcfo\b|chief financial",
+    'chief financial officer': r"\bcfo\b|chief financial",
+    'coo': r"\bcoo\b|chief operating",
+    'chief operating officer': r"\bcoo\b|chief operating",
+    'cmo': r"\bcmo\b|chief marketing",
+    'chief marketing officer': r"\bcmo\b|chief marketing",
+    'chro': r"\bchro\b|chief human|chief people",
+    'chief human resources officer': r"\bchro\b|chief human|chief people",
+    'cpo': r"\bcpo\b|chief product",
+    'chief product officer': r"\bcpo\b|chief product",
+    'cio': r"\bcio\b|chief information officer",
+    'chief information officer': r"\bcio\b|chief information officer",
+    'president': r"(?<!vice )\bpresident\b",
+    'founder': r"\bfounder\b|\bco-founder\b",
+    'co-founder': r"\bco-founder\b|\bcofounder\b",
+    'chairman': r"\bchair(?:man|woman|person)?\b",
+}
+
+# Other names for the departments the scraper assigns (see categorize_role).
+# Only a whole phrase resolves: substring matches would send "directors"
+# (which contains "cto") to Technology.
+DEPARTMENT_SYNONYMS = {
+    'engineering': 'Technology', 'engineers': 'Technology', 'tech': 'Technology',
+    'it': 'Technology', 'software': 'Technology', 'developers': 'Technology',
+    'finance': 'Finance', 'financial': 'Finance', 'accounting': 'Finance',
+    'ops': 'Operations', 'operations': 'Operations', 'logistics': 'Operations',
+    'supply chain': 'Operations',
+    'brand': 'Marketing', 'communications': 'Marketing', 'comms': 'Marketing',
+    'hr': 'Human Resources', 'human resources': 'Human Resources', 'talent': 'Human Resources',
+    'people ops': 'Human Resources', 'people operations': 'Human Resources',
+    'sales': 'Sales', 'business development': 'Sales', 'bizdev': 'Sales',
+    'compliance': 'Legal',
+    'executive': 'Executive', 'executives': 'Executive', 'c-suite': 'Executive',
+}
+
+# Words that mean "everybody" where a department is expected
+EVERYONE_WORDS = {'team', 'everyone', 'everybody', 'people', 'members', 'team members',
+                  'staff', 'employees', 'leadership', 'leadership team', 'leaders', 'all'}
+
+_GROUP_SUFFIX = r"(?:\s+(?:team|department|dept|group|division|org|organization))?(?:\s+(?:members|leaders|leadership|people|staff))?"
+_PEOPLE = r"(?:people|persons|members|team members|employees|staff|leaders|executives)"
+
+_patterns = [
+    ('departments', re.compile(
+        r"^(?:what|which|list|show(?: me)?)(?: are)?(?: all)?(?: the)?(?: your)? departments"
+        r"(?: are there| do you have| exist| do we have)?$")),
+    ('count', re.compile(
+        rf"^how many(?: {_PEOPLE})?(?: are there| are| work| do we have| do you have)?"
+        rf" (?:in|on|within)(?: the)? (?P<group>[a-z][a-z &/-]*?){_GROUP_SUFFIX}$")),
+    ('count', re.compile(
+        rf"^(?:how many {_PEOPLE}|how big is the team)(?: are there| do we have| do you have| in total| total)?$")),
+    ('count', re.compile(
+        rf"^(?:count|number of)(?: {_PEOPLE})?(?: in)?(?: the)? (?P<group>[a-z][a-z &/-]*?){_GROUP_SUFFIX}$")),
+    # Before the list patterns, so "who are the founders" is a title and not a department
+    ('title', re.compile(
+        r"^(?:who is|who's|who are|whos)(?: the| our| your)? (?P<title>[a-z -]+?)$")),
+    ('list', re.compile(
+        r"^(?:list|show(?: me)?|give me|display|who are|who's in|who is in|who are in|who works in|who work in)"
+        rf"(?: all)?(?: of)?(?: the)?(?: our)? (?P<group>[a-z][a-z &/-]*?){_GROUP_SUFFIX}$")),
+    ('list', re.compile(
+        r"^(?:the )?(?P<group>[a-z][a-z &/-]*?) (?:team|department)(?: members)?$")),
+]
+
+
+@dataclass
+class RoutedAnswer:
+    """An answer produced without the LLM"""
+    intent: str
+    answer: str
+    profile_ids: List[int] = field(default_factory=list)
+
+
+def normalize_question(query: str) -> str:
+    """Lower-case, drop politeness and trailing punctuation, collapse whitespace"""
+    text = " ".join(query.lower().replace("’", "'").split())
+    text = re.sub(r"^(?:please |can you |could you |tell me )+", "", text)
+    text = re.sub(r"\s+please$", "", text)
+    return text.rstrip(" ?!.")
+
+
+def resolve_department(phrase: str, departments: List[str]) -> Optional[str]:
+    """
+    Map a department phrase from a question to a department in the database.
+
+    Args:
+        phrase: Words the question used ("marketing", "engineering", "hr")
+        departments: Departments present in the database
+
+    Returns:
+        Department name, or None if the phrase is not a known department
+    """
+    phrase = phrase.strip()
+    by_lower = {department.lower(): department for department in departments if department}
+    if phrase in by_lower:
+        return by_lower[phrase]
+
+    department = DEPARTMENT_SYNONYMS.get(phrase)
+    if department and department.lower() in by_lower:
+        return by_lower[department.lower()]
+    return None
+
+
+def _count(db_path: str, department: Optional[str]) -> int:
+    """Number of profiles, optionally in one department"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if department:
+        cursor.execute("SELECT COUNT(*) FROM profiles WHERE department = ?", (department,))
+    else:
+        cursor.execute("SELECT COUNT(*) FROM profiles")
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+
+def _format_list(profiles: List[Dict[str, Any]], heading: str) -> str:
+    """Markdown list of profiles under a heading"""
+    lines = [heading, ""]
+    for profile in profiles[:ROUTER_LIST_LIMIT]:
+        line = f"- **{profile['name']}**"
+        if profile.get('role'):
+            line += f" - {profile['role']}"
+        lines.append(line)
+    if len(profiles) > ROUTER_LIST_LIMIT:
+        lines.append(f"\n_...and {len(profiles) - ROUTER_LIST_LIMIT} more. "
+                     f"Check the 'Browse Profiles' tab to see all of them._")
+    return "\n".join(lines)
+
+
+def _format_person(profile: Dict[str, Any]) -> str:
+    """One-person answer, with the photo marker when there is a photo"""
+    answer = f"**{profile['name']}** is the {profile.get('role') or 'team member'}"
+    if profile.get('department'):
+        answer += f" ({profile['department']})"
+    answer += "."
+    if profile.get('contact'):
+        answer += f" Email: {profile['contact']}."
+    if profile.get('linkedin'):
+        answer += f" LinkedIn: {profile['linkedin']}"
+    if profile.get('photo_url'):
+        answer += f"\n\n{PHOTO_MARKER}{profile['photo_url']}"
+    return answer
+
+
+def _title_pattern(title: str) -> Optional[str]:
+    """Role regex for a title the router knows, or None"""
+    title = title.strip()
+    # "who are the founders" asks for the same title as "who is the founder"
+    return TITLE_PATTERNS.get(title) or TITLE_PATTERNS.get(title[:-1] if title.endswith("s") else title)
+
+
+def _profiles_with_title(title: str, db_path: str, department: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Profiles whose role holds a title, or None for an unknown title"""
+    pattern = _title_pattern(title)
+    if pattern is None:
+        return None
+
+    from database import get_all_profiles, get_profiles_by_department
+    profiles = get_profiles_by_department(department, db_path=db_path) if department else get_all_profiles(db_path=db_path)
+    title_re = re.compile(pattern)
+    return [profile for profile in profiles if title_re.search((profile.get('role') or "").lower())]
+
+
+def _answer(intent: str, match: re.Match, db_path: str, department: Optional[str]) -> Optional[RoutedAnswer]:
+    """Answer one recognized intent, or None if its arguments don't resolve"""
+    from database import get_all_profiles, get_profiles_by_department
+    from src.search.warmup import get_cached_departments
+
+    if intent == 'departments':
+        departments = [d for d in get_cached_departments(db_path) if d]
+        if not departments:
+            return None
+        return RoutedAnswer(intent, f"There are {len(departments)} departments: {', '.join(departments)}.")
+
+    if intent == 'title':
+        holders = _profiles_with_title(match.group('title').strip(), db_path, department)
+        if not holders:
+            return None
+        if len(holders) == 1:
+            return RoutedAnswer(intent, _format_person(holders[0]), [holders[0]['id']])
+        title = match.group('title').strip()
+        heading = f"{len(holders)} people hold the {title.upper() if len(title) <= 4 else title} title:"
+        return RoutedAnswer(intent, _format_list(holders, heading), [p['id'] for p in holders])
+
+    group = match.groupdict().get('group')
+    target = department
+    if group and group.strip() not in EVERYONE_WORDS:
+        target = resolve_department(group, get_cached_departments(db_path))
+        if target is None:
+            return None
+
+    if intent == 'count':
+        count = _count(db_path, target)
+        where = f" in {target}" if target else " in the team"
+        return RoutedAnswer(intent, f"There {'is' if count == 1 else 'are'} {count} "
+                                    f"{'person' if count == 1 else 'people'}{where}.")
+
+    profiles = get_profiles_by_department(target, db_path=db_path) if target else get_all_profiles(db_path=db_path)
+    if not profiles:
+        return None
+    heading = (f"The {target} team has {len(profiles)} member(s):" if target
+               else f"The team has {len(profiles)} member(s):")
+    return RoutedAnswer('department' if target else 'everyone', _format_list(profiles, heading),
+                        [profile['id'] for profile in profiles])
+
+
+def route_query(query: str, db_path: str, department: Optional[str] = None) -> Optional[RoutedAnswer]:
+    """
+    Answer a question from SQLite alone if it is a recognized structured question.
+
+    Args:
+        query: User question
+        db_path: Path to SQLite database
+        department: Department filter selected in the UI, applied when the
+            question doesn't name one
+
+    Returns:
+        The routed answer, or None to use the retrieval + LLM path
+    """
+    start = time.perf_counter()
+    text = normalize_question(query)
+
+    for intent, pattern in _patterns:
+        match = pattern.match(text)
+        if not match:
+            continue
+        try:
+            routed = _answer(intent, match, db_path, department)
+        except sqlite3.Error as e:
+            logger.warning(f"Query router fell back to search: {e}")
+            return None
+        if routed is not None:
+            logger.info(f"Routed {query!r} as {routed.intent} in "
+                        f"{(time.perf_counter() - start) * 1000:.1f}ms")
+            return routed
+        if intent == 'title' and _title_pattern(match.group('title')):
+            # A known title nobody holds: let search and the LLM handle it
+            return None
+
+    return None
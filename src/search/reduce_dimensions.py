@@ -0,0 +1,291 @@
+"""
+Embedding Dimension Reduction
+Re-project stored vectors to a smaller size and measure the recall cost
+
+OpenAI text-embedding-3 vectors are trained so that a prefix of the
+vector is itself a usable embedding: shortening is truncation followed by
+re-normalization, which is exactly what the API's `dimensions` parameter
+returns. Other models are reduced with PCA fitted on the stored vectors;
+the projection is saved so the local provider applies the same one to new
+texts.
+
+Usage (from the repository root):
+    python -m src.search.reduce_dimensions --dimensions 256
+    python -m src.search.reduce_dimensions --dimensions 256 --apply
+    python -m src.search.reduce_dimensions --dimensions 256 --apply --knowledge-db data/knowledge.db
+
+Without --apply the tool only prints recall@k, memory and query time of
+the reduced vectors against the full-size baseline. With --apply it also
+rewrites profiles (and SearchIndex rows, if a knowledge database is given)
+under the reduced model name. Set EMBEDDING_DIMENSIONS to the same value
+so new embeddings match.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.search.ann_backends import ExactBackend, normalize_rows
+from src.search.embedding_providers import (
+    get_embedding_model, projection_path, reduced_model_name, split_model_name
+)
+from src.search.vector_codec import encode_embedding
+from src.search.vector_index import ProfileVectorIndex
+
+logger = logging.getLogger(__name__)
+
+PCA_MAX_SAMPLES = 20000
+
+
+def is_shortenable(model: str) -> bool:
+    """Whether a model's vectors can be shortened by truncation"""
+    return model.startswith("text-embedding-3")
+
+
+def fit_pca(matrix: np.ndarray, dimensions: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit a PCA projection on (a sample of) the rows of a matrix.
+
+    Args:
+        matrix: 2-D array of vectors
+        dimensions: Number of components to keep
+        seed: Sampling seed
+
+    Returns:
+        Tuple of (mean, components) with components shaped (dimensions, original)
+    """
+    if dimensions > min(matrix.shape):
+        raise ValueError(f"Cannot fit {dimensions} components on a {matrix.shape} matrix")
+
+    if matrix.shape[0] > PCA_MAX_SAMPLES:
+        rng = np.random.default_rng(seed)
+        matrix = matrix[rng.choice(matrix.shape[0], size=PCA_MAX_SAMPLES, replace=False)]
+
+    mean = matrix.mean(axis=0)
+    _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+    return mean.astype(np.float32), vt[:dimensions].astype(np.float32)
+
+
+def reduce_vectors(matrix: np.ndarray, model: str, dimensions: int,
+                   pca: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """
+    Reduce vectors to a smaller dimension.
+
+    Args:
+        matrix: 2-D array of full-size vectors
+        model: Base model the vectors came from
+        dimensions: Target size
+        pca: (mean, components) for models that need a projection
+
+    Returns:
+        Unit-length float32 rows of the requested size
+    """
+    if is_shortenable(model):
+        return normalize_rows(matrix[:, :dimensions])
+    if pca is None:
+        raise ValueError(f"{model} vectors need a PCA projection to be reduced")
+    mean, components = pca
+    return normalize_rows((matrix - mean) @ components.T)
+
+
+def recall_report(full: np.ndarray, reduced: np.ndarray, full_queries: np.ndarray,
+                  reduced_queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """
+    Compare search on reduced vectors against the full-size baseline.
+
+    Args:
+        full: Unit-length full-size rows
+        reduced: The same rows after reduction
+        full_queries: Unit-length full-size queries
+        reduced_queries: The same queries after reduction
+        k: Cut-off for recall@k
+
+    Returns:
+        Dictionary with recall, per-query times and memory for both sizes
+    """
+    reference = ExactBackend()
+    reference.build(full)
+    candidate = ExactBackend()
+    candidate.build(reduced)
+
+    start = time.perf_counter()
+    expected = reference.search_many(full_queries, k)
+    full_ms = (time.perf_counter() - start) * 1000 / max(1, len(full_queries))
+
+    start = time.perf_counter()
+    found = candidate.search_many(reduced_queries, k)
+    reduced_ms = (time.perf_counter() - start) * 1000 / max(1, len(reduced_queries))
+
+    recall = 0.0
+    for (expected_positions, _), (found_positions, _) in zip(expected, found):
+        if len(expected_positions):
+            recall += len(set(expected_positions.tolist()) & set(found_positions.tolist())) / len(expected_positions)
+
+    return {
+        'recall': recall / max(1, len(expected)),
+        'full_query_ms': full_ms,
+        'reduced_query_ms': reduced_ms,
+        'full_mb': full.nbytes / (1024 * 1024),
+        'reduced_mb': reduced.nbytes / (1024 * 1024)
+    }
+
+
+def sample_queries(matrix: np.ndarray, count: int = 200, noise: float = 0.05, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of stored rows, standing in for real queries"""
+    rng = np.random.default_rng(seed)
+    sample = matrix[rng.choice(len(matrix), size=min(count, len(matrix)), replace=False)]
+    return normalize_rows(sample + rng.normal(scale=noise, size=sample.shape))
+
+
+def apply_to_profiles(db_path: str, ids: np.ndarray, chunk_indexes: np.ndarray,
+                      reduced: np.ndarray, model: str) -> int:
+    """
+    Replace stored profile and profile chunk vectors with reduced ones.
+
+    Content hashes are recomputed for the reduced model name, so
+    update_vector_database treats the rows as up to date.
+
+    Args:
+        db_path: Path to SQLite database
+        ids: Profile ID for each row
+        chunk_indexes: Chunk number for each row (0 is the profile's own vector)
+        reduced: Reduced vectors
+        model: Reduced model name to record
+
+    Returns:
+        Number of vectors updated
+    """
+    from vector_db import compute_content_hash, create_profile_chunks
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name, role, bio, department, contact, linkedin FROM profiles")
+    texts = {
+        row[0]: "\n".join(create_profile_chunks({
+            'name': row[1], 'role': row[2], 'bio': row[3],
+            'department': row[4], 'contact': row[5], 'linkedin': row[6]
+        }))
+        for row in cursor.fetchall()
+    }
+
+    profile_updates = []
+    chunk_updates = []
+    for profile_id, chunk_index, vector in zip(ids.tolist(), chunk_indexes.tolist(), reduced):
+        if profile_id not in texts:
+            continue
+        blob = encode_embedding(vector, model)
+        if chunk_index == 0:
+            profile_updates.append((blob, compute_content_hash(texts[profile_id], model), model, profile_id))
+        else:
+            chunk_updates.append((blob, model, profile_id, chunk_index))
+
+    cursor.executemany(
+        "UPDATE profile_chunks SET embedding_vector = ?, embedding_model = ? "
+        "WHERE profile_id = ? AND chunk_index = ?",
+        chunk_updates
+    )
+    cursor.executemany(
+        "UPDATE profiles SET embedding_vector = ?, embedding_hash = ?, embedding_model = ? WHERE id = ?",
+        profile_updates
+    )
+    conn.commit()
+    conn.close()
+    return len(profile_updates) + len(chunk_updates)
+
+
+def load_search_index(db_path: str, model: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Read SearchIndex embeddings of one model from a knowledge database"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, embedding FROM search_indices WHERE embedding_model = ?", (model,))
+    rows = [(row_id, json.loads(embedding)) for row_id, embedding in cursor.fetchall() if embedding]
+    conn.close()
+
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+    dimension = len(rows[0][1])
+    rows = [(row_id, vector) for row_id, vector in rows if len(vector) == dimension]
+    ids = np.asarray([row_id for row_id, _ in rows], dtype=np.int64)
+    return ids, np.asarray([vector for _, vector in rows], dtype=np.float32)
+
+
+def apply_to_search_index(db_path: str, ids: np.ndarray, reduced: np.ndarray, model: str) -> int:
+    """Replace SearchIndex embeddings with reduced ones"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE search_indices SET embedding = ?, embedding_model = ? WHERE id = ?",
+        [(json.dumps(vector.tolist()), model, int(row_id)) for row_id, vector in zip(ids, reduced)]
+    )
+    conn.commit()
+    conn.close()
+    return len(ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reduce stored embeddings and report recall")
+    parser.add_argument("--db", default="data/leadership.db", help="Profiles database")
+    parser.add_argument("--knowledge-db", help="Knowledge database with a search_indices table")
+    parser.add_argument("--dimensions", type=int, default=256, help="Target embedding size")
+    parser.add_argument("--model", help="Full-size model the stored vectors came from")
+    parser.add_argument("--k", type=int, default=10, help="Cut-off for recall@k")
+    parser.add_argument("--apply", action="store_true", help="Rewrite stored vectors")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    base = args.model or split_model_name(get_embedding_model())[0]
+    reduced_model = reduced_model_name(base, args.dimensions)
+
+    index = ProfileVectorIndex(args.db, model=base).refresh()
+    if not len(index):
+        print(f"No {base} profile vectors in {args.db}")
+        return
+    full = index.matrix
+    if args.dimensions >= full.shape[1]:
+        print(f"Vectors already have {full.shape[1]} dimensions")
+        return
+
+    pca = None if is_shortenable(base) else fit_pca(full, args.dimensions)
+    reduced = reduce_vectors(full, base, args.dimensions, pca)
+    queries = sample_queries(full)
+    report = recall_report(full, reduced, queries, reduce_vectors(queries, base, args.dimensions, pca), args.k)
+
+    print(f"{len(full)} {base} vectors, {full.shape[1]} -> {args.dimensions} dimensions "
+          f"({'truncation' if pca is None else 'PCA'})")
+    print(f"  recall@{args.k}={report['recall']:.3f}")
+    print(f"  memory {report['full_mb']:.2f}MB -> {report['reduced_mb']:.2f}MB")
+    print(f"  query  {report['full_query_ms']:.3f}ms -> {report['reduced_query_ms']:.3f}ms")
+
+    if not args.apply:
+        return
+
+    if pca is not None:
+        path = projection_path(base, args.dimensions)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, mean=pca[0], components=pca[1])
+        print(f"Saved PCA projection to {path}")
+
+    chunk_indexes = np.zeros(len(index), dtype=np.int64)
+    for chunk_index, positions in index.postings.get('chunk', {}).items():
+        chunk_indexes[positions] = chunk_index
+    updated = apply_to_profiles(args.db, index.ids, chunk_indexes, reduced, reduced_model)
+    print(f"Re-projected {updated} profile vectors as {reduced_model}")
+
+    if args.knowledge_db:
+        item_ids, vectors = load_search_index(args.knowledge_db, base)
+        if len(item_ids):
+            item_reduced = reduce_vectors(normalize_rows(vectors), base, args.dimensions, pca)
+            updated = apply_to_search_index(args.knowledge_db, item_ids, item_reduced, reduced_model)
+            print(f"Re-projected {updated} search index entries as {reduced_model}")
+
+    print(f"Set EMBEDDING_DIMENSIONS={args.dimensions} so new embeddings use {reduced_model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Semantic Answer Cache
+Serve a cached answer to a paraphrase of an earlier question
+
+"Who runs technology?" and "Who is the CTO?" miss the exact answer cache
+but usually retrieve the same profiles and deserve the same answer. This
+cache stores each answered question's embedding next to its answer,
+grouped by the set of profiles it was answered from. A new question is
+served from the cache only when its retrieved profile set is identical,
+its embedding comes from the same embedding model, and it is within
+SEMANTIC_CACHE_THRESHOLD cosine similarity of a cached question.
+
+A similarity threshold can still match questions that want different
+answers ("Who is the CEO?" / "Who was the first CEO?"). To measure this,
+a sample of hits (SEMANTIC_CACHE_AUDIT_RATE) is flagged for audit. The
+caller re-answers those questions in the background and reports how much
+the two answers agree. Disagreements are counted as false hits and the
+entry is dropped. Tune the threshold with the false-hit rate.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.search.answer_cache import ANSWER_CACHE_TTL, profile_fingerprint
+from src.search.vector_codec import encode_embedding, decode_embedding, VectorFormatError
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "data/semantic_cache.db")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", str(ANSWER_CACHE_TTL)))
+SEMANTIC_CACHE_MAX_ITEMS = int(os.getenv("SEMANTIC_CACHE_MAX_ITEMS", "5000"))
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+SEMANTIC_CACHE_AUDIT_AGREEMENT = float(os.getenv("SEMANTIC_CACHE_AUDIT_AGREEMENT", "0.9"))
+
+
+@dataclass
+class SemanticEntry:
+    """A cached question and its answer"""
+    entry_id: int
+    query: str
+    vector: np.ndarray
+    answer: str
+    created_at: float
+
+
+@dataclass
+class SemanticHit:
+    """A cached answer served for a new question"""
+    entry_id: int
+    query: str
+    answer: str
+    similarity: float
+    audit: bool
+
+
+def profile_set_key(profiles: List[Dict[str, Any]], model: str, embedding_model: str) -> str:
+    """
+    Key for the set of profiles an answer was generated from.
+
+    Order is ignored: paraphrases often retrieve the same profiles in a
+    different order, and the answer does not depend on it. The embedding
+    model is part of the key because vectors from two models can have the
+    same size (hashing-384 and all-MiniLM-L6-v2) without being comparable.
+
+    Args:
+        profiles: Retrieved profiles
+        model: Chat model name
+        embedding_model: Model the question embeddings come from, with
+            any @dimensions suffix
+
+    Returns:
+        Hex SHA-256 digest of both models and the profiles' fingerprint
+    """
+    ordered = sorted(profiles, key=lambda profile: str(profile.get('id')))
+    digest = f"{model}\0{embedding_model}\0{profile_fingerprint(ordered)}"
+    return hashlib.sha256(digest.encode("utf-8")).hexdigest()
+
+
+def _unit(vector: Sequence[float]) -> Optional[np.ndarray]:
+    """Unit-length float32 copy of a vector, or None if it is empty"""
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array)) if array.size else 0.0
+    return array / norm if norm else None
+
+
+class SemanticAnswerCache:
+    """Answers grouped by profile set, matched by question embedding"""
+
+    def __init__(self, db_path: Optional[str] = SEMANTIC_CACHE_PATH,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: float = SEMANTIC_CACHE_TTL,
+                 max_items: int = SEMANTIC_CACHE_MAX_ITEMS,
+                 audit_rate: float = SEMANTIC_CACHE_AUDIT_RATE,
+                 enabled: bool = SEMANTIC_CACHE_ENABLED):
+        """
+        Initialize semantic answer cache
+
+        Args:
+            db_path: Path to the SQLite cache file (None for memory only)
+            threshold: Smallest cosine similarity that counts as the same question
+            ttl: Seconds an answer stays valid
+            max_items: Number of answers kept
+            audit_rate: Fraction of hits flagged for a background re-check
+            enabled: Whether answers are cached at all
+        """
+        self.db_path = db_path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self.audit_rate = audit_rate
+        self.enabled = enabled and ttl > 0
+        self._groups: Dict[str, List[SemanticEntry]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._next_id = 1
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'audits': 0,
+            'false_hits': 0
+        }
+
+        if db_path and self.enabled:
+            self._open()
+
+    def _open(self) -> None:
+        """Open the SQLite tier and load its unexpired entries"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS semantic_answer_cache (
+                    id INTEGER PRIMARY KEY,
+                    profile_set TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("DELETE FROM semantic_answer_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            cursor.execute("""
+                SELECT id, profile_set, query, vector, answer, created_at
+                FROM semantic_answer_cache ORDER BY id
+            """)
+            for entry_id, profile_set, query, blob, answer, created_at in cursor.fetchall():
+                try:
+                    vector = _unit(decode_embedding(blob))
+                except VectorFormatError:
+                    continue
+                if vector is not None:
+                    self._groups.setdefault(profile_set, []).append(
+                        SemanticEntry(entry_id, query, vector, answer, created_at))
+                self._next_id = max(self._next_id, entry_id + 1)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Semantic cache disabled on disk ({self.db_path}): {e}")
+            self._conn = None
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._groups.values())
+
+    def get(self, query_vector: Sequence[float], embedding_model: str,
+            profiles: List[Dict[str, Any]], model: str) -> Optional[SemanticHit]:
+        """
+        Find a cached answer to a similar question over the same profiles.
+
+        Args:
+            query_vector: Embedding of the new question
+            embedding_model: Model that produced query_vector
+            profiles: Profiles retrieved for the new question
+            model: Chat model name
+
+        Returns:
+            The closest cached answer above the threshold, or None
+        """
+        if not self.enabled:
+            return None
+        vector = _unit(query_vector)
+        if vector is None:
+            return None
+
+        key = profile_set_key(profiles, model, embedding_model)
+        now = time.time()
+
+        with self._lock:
+            self.stats['lookups'] += 1
+            entries = [entry for entry in self._groups.get(key, [])
+                       if now - entry.created_at <= self.ttl and entry.vector.shape == vector.shape]
+            if not entries:
+                self.stats['misses'] += 1
+                return None
+
+            similarities = np.stack([entry.vector for entry in entries]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.stats['misses'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            entry = entries[best]
+            return SemanticHit(entry.entry_id, entry.query, entry.answer, float(similarities[best]),
+                               audit=random.random() < self.audit_rate)
+
+    def put(self, query: str, query_vector: Sequence[float], embedding_model: str,
+            profiles: List[Dict[str, Any]], model: str, answer: str) -> None:
+        """
+        Store an answer under its question's embedding.
+
+        Args:
+            query: User question (kept for inspection)
+            query_vector: Embedding of the question
+            embedding_model: Model that produced query_vector
+            profiles: Profiles the answer was generated from
+            model: Chat model name
+            answer: Complete answer, including any photo marker
+        """
+        if not self.enabled or not answer:
+            return
+        vector = _unit(query_vector)
+        if vector is None:
+            return
+
+        key = profile_set_key(profiles, model, embedding_model)
+        now = time.time()
+
+        with self._lock:
+            entry = SemanticEntry(self._next_id, query, vector, answer, now)
+            self._next_id += 1
+            self._groups.setdefault(key, []).append(entry)
+            self.stats['writes'] += 1
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute("""
+                        INSERT INTO semantic_answer_cache (id, profile_set, query, vector, answer, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (entry.entry_id, key, query, encode_embedding(vector), answer, now))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Semantic cache write failed: {e}")
+
+            if len(self) > self.max_items:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the oldest ones until under 90% of the limit (caller holds the lock)"""
+        cutoff = time.time() - self.ttl
+        entries = sorted(
+            ((entry.created_at, entry.entry_id, key) for key, group in self._groups.items() for entry in group)
+        )
+        excess = len(entries) - int(self.max_items * 0.9)
+        doomed = {entry_id for created_at, entry_id, _ in entries if created_at < cutoff}
+        for _, entry_id, _ in entries:
+            if len(doomed) >= excess:
+                break
+            doomed.add(entry_id)
+
+        self._remove(doomed)
+        self.stats['evictions'] += len(doomed)
+        logger.info(f"Evicted {len(doomed)} entries from semantic cache")
+
+    def _remove(self, entry_ids: set) -> None:
+        """Remove entries from both tiers (caller holds the lock)"""
+        for key in list(self._groups):
+            self._groups[key] = [entry for entry in self._groups[key] if entry.entry_id not in entry_ids]
+            if not self._groups[key]:
+                del self._groups[key]
+
+        if self._conn is not None and entry_ids:
+            try:
+                self._conn.executemany("DELETE FROM semantic_answer_cache WHERE id = ?",
+                                       [(entry_id,) for entry_id in entry_ids])
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Semantic cache delete failed: {e}")
+
+    def record_audit(self, hit: SemanticHit, agreement: float) -> bool:
+        """
+        Record the result of re-answering a question that was served from the cache.
+
+        Args:
+            hit: The hit that was audited
+            agreement: Similarity between the cached and the fresh answer
+
+        Returns:
+            True if the hit counts as a false hit (its entry is then removed)
+        """
+        false_hit = agreement < SEMANTIC_CACHE_AUDIT_AGREEMENT
+        with self._lock:
+            self.stats['audits'] += 1
+            if false_hit:
+                self.stats['false_hits'] += 1
+                self._remove({hit.entry_id})
+
+        if false_hit:
+            logger.warning(f"Semantic cache false hit: answer for {hit.query!r} reused at similarity "
+                           f"{hit.similarity:.3f}, agreement {agreement:.3f}")
+        return false_hit
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._groups.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM semantic_answer_cache")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit, miss and false-hit counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+            stats['false_hit_rate'] = stats['false_hits'] / stats['audits'] if stats['audits'] else 0.0
+            stats['items'] = len(self)
+            stats['threshold'] = self.threshold
+            return stats
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """Get the process-wide semantic answer cache, creating it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
@@ -0,0 +1,224 @@
+"""
+Single-Flight Answers
+Share one in-flight answer between concurrent callers asking the same question
+
+Right after an announcement many Streamlit sessions ask the same question
+at once. Each would embed it, search and call the chat model itself: the
+answer caches only help once the first answer has finished. Here the
+first caller for a key starts a flight and everyone who asks the same
+question while it is running joins it and gets the same answer.
+
+Streamed flights run their producer on a background thread and buffer
+each piece, so a caller that joins late replays what has been generated
+so far and then follows along. A session that stops reading (a Streamlit
+rerun) does not cut the answer short for the others. When a flight
+fails, every caller that followed it gets its own FlightError caused by
+the original exception. The flight is forgotten as
+soon as it lands; later callers start a new one and the answer caches
+take it from there.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.search.answer_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# Seconds a joined caller waits for the next piece before giving up
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "120"))
+
+
+def question_key(query: str, *scope: Optional[str]) -> Tuple[Hashable, ...]:
+    """
+    Key under which identical questions share a flight.
+
+    Args:
+        query: Raw question
+        *scope: Everything else the answer depends on (database path,
+            department filter, which answer path produces it)
+
+    Returns:
+        Tuple of the scope and the normalized question
+    """
+    return tuple(part or "" for part in scope) + (normalize_query(query),)
+
+
+class FlightError(RuntimeError):
+    """A shared answer failed; the producer's exception is the __cause__"""
+
+
+class _Flight:
+    """One in-flight answer: the pieces produced so far and how it ended"""
+
+    def __init__(self):
+        self.pieces: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.callers = 1
+        self._cond = threading.Condition()
+
+    def add(self, piece: str) -> None:
+        with self._cond:
+            self.pieces.append(piece)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def follow(self, timeout: float) -> Iterator[str]:
+        """Yield every piece from the start, then raise FlightError if the flight failed"""
+        index = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: index < len(self.pieces) or self.done, timeout):
+                    raise TimeoutError(f"No answer progress for {timeout:.0f}s")
+                new = self.pieces[index:]
+                done, error = self.done, self.error
+            index += len(new)
+            yield from new
+            if done:
+                if error is not None:
+                    # One exception raised in several threads would collect
+                    # all of their tracebacks, so each caller gets its own
+                    raise FlightError(f"Shared answer failed: {error}") from error
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        """
+        Initialize single-flight group
+
+        Args:
+            timeout: Seconds a joined caller waits for progress
+            enabled: Whether calls are coalesced at all
+        """
+        self.timeout = timeout
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'flights': 0,
+            'shared': 0
+        }
+
+    def _join(self, key: Hashable) -> Tuple[_Flight, bool]:
+        """Join the flight for a key, starting one if there is none; True if this caller leads"""
+        with self._lock:
+            self.stats['calls'] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.callers += 1
+                self.stats['shared'] += 1
+                logger.info(f"Joined in-flight answer for {key!r} ({flight.callers} callers)")
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            self.stats['flights'] += 1
+            return flight, True
+
+    def _land(self, key: Hashable, flight: _Flight, error: Optional[BaseException] = None) -> None:
+        """Forget a flight, then release its callers"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(error)
+
+    def do(self, key: Hashable, fn: Callable[[], str]) -> str:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Flight key, see question_key
+            fn: Produces the complete answer
+
+        Returns:
+            The answer (a streamed flight's pieces joined together)
+        """
+        if not self.enabled:
+            return fn()
+
+        flight, leader = self._join(key)
+        if not leader:
+            return "".join(flight.follow(self.timeout))
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key, flight, e)
+            raise
+        flight.add(result)
+        self._land(key, flight)
+        return result
+
+    def stream(self, key: Hashable, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """
+        Stream one answer to all concurrent callers with the same key.
+
+        Args:
+            key: Flight key, see question_key
+            produce: Returns an iterable of answer pieces; called on a
+                background thread by the first caller only
+
+        Returns:
+            Iterator over every piece of the answer
+        """
+        if not self.enabled:
+            return iter(produce())
+
+        flight, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, produce),
+                             name="single-flight", daemon=True).start()
+        return flight.follow(self.timeout)
+
+    def _run(self, key: Hashable, flight: _Flight, produce: Callable[[], Iterable[str]]) -> None:
+        """Drive a streamed flight to completion"""
+        start = time.perf_counter()
+        try:
+            for piece in produce():
+                flight.add(piece)
+        except BaseException as e:
+            logger.error(f"In-flight answer failed: {e}")
+            self._land(key, flight, e)
+            return
+        self._land(key, flight)
+        if flight.callers > 1:
+            logger.info(f"Answer shared by {flight.callers} callers in {time.perf_counter() - start:.2f}s")
+
+    def in_flight(self) -> int:
+        """Number of flights currently running"""
+        with self._lock:
+            return len(self._flights)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get call, flight and sharing counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._flights)
+            stats['share_rate'] = stats['shared'] / stats['calls'] if stats['calls'] else 0.0
+            return stats
+
+
+_group: Optional[SingleFlight] = None
+_group_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group, shared by every Streamlit session"""
+    global _group
+    with _group_lock:
+        if _group is None:
+            _group = SingleFlight()
+        return _group
@@ -0,0 +1,129 @@
+"""
+Binary Vector Codec
+Compact float32 BLOB format for storing embeddings in SQLite
+
+Layout (little-endian):
+    magic      4 bytes   b"SKVE"
+    version    1 byte    format version
+    reserved   1 byte
+    model_len  2 bytes   length of the UTF-8 model name
+    dim        4 bytes   number of float32 components
+    model      model_len bytes, zero-padded to a 4-byte boundary
+    data       dim * 4 bytes of float32
+"""
+
+import json
+import struct
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"SKVE"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBxHI")
+_DTYPE = np.dtype("<f4")
+
+
+class VectorFormatError(ValueError):
+    """Raised when a BLOB is not a valid encoded vector"""
+
+
+def _padded(length: int) -> int:
+    """Round length up to a multiple of 4 so the float data stays aligned"""
+    return (length + 3) & ~3
+
+
+def encode_embedding(vector: Union[Sequence[float], np.ndarray], model: str = "") -> bytes:
+    """
+    Encode an embedding as a float32 BLOB with a dimension/model header.
+
+    Args:
+        vector: Embedding values
+        model: Name of the model that produced the embedding
+
+    Returns:
+        Encoded bytes ready to store in a BLOB column
+    """
+    data = np.asarray(vector, dtype=_DTYPE)
+    if data.ndim != 1:
+        raise VectorFormatError(f"Expected a 1-D vector, got shape {data.shape}")
+
+    model_bytes = model.encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(model_bytes), data.shape[0])
+    model_field = model_bytes.ljust(_padded(len(model_bytes)), b"\0")
+
+    return header + model_field + data.tobytes()
+
+
+def read_header(blob: bytes) -> Tuple[int, str, int]:
+    """
+    Read the header of an encoded vector.
+
+    Args:
+        blob: Encoded vector
+
+    Returns:
+        Tuple of (dimension, model name, byte offset of the float data)
+    """
+    if len(blob) < _HEADER.size:
+        raise VectorFormatError("Vector BLOB is shorter than its header")
+
+    magic, version, model_len, dim = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise VectorFormatError("Not an encoded vector (bad magic)")
+    if version != FORMAT_VERSION:
+        raise VectorFormatError(f"Unsupported vector format version {version}")
+
+    model = bytes(blob[_HEADER.size:_HEADER.size + model_len]).decode("utf-8")
+    offset = _HEADER.size + _padded(model_len)
+
+    if len(blob) != offset + dim * _DTYPE.itemsize:
+        raise VectorFormatError(f"Vector BLOB length does not match dimension {dim}")
+
+    return dim, model, offset
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """
+    Decode an encoded vector without copying or per-element parsing.
+
+    Args:
+        blob: Encoded vector
+
+    Returns:
+        Read-only float32 array backed by the BLOB's buffer
+    """
+    dim, _, offset = read_header(blob)
+    return np.frombuffer(blob, dtype=_DTYPE, count=dim, offset=offset)
+
+
+def embedding_model(blob: bytes) -> str:
+    """Return the model name recorded in an encoded vector"""
+    return read_header(blob)[1]
+
+
+def is_encoded(value) -> bool:
+    """Check whether a column value is an encoded vector"""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:4]) == MAGIC
+
+
+def decode_json_embedding(value: Optional[str]) -> Optional[List[float]]:
+    """
+    Parse a legacy JSON-encoded embedding.
+
+    Only used when migrating old rows; new rows are stored as BLOBs.
+
+    Args:
+        value: JSON array text
+
+    Returns:
+        List of floats, or None if the value is empty or invalid
+    """
+    if not value:
+        return None
+    try:
+        vector = json.loads(value)
+    except (TypeError, ValueError):
+        return None
+    return vector if isinstance(vector, list) and vector else None
@@ -0,0 +1,599 @@
+"""
+Resident Vector Index
+Holds all profile embeddings in one pre-normalized float32 matrix
+
+A query is a single matrix-vector product followed by an argpartition
+top-k, so search cost no longer depends on Python per-row overhead. For
+large corpora an approximate FAISS backend can be configured instead
+(see ann_backends); the matrix is always kept as the exact reference.
+Every rebuild also writes a snapshot (vectors, IDs and metadata, tagged
+with the profiles change counter) to data/embeddings. A new process
+restores the snapshot instead of decoding every row from SQLite when the
+counter still matches. With a quantized backend (int8/float16) the
+snapshot doubles as the memory-mapped full-precision reference, so only
+the compact copy stays resident.
+
+Several rows may share an ID (chunks of one long profile or knowledge
+item). A parent is scored by its best row (max-sim). Exact scoring takes
+the maximum over each parent's rows before the top-k, so one profile
+with many chunks costs nothing extra. An approximate backend is asked for
+k * VECTOR_CHUNK_OVERFETCH rows, keeping each parent's best; only a query
+that still has fewer than k distinct parents asks again for more.
+
+Metadata fields (profile department, knowledge item scope) are turned
+into posting lists when the index is built. A filtered query intersects
+them and passes the surviving rows to the backend, so the filter is
+applied before top-k rather than to the top-k.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database import init_change_tracking
+from src.search.ann_backends import (
+    ExactBackend, build_backend, is_quantized, normalize_rows, top_k_batch,
+    query_blocks, VECTOR_INDEX_DIR
+)
+from src.search.vector_codec import decode_embedding, VectorFormatError
+from src.search.vector_store import map_vectors, load_vectors, read_meta, StoredVectors
+
+logger = logging.getLogger(__name__)
+
+VECTOR_FILTER_EXACT_MAX = int(os.getenv("VECTOR_FILTER_EXACT_MAX", "20000"))
+# Rows first fetched per wanted result from an approximate backend
+VECTOR_CHUNK_OVERFETCH = int(os.getenv("VECTOR_CHUNK_OVERFETCH", "2"))
+
+
+class VectorIndex:
+    """Immutable in-memory matrix of unit-length vectors keyed by ID"""
+
+    def __init__(self, ids: Sequence[int], matrix: np.ndarray, model: str = "",
+                 backend=None, normalized: bool = False,
+                 metadata: Optional[Dict[str, Sequence[Any]]] = None):
+        """
+        Initialize vector index
+
+        Args:
+            ids: ID for each row of the matrix (repeated for chunks of
+                the same parent)
+            matrix: 2-D array with one vector per row
+            model: Embedding model the vectors came from
+            backend: Built search backend over the normalized matrix
+                (defaults to exact NumPy search)
+            normalized: The matrix rows are already unit length
+            metadata: Filterable fields, each a value per row
+                (e.g. {'department': [...]})
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        elif normalized:
+            self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        else:
+            self.matrix = normalize_rows(matrix)
+        self.model = model
+
+        if backend is None:
+            backend = ExactBackend()
+            backend.build(self.matrix)
+        self.backend = backend
+
+        self.postings = {
+            field: self._build_postings(values)
+            for field, values in (metadata or {}).items()
+        }
+
+        # Most rows any one ID has; with more than one, scores are grouped by ID
+        if len(self.ids):
+            self.max_rows_per_id = int(np.unique(self.ids, return_counts=True)[1].max())
+        else:
+            self.max_rows_per_id = 1
+        self._groups = self._group_rows(self.ids) if self.max_rows_per_id > 1 else None
+
+    @staticmethod
+    def _build_postings(values: Sequence[Any]) -> Dict[Any, np.ndarray]:
+        """Map each distinct value to the sorted row positions that have it"""
+        rows: Dict[Any, List[int]] = {}
+        for position, value in enumerate(values):
+            rows.setdefault(value, []).append(position)
+        return {value: np.asarray(positions, dtype=np.int64) for value, positions in rows.items()}
+
+    @staticmethod
+    def _group_rows(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Row order that puts each ID's rows together, where each ID starts in it, and the IDs"""
+        order = np.argsort(ids, kind="stable")
+        ordered = ids[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        return order, starts, ordered[starts]
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def filter_values(self, field: str) -> Dict[Any, int]:
+        """
+        Get the values of a metadata field and how many rows have each.
+
+        Args:
+            field: Metadata field name
+
+        Returns:
+            Dictionary mapping value to row count
+        """
+        return {value: len(positions) for value, positions in self.postings.get(field, {}).items()}
+
+    def filter_positions(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Get the rows that match every filter.
+
+        Args:
+            filters: Field name to required value, or to a list of
+                accepted values (None values are ignored)
+
+        Returns:
+            Sorted row positions
+        """
+        positions = None
+        for field, accepted in filters.items():
+            if accepted is None:
+                continue
+            if field not in self.postings:
+                logger.warning(f"Vector index has no metadata field '{field}'")
+                return np.empty(0, dtype=np.int64)
+
+            values = accepted if isinstance(accepted, (list, tuple, set)) else [accepted]
+            matches = [self.postings[field][value] for value in values if value in self.postings[field]]
+            field_positions = (np.unique(np.concatenate(matches)) if len(matches) > 1
+                               else matches[0] if matches else np.empty(0, dtype=np.int64))
+            positions = field_positions if positions is None else np.intersect1d(
+                positions, field_positions, assume_unique=True)
+
+        if positions is None:
+            return np.arange(len(self), dtype=np.int64)
+        return positions
+
+    @property
+    def dimension(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    def search(self, query_vector, k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Find the k vectors most similar to the query.
+
+        Args:
+            query_vector: Query embedding
+            k: Number of results
+            filters: Metadata constraints applied before ranking,
+                e.g. {'department': 'Finance'}
+
+        Returns:
+            List of (id, cosine similarity) pairs, best first
+        """
+        if query_vector is None or not len(query_vector):
+            return []
+        return self.search_many([query_vector], k, filters=filters)[0]
+
+    def search_many(self, query_vectors, k: int = 5,
+                    filters: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Find the k most similar vectors for each of several queries.
+
+        All queries are scored together, so a batch costs one pass over
+        the matrix instead of one per query.
+
+        Args:
+            query_vectors: Query embeddings (list of lists or 2-D array)
+            k: Number of results per query
+            filters: Metadata constraints applied to every query
+
+        Returns:
+            One list of (id, cosine similarity) pairs per query, best first,
+            with each ID once (empty for queries that are empty or the
+            wrong dimension)
+        """
+        results: List[List[Tuple[int, float]]] = [[] for _ in range(len(query_vectors))]
+        if not len(self) or not results:
+            return results
+
+        subset = None
+        if filters and any(value is not None for value in filters.values()):
+            subset = self.filter_positions(filters)
+            if not len(subset):
+                return results
+
+        valid = []
+        for i, query_vector in enumerate(query_vectors):
+            query = np.asarray(query_vector, dtype=np.float32)
+            if not query.size:
+                # No embedding for this query (blank text or failed request)
+                continue
+            if query.shape != (self.dimension,):
+                logger.error(f"Query dimension {query.shape} does not match index dimension {self.dimension}")
+                continue
+            if np.linalg.norm(query) == 0:
+                continue
+            valid.append(i)
+        if not valid:
+            return results
+
+        queries = normalize_rows(np.vstack([query_vectors[i] for i in valid]))
+        if subset is not None and len(subset) <= VECTOR_FILTER_EXACT_MAX:
+            # Small filtered sets are cheapest (and exact) to score directly
+            matched = self._exact_search(queries, k, subset)
+        elif isinstance(self.backend, ExactBackend):
+            matched = self._exact_search(queries, k, subset)
+        else:
+            matched = self._approximate_search(queries, k, subset)
+
+        for i, found in zip(valid, matched):
+            results[i] = found
+        return results
+
+    def _exact_search(self, queries: np.ndarray, k: int,
+                      subset: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """Score every row (or every row in subset) and take the k best IDs by their best row"""
+        matrix = self.matrix if subset is None else self.matrix[subset]
+        ids = self.ids if subset is None else self.ids[subset]
+        groups = None
+        if self.max_rows_per_id > 1:
+            groups = self._groups if subset is None else self._group_rows(ids)
+
+        results = []
+        for start, stop in query_blocks(len(queries), matrix.shape[0]):
+            scores = queries[start:stop] @ matrix.T
+            if groups is None:
+                candidates = ids
+            else:
+                # Max-sim: one score per ID, its best row
+                order, starts, candidates = groups
+                scores = np.maximum.reduceat(scores[:, order], starts, axis=1)
+            for row_scores, best in zip(scores, top_k_batch(scores, k)):
+                results.append([(int(item_id), float(score))
+                                for item_id, score in zip(candidates[best], row_scores[best])])
+        return results
+
+    def _approximate_search(self, queries: np.ndarray, k: int,
+                            subset: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Ask the backend for a few rows per result, and for more only where IDs repeat too often.
+
+        A filtered query that still finds fewer than k IDs while the
+        filter allows more is scored exactly over the filtered rows.
+        """
+        results: List[List[Tuple[int, float]]] = [[] for _ in range(len(queries))]
+        # k * max_rows_per_id rows always hold k distinct IDs
+        most = k * self.max_rows_per_id
+        rows = min(most, k * max(1, VECTOR_CHUNK_OVERFETCH))
+        pending = np.arange(len(queries))
+        while len(pending):
+            retry = []
+            for i, (positions, scores) in zip(pending, self.backend.search_many(queries[pending], rows, subset=subset)):
+                results[i] = self._best_per_id(positions, scores, k)
+                if len(results[i]) < k and len(positions) >= rows and rows < most:
+                    retry.append(i)
+            pending = np.asarray(retry, dtype=np.int64)
+            rows = min(most, rows * 2)
+
+        if subset is not None:
+            # A graph index can miss a selective filter's rows altogether;
+            # score the subset directly for queries that came back short
+            short = [i for i, found in enumerate(results) if len(found) < k]
+            if short:
+                available = min(k, len(np.unique(self.ids[subset])))
+                short = [i for i in short if len(results[i]) < available]
+            if short:
+                for i, found in zip(short, self._exact_search(queries[short], k, subset)):
+                    results[i] = found
+        return results
+
+    def _best_per_id(self, positions: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Keep the first (best-scoring) row of each ID, up to k IDs"""
+        if self.max_rows_per_id == 1:
+            return [(int(self.ids[p]), float(score)) for p, score in zip(positions[:k], scores[:k])]
+
+        best = []
+        seen = set()
+        for position, score in zip(positions, scores):
+            item_id = int(self.ids[position])
+            if item_id not in seen:
+                seen.add(item_id)
+                best.append((item_id, float(score)))
+                if len(best) == k:
+                    break
+        return best
+
+
+class ProfileVectorIndex:
+    """Process-resident index over profiles.embedding_vector that refreshes on change"""
+
+    def __init__(self, db_path: str, model: Optional[str] = None):
+        """
+        Initialize profile vector index
+
+        Args:
+            db_path: Path to SQLite database
+            model: Only index vectors from this embedding model (None for any)
+        """
+        self.db_path = db_path
+        self.model = model
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._index = VectorIndex([], np.zeros((0, 0), dtype=np.float32))
+        self._version: Optional[int] = None
+        self._rebuilding = threading.Event()
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._rebuild_pending = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the index's own long-lived connection (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def _current_version(self) -> int:
+        """Read the profiles change counter (caller holds the lock)"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT version FROM profiles_version WHERE id = 1")
+        except sqlite3.OperationalError:
+            # Database was created before change tracking existed
+            init_change_tracking(cursor)
+            conn.commit()
+            cursor.execute("SELECT version FROM profiles_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def _load(self, version: int) -> VectorIndex:
+        """Read every stored embedding (and chunk embedding) into a single matrix"""
+        cursor = self._connection().cursor()
+        try:
+            cursor.execute("""
+                SELECT id, embedding_vector, embedding_model, department, 0
+                FROM profiles
+                WHERE embedding_vector IS NOT NULL
+            """)
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            # Embeddings have never been created for this database
+            rows = []
+
+        if rows:
+            try:
+                cursor.execute("""
+                    SELECT c.profile_id, c.embedding_vector, c.embedding_model, p.department, c.chunk_index
+                    FROM profile_chunks c
+                    JOIN profiles p ON p.id = c.profile_id
+                    ORDER BY c.profile_id, c.chunk_index
+                """)
+                rows.extend(cursor.fetchall())
+            except sqlite3.OperationalError:
+                # Chunks have never been written for this database
+                pass
+
+        ids = []
+        vectors = []
+        departments = []
+        chunk_indexes = []
+        model = ""
+        for profile_id, blob, row_model, department, chunk_index in rows:
+            if self.model and row_model and row_model != self.model:
+                # Left over from a different embedding model; re-index to replace it
+                continue
+            try:
+                vector = decode_embedding(blob)
+            except VectorFormatError as e:
+                logger.error(f"Skipping unreadable embedding for profile {profile_id}: {e}")
+                continue
+            if vectors and vector.shape != vectors[0].shape:
+                logger.warning(f"Skipping profile {profile_id}: embedding dimension {vector.shape[0]} "
+                               f"does not match {vectors[0].shape[0]}")
+                continue
+            ids.append(profile_id)
+            vectors.append(vector)
+            departments.append(department)
+            chunk_indexes.append(chunk_index)
+            model = model or (row_model or "")
+
+        if not vectors:
+            return VectorIndex([], np.zeros((0, 0), dtype=np.float32))
+
+        matrix = normalize_rows(np.vstack(vectors))
+        del vectors
+        metadata = {'department': departments, 'chunk': chunk_indexes}
+        try:
+            stored = map_vectors(self._snapshot_path(), ids, matrix, model=model,
+                                 extra_meta=self._snapshot_meta(version), columns=metadata)
+            if is_quantized():
+                # Keep full precision on disk for rescoring; only the codes stay in memory
+                matrix = stored.vectors
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write vector index snapshot: {e}")
+        return self._build_index(ids, matrix, model, version, metadata)
+
+    def _build_index(self, ids, matrix: np.ndarray, model: str, version: int,
+                     metadata: Dict[str, List[Any]]) -> VectorIndex:
+        """Wrap normalized rows in a VectorIndex with the configured backend"""
+        backend = build_backend(matrix, cache_path=self._backend_cache_path(),
+                                cache_key={'profiles_version': version})
+        return VectorIndex(ids, matrix, model=model, backend=backend, normalized=True,
+                           metadata=metadata)
+
+    def _snapshot_path(self) -> str:
+        """Vector store holding the last built index for this database"""
+        return f"{self._backend_cache_path()}.snapshot"
+
+    def _snapshot_meta(self, version: int) -> Dict[str, Any]:
+        """Header fields that decide whether a snapshot can be restored"""
+        return {
+            'profiles_version': version,
+            'db_path': os.path.abspath(self.db_path),
+            'model_filter': self.model or ""
+        }
+
+    def _restore(self, version: int) -> Optional[VectorIndex]:
+        """Load the snapshot if it was taken at this version (caller holds the lock)"""
+        meta = read_meta(self._snapshot_path())
+        if not meta:
+            return None
+        if (meta.get('profiles_version') != version
+                or meta.get('db_path') != os.path.abspath(self.db_path)
+                or meta.get('model_filter') != (self.model or "")):
+            logger.info(f"Vector index snapshot is stale (version {meta.get('profiles_version')}, "
+                        f"database is at {version})")
+            return None
+
+        stored: Optional[StoredVectors] = load_vectors(self._snapshot_path(), mmap=True)
+        if stored is None:
+            return None
+
+        # Quantized backends rescore from the map; others want the rows in memory
+        matrix = stored.vectors if is_quantized() else np.array(stored.vectors)
+        metadata = {name: stored.column_values(name) for name in stored.columns}
+        return self._build_index(stored.ids, matrix, stored.meta.get('model', ""), version, metadata)
+
+    def restore_snapshot(self) -> bool:
+        """
+        Load the index from its snapshot if the snapshot is current.
+
+        Returns:
+            True if the index is now current (restored or already loaded)
+        """
+        with self._lock:
+            version = self._current_version()
+            if self._version == version:
+                return True
+            index = self._restore(version)
+            if index is None:
+                return False
+            self._index = index
+            self._version = version
+            logger.info(f"Restored vector index with {len(index)} vectors from snapshot (version {version})")
+            return True
+
+    def refresh_in_background(self) -> threading.Thread:
+        """
+        Rebuild the index on a background thread.
+
+        While the rebuild runs, searches keep using the index that is
+        already loaded (if any) instead of waiting for it. Only one
+        rebuild runs at a time: a request that arrives while one is
+        running makes it check the change counter once more when it
+        finishes, and the rebuilding flag stays set until then.
+
+        Returns:
+            The rebuild thread (the running one, if there is one)
+        """
+        with self._rebuild_lock:
+            if self._rebuild_thread is not None:
+                self._rebuild_pending = True
+                return self._rebuild_thread
+            self._rebuilding.set()
+
+            def rebuild():
+                while True:
+                    try:
+                        self._update()
+                    except Exception as e:
+                        logger.error(f"Background vector index rebuild failed: {e}")
+                    with self._rebuild_lock:
+                        if not self._rebuild_pending:
+                            self._rebuild_thread = None
+                            self._rebuilding.clear()
+                            return
+                        self._rebuild_pending = False
+
+            self._rebuild_thread = threading.Thread(target=rebuild, name="vector-index-rebuild", daemon=True)
+            self._rebuild_thread.start()
+            return self._rebuild_thread
+
+    def _backend_cache_path(self) -> str:
+        """Where a persisted ANN index for this database lives"""
+        source = f"{os.path.abspath(self.db_path)}|{self.model or ''}"
+        db_key = hashlib.sha1(source.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(VECTOR_INDEX_DIR, f"profiles_{db_key}")
+
+    def refresh(self, force: bool = False) -> VectorIndex:
+        """
+        Rebuild the matrix if the profiles table changed since the last load.
+
+        Args:
+            force: Rebuild even if nothing changed
+
+        Returns:
+            The current vector index
+        """
+        if not force and self._rebuilding.is_set() and len(self._index):
+            # A background rebuild is on its way; serve the previous index meanwhile
+            return self._index
+        return self._update(force)
+
+    def _update(self, force: bool = False) -> VectorIndex:
+        """Reload under the lock if the change counter moved"""
+        with self._lock:
+            version = self._current_version()
+            if force or version != self._version:
+                self._index = self._load(version)
+                self._version = version
+                logger.info(f"Loaded vector index with {len(self._index)} vectors (version {version})")
+            return self._index
+
+    def search(self, query_vector, k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Find the k profiles most similar to the query.
+
+        Args:
+            query_vector: Query embedding
+            k: Number of results
+            filters: Metadata constraints applied before ranking,
+                e.g. {'department': 'Finance'}
+
+        Returns:
+            List of (profile id, cosine similarity) pairs, best first
+        """
+        return self.refresh().search(query_vector, k, filters=filters)
+
+    def search_many(self, query_vectors, k: int = 5,
+                    filters: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Find the k most similar profiles for each of several queries.
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of results per query
+            filters: Metadata constraints applied to every query
+
+        Returns:
+            One list of (profile id, cosine similarity) pairs per query
+        """
+        return self.refresh().search_many(query_vectors, k, filters=filters)
+
+
+_indexes: Dict[Tuple[str, Optional[str]], ProfileVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_profile_index(db_path: str, model: Optional[str] = None) -> ProfileVectorIndex:
+    """
+    Get the shared profile index for a database, creating it on first use.
+
+    Args:
+        db_path: Path to SQLite database
+        model: Only index vectors from this embedding model (None for any)
+
+    Returns:
+        ProfileVectorIndex for that database and model
+    """
+    key = (db_path, model)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = ProfileVectorIndex(db_path, model=model)
+        return _indexes[key]
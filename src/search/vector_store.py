@@ -0,0 +1,300 @@
+"""
+Memory-Mapped Vector Store
+On-disk float32 matrix that loads with a single mmap
+
+A store named "embeddings_cache" in data/embeddings/ is three files:
+    embeddings_cache.<generation>.vectors.npy   float32 matrix, one vector per row
+    embeddings_cache.<generation>.ids.npy       int64 ID for each row
+    embeddings_cache.meta.json                  version header (format, model,
+                                                shape, generation, ...)
+plus embeddings_cache.<generation>.column-<name>.npy for each per-row
+column saved with the vectors (e.g. department), so the header stays
+small however many rows there are.
+
+Every save writes a new generation of data files, each through its own
+temporary file, and then replaces the header. The header names the
+generation it describes, so a reader always gets vectors and ids from the
+same save, even while another process (a second Streamlit session, or
+main.py next to the app) is writing. Older generations are removed once
+they are no longer current.
+
+Loading maps the .npy files read-only, so startup does not parse
+anything and several processes share the same page cache.
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 3
+
+# Generations younger than this are left alone: a concurrent save may be
+# about to publish them
+STORE_GC_GRACE_SECONDS = 60
+
+
+@dataclass
+class StoredVectors:
+    """Vectors loaded from a store (arrays may be read-only memory maps)"""
+    ids: np.ndarray
+    vectors: np.ndarray
+    meta: Dict[str, Any] = field(default_factory=dict)
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def column_values(self, name: str) -> List[Any]:
+        """A column as Python values, with empty strings read back as None"""
+        column = self.columns[name]
+        if column.dtype.kind == "U":
+            return [value or None for value in column.tolist()]
+        return column.tolist()
+
+    def as_dict(self) -> Dict[int, np.ndarray]:
+        """Map each ID to its row (rows are views, not copies)"""
+        return {int(item_id): self.vectors[i] for i, item_id in enumerate(self.ids)}
+
+
+def store_paths(path: str, generation: str = "", columns: Sequence[str] = ()) -> Dict[str, str]:
+    """
+    Get the file names that make up a store.
+
+    Args:
+        path: Store path without extension, e.g. data/embeddings/embeddings_cache
+        generation: Generation of the data files (from the header)
+        columns: Names of per-row columns saved with the vectors
+
+    Returns:
+        Dictionary with vectors, ids and meta file paths, and one path
+        per column keyed "column-<name>"
+    """
+    paths = {
+        'vectors': f"{path}.{generation}.vectors.npy",
+        'ids': f"{path}.{generation}.ids.npy",
+        'meta': f"{path}.meta.json"
+    }
+    for name in columns:
+        paths[f"column-{name}"] = f"{path}.{generation}.column-{name}.npy"
+    return paths
+
+
+def _column_array(name: str, values: Sequence[Any], count: int) -> np.ndarray:
+    """Turn per-row values (numbers, or strings where None is stored as "") into an array"""
+    if len(values) != count:
+        raise ValueError(f"Column '{name}' has {len(values)} values for {count} rows")
+    if any(isinstance(value, str) for value in values):
+        return np.array(["" if value is None else value for value in values], dtype=str)
+    array = np.asarray(values)
+    if array.dtype.kind not in "biuf":
+        raise ValueError(f"Column '{name}' must hold numbers or strings, got {array.dtype}")
+    return array
+
+
+def _write_atomic(target: str, write) -> None:
+    """Write through a uniquely named temporary file and rename it into place"""
+    directory = os.path.dirname(target) or "."
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=os.path.basename(target) + ".",
+                                     suffix=".tmp", delete=False) as f:
+        tmp = f.name
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.remove(tmp)
+            raise
+    os.replace(tmp, target)
+
+
+def _remove_old_generations(path: str, current: str) -> None:
+    """Delete data files of generations other than current, past the grace period"""
+    cutoff = time.time() - STORE_GC_GRACE_SECONDS
+    for file in glob.glob(f"{glob.escape(path)}.*.npy"):
+        # Only this store's data files: <path>.<32 hex digits>.<kind>.npy
+        generation = file[len(path) + 1:].split(".", 1)[0]
+        if generation == current or len(generation) != 32 or not _is_hex(generation):
+            continue
+        try:
+            if os.path.getmtime(file) < cutoff:
+                os.remove(file)
+        except OSError:
+            # Still mapped by a reader on Windows, or already removed
+            pass
+
+
+def _is_hex(text: str) -> bool:
+    """Whether text is a hexadecimal number (the form of a generation)"""
+    try:
+        int(text, 16)
+        return True
+    except ValueError:
+        return False
+
+
+def save_vectors(path: str, ids: Sequence[int], vectors, model: str = "",
+                 extra_meta: Optional[Dict[str, Any]] = None,
+                 columns: Optional[Dict[str, Sequence[Any]]] = None) -> Dict[str, Any]:
+    """
+    Save vectors as a memory-mappable store.
+
+    The data files are a new generation and the header, naming that
+    generation, is written last, so a reader never sees a header that
+    describes half-written data or data from another save.
+
+    Args:
+        path: Store path without extension
+        ids: ID for each vector
+        vectors: 2-D array (or list of lists) with one vector per row
+        model: Embedding model the vectors came from
+        extra_meta: Additional header fields
+        columns: Per-row values to store next to the vectors, each a
+            number or string (None is stored as an empty string) per row
+
+    Returns:
+        The header that was written
+    """
+    ids_array = np.asarray(ids, dtype=np.int64)
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2 and ids_array.shape[0] == 0:
+        matrix = matrix.reshape(0, 0)
+    if matrix.ndim != 2 or matrix.shape[0] != ids_array.shape[0]:
+        raise ValueError(f"Expected {ids_array.shape[0]} rows, got array of shape {matrix.shape}")
+    column_arrays = {name: _column_array(name, values, ids_array.shape[0])
+                     for name, values in (columns or {}).items()}
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    generation = uuid.uuid4().hex
+    paths = store_paths(path, generation, list(column_arrays))
+    _write_atomic(paths['vectors'], lambda f: np.save(f, matrix))
+    _write_atomic(paths['ids'], lambda f: np.save(f, ids_array))
+    for name, column in column_arrays.items():
+        _write_atomic(paths[f"column-{name}"], lambda f, column=column: np.save(f, column))
+
+    meta = {
+        'format_version': STORE_FORMAT_VERSION,
+        'generation': generation,
+        'count': int(matrix.shape[0]),
+        'dimension': int(matrix.shape[1]),
+        'dtype': 'float32',
+        'model': model,
+        'columns': list(column_arrays),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    if extra_meta:
+        meta.update(extra_meta)
+
+    _write_atomic(paths['meta'], lambda f: f.write(json.dumps(meta, indent=2).encode("utf-8")))
+    _remove_old_generations(path, generation)
+
+    logger.info(f"Saved {meta['count']} vectors to {path}")
+    return meta
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a store's header without touching the vectors.
+
+    Args:
+        path: Store path without extension
+
+    Returns:
+        Header dictionary, or None if the store is missing or unreadable
+    """
+    try:
+        with open(store_paths(path)['meta'], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_vectors(path: str, mmap: bool = True) -> Optional[StoredVectors]:
+    """
+    Load a store, memory-mapping the arrays by default.
+
+    Args:
+        path: Store path without extension
+        mmap: Map the files read-only instead of reading them into memory
+
+    Returns:
+        StoredVectors, or None if the store is missing, from another
+        format version, or does not match its header
+    """
+    # A concurrent save can retire the generation between reading the
+    # header and opening its files; the new header then names the new one
+    for attempt in range(2):
+        meta = read_meta(path)
+        if meta is None:
+            return None
+
+        if meta.get('format_version') != STORE_FORMAT_VERSION:
+            logger.warning(f"Ignoring vector store {path} with format version {meta.get('format_version')}")
+            return None
+
+        stored = _load_generation(path, meta, mmap)
+        if stored is not None or attempt:
+            return stored
+    return None
+
+
+def _load_generation(path: str, meta: Dict[str, Any], mmap: bool) -> Optional[StoredVectors]:
+    """Load the data files a header names and check them against it"""
+    names = meta.get('columns', [])
+    paths = store_paths(path, meta.get('generation', ""), names)
+    mmap_mode = "r" if mmap else None
+    try:
+        vectors = np.load(paths['vectors'], mmap_mode=mmap_mode, allow_pickle=False)
+        ids = np.load(paths['ids'], mmap_mode=mmap_mode, allow_pickle=False)
+        columns = {name: np.load(paths[f"column-{name}"], mmap_mode=mmap_mode, allow_pickle=False)
+                   for name in names}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load vector store {path}: {e}")
+        return None
+
+    if (vectors.shape != (meta['count'], meta['dimension']) or ids.shape != (meta['count'],)
+            or any(column.shape != (meta['count'],) for column in columns.values())):
+        logger.warning(f"Vector store {path} does not match its header, ignoring it")
+        return None
+
+    return StoredVectors(ids=ids, vectors=vectors, meta=meta, columns=columns)
+
+
+def map_vectors(path: str, ids: Sequence[int], vectors, model: str = "",
+                extra_meta: Optional[Dict[str, Any]] = None,
+                columns: Optional[Dict[str, Sequence[Any]]] = None) -> StoredVectors:
+    """
+    Write vectors to a store and hand back a read-only memory map of them.
+
+    Used to move a full-precision matrix out of process memory when only
+    a compact copy needs to stay resident.
+
+    Args:
+        path: Store path without extension
+        ids: ID for each vector
+        vectors: 2-D array with one vector per row
+        model: Embedding model the vectors came from
+        extra_meta: Additional header fields
+        columns: Per-row values to store next to the vectors
+
+    Returns:
+        StoredVectors backed by the files just written
+    """
+    meta = save_vectors(path, ids, vectors, model=model, extra_meta=extra_meta, columns=columns)
+    # This save's own generation, even if another process has saved since
+    stored = _load_generation(path, meta, mmap=True)
+    if stored is None:
+        raise ValueError(f"Could not map vector store {path} after writing it")
+    return stored
@@ -0,0 +1,152 @@
+"""
+Startup Warm-up
+Load search state once per process before the first query arrives
+
+    vector index   restored from its snapshot when the snapshot matches the
+                   profiles change counter, otherwise rebuilt on a
+                   background thread (searches wait only if there is no
+                   index at all yet)
+    FTS5 index     one MATCH query so its pages are in the OS page cache
+                   (keyword searches still open their own connection)
+    departments    loaded once and served by get_cached_departments to the
+                   sidebar, KnowledgeService and the query router until
+                   the profiles change counter moves
+    embeddings     the provider is created, and a local model loaded, ahead
+                   of the first query
+
+Call warm_up() from service initialization; repeated calls for the same
+database return the first result.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.search.embedding_providers import get_embedding_provider
+from src.search.vector_index import get_profile_index
+
+logger = logging.getLogger(__name__)
+
+_warmed: Dict[str, Dict[str, Any]] = {}
+_warm_lock = threading.Lock()
+
+_departments: Dict[str, Tuple[int, List[str]]] = {}
+_departments_lock = threading.Lock()
+
+
+def _profiles_version(db_path: str) -> Optional[int]:
+    """Read the profiles change counter, or None if the database has none"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT version FROM profiles_version WHERE id = 1").fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def get_cached_departments(db_path: str) -> List[str]:
+    """
+    Departments for a database, loaded once and reused until profiles change.
+
+    A single-row read of the change counter replaces the DISTINCT scan
+    that sidebar reruns and routed questions would otherwise repeat.
+
+    Args:
+        db_path: Path to SQLite database
+
+    Returns:
+        Department names, sorted as get_departments returns them
+    """
+    version = _profiles_version(db_path)
+    with _departments_lock:
+        cached = _departments.get(db_path)
+        if cached is not None and version is not None and cached[0] == version:
+            return list(cached[1])
+
+    from database import get_departments
+    departments = get_departments(db_path=db_path)
+    # Read the counter first: a change made meanwhile moves it past this entry
+    if version is not None:
+        with _departments_lock:
+            _departments[db_path] = (version, departments)
+    return list(departments)
+
+
+def _warm_fts(db_path: str) -> int:
+    """Touch the FTS5 index so the first keyword search reads from cache"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT count(*) FROM profiles_fts")
+        count = cursor.fetchone()[0]
+        # A real MATCH pulls in the term index, not just the content table
+        cursor.execute("SELECT rowid FROM profiles_fts WHERE profiles_fts MATCH 'a*' LIMIT 1")
+        cursor.fetchall()
+        return count
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not warm FTS index: {e}")
+        return 0
+    finally:
+        conn.close()
+
+
+def _warm_embeddings(model: Optional[str]) -> str:
+    """Create the embedding provider; load local models now rather than on the first query"""
+    provider = get_embedding_provider(model)
+    if provider.provider == "local":
+        provider.embed_one("warm up")
+    return provider.model
+
+
+def warm_up(db_path: str, model: Optional[str] = None, background: bool = True) -> Dict[str, Any]:
+    """
+    Prepare search state for a database, once per process.
+
+    Args:
+        db_path: Path to SQLite database
+        model: Embedding model whose vectors to load (defaults to the
+            configured provider)
+        background: Rebuild a stale index on a background thread instead
+            of before returning
+
+    Returns:
+        Dictionary describing what was done: index ('restored', 'rebuilding'
+        or 'built'), vectors, departments, fts_rows, embedding_model and
+        seconds
+    """
+    with _warm_lock:
+        if db_path in _warmed:
+            return _warmed[db_path]
+
+        start = time.perf_counter()
+        embedding_model = _warm_embeddings(model)
+        index = get_profile_index(db_path, model=embedding_model)
+
+        if index.restore_snapshot():
+            state = 'restored'
+        elif background:
+            index.refresh_in_background()
+            state = 'rebuilding'
+        else:
+            index.refresh()
+            state = 'built'
+
+        departments = get_cached_departments(db_path)
+
+        result = {
+            'index': state,
+            'vectors': len(index.refresh()) if state != 'rebuilding' else 0,
+            'departments': departments,
+            'fts_rows': _warm_fts(db_path),
+            'embedding_model': embedding_model,
+            'seconds': time.perf_counter() - start
+        }
+        _warmed[db_path] = result
+
+    logger.info(f"Warm-up for {db_path}: index {state}, {result['vectors']} vectors, "
+                f"{len(departments)} departments, {result['seconds']:.2f}s")
+    return result
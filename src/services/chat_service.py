@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 import logging
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -16,21 +16,62 @@ class ChatService:
         self.conversation_history = []
     
     def process_message(self, message: str, department: Optional[str] = None) -> str:
-        from vector_db import generate_ai_answer, vector_search_profiles
+        from src.search.single_flight import get_single_flight
         try:
-            profiles = vector_search_profiles(message, limit=5, db_path=self.db_path)
-            if department and profiles:
-                profiles = [p for p in profiles if p.get('department') == department]
-            if not profiles:
-                response = "I couldn't find any team members matching your query."
-            else:
-                response = generate_ai_answer(message, profiles)
+            response = get_single_flight().do(self._flight_key(message, department),
+                                              lambda: self._answer(message, department))
             self.add_message("assistant", response)
             return response
         except Exception as e:
             logger.error(f"Error: {e}")
             return "I encountered an error. Please try again."
     
+    def stream_message(self, message: str, department: Optional[str] = None) -> Iterator[str]:
+        """Yield the answer as it is generated; it joins the history once complete."""
+        from src.search.single_flight import get_single_flight
+        response = ""
+        try:
+            # Sessions asking the same question at once follow one shared stream
+            for piece in get_single_flight().stream(self._flight_key(message, department),
+                                                    lambda: self._stream_answer(message, department)):
+                response += piece
+                yield piece
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            # After a partial answer, stop there rather than append the apology to it
+            if not response:
+                yield "I encountered an error. Please try again."
+            return
+        self.add_message("assistant", response)
+    
+    def _flight_key(self, message: str, department: Optional[str]):
+        from src.search.single_flight import question_key
+        return question_key(message, "chat_service", self.db_path, department)
+    
+    def _answer(self, message: str, department: Optional[str] = None) -> str:
+        from vector_db import generate_ai_answer, vector_search_profiles
+        from src.search.query_router import route_query
+        routed = route_query(message, self.db_path, department=department)
+        if routed:
+            return routed.answer
+        profiles = vector_search_profiles(message, limit=5, db_path=self.db_path, department=department)
+        if not profiles:
+            return "I couldn't find any team members matching your query."
+        return generate_ai_answer(message, profiles)
+    
+    def _stream_answer(self, message: str, department: Optional[str] = None) -> Iterator[str]:
+        from vector_db import stream_ai_answer, vector_search_profiles
+        from src.search.query_router import route_query
+        routed = route_query(message, self.db_path, department=department)
+        if routed:
+            yield routed.answer
+            return
+        profiles = vector_search_profiles(message, limit=5, db_path=self.db_path, department=department)
+        if not profiles:
+            yield "I couldn't find any team members matching your query."
+            return
+        yield from stream_ai_answer(message, profiles)
+    
     def add_message(self, role: str, content: str):
         self.conversation_history.append({"role": role, "content": content})
     
@@ -18,10 +18,7 @@ class KnowledgeService:
         from vector_db import vector_search_profiles
         from database import search_profiles
         if use_vector_search:
-            results = vector_search_profiles(query, limit=limit, db_path=self.db_path)
-            if department:
-                results = [r for r in results if r.get('department') == department]
-            return results[:limit]
+            return vector_search_profiles(query, limit=limit, db_path=self.db_path, department=department)
         else:
             return search_profiles(query, department=department, db_path=self.db_path)
     
@@ -33,15 +30,36 @@ class KnowledgeService:
             return get_all_profiles(db_path=self.db_path)
     
     def answer_question(self, query: str, department: Optional[str] = None) -> str:
+        from src.search.single_flight import get_single_flight
+        # Concurrent sessions asking the same question share one answer
+        return get_single_flight().do(self._flight_key(query, department),
+                                      lambda: self._answer_question(query, department))
+    
+    def _flight_key(self, query: str, department: Optional[str]):
+        from src.search.single_flight import question_key
+        return question_key(query, "knowledge_service", self.db_path, department)
+    
+    def _answer_question(self, query: str, department: Optional[str] = None) -> str:
         from vector_db import generate_ai_answer
+        from src.search.query_router import route_query
+        routed = route_query(query, self.db_path, department=department)
+        if routed:
+            return routed.answer
         profiles = self.search(query, use_vector_search=True, department=department)
         if not profiles:
             return "I couldn't find any team members matching your query."
         return generate_ai_answer(query, profiles)
     
+    def get_cache_stats(self) -> Dict:
+        from src.search.answer_cache import get_answer_cache
+        from src.search.semantic_cache import get_semantic_cache
+        from src.search.single_flight import get_single_flight
+        return {"exact": get_answer_cache().get_stats(), "semantic": get_semantic_cache().get_stats(),
+                "single_flight": get_single_flight().get_stats()}
+    
     def get_departments(self) -> List[str]:
-        from database import get_departments
-        return get_departments(db_path=self.db_path)
+        from src.search.warmup import get_cached_departments
+        return get_cached_departments(self.db_path)
     
     def get_profile_count(self, department: Optional[str] = None) -> int:
         from database import get_profile_count
@@ -133,10 +133,13 @@ class ScrapingService:
     
     def refresh_embeddings(self) -> Dict:
         try:
-            from vector_db import update_vector_database
+            from vector_db import update_vector_database, EMBEDDING_MODEL
             from database import get_profile_count
-            update_vector_database(db_path=self.db_path)
+            from src.search.async_embedding_client import get_embedding_client
+            embedding_stats = update_vector_database(db_path=self.db_path)
             count = get_profile_count(db_path=self.db_path)
-            return {"success": True, "count": count}
+            request_stats = get_embedding_client(EMBEDDING_MODEL).get_stats()
+            return {"success": True, "count": count, "embedding_stats": embedding_stats,
+                    "request_stats": request_stats}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -12,6 +12,8 @@ def render_admin_interface(scraping_service, knowledge_service):
     with col3:
         st.metric("🔍 Scraper", "Intelligent v2.0")
     
+    render_cache_stats(knowledge_service)
+    
     st.markdown("---")
     
     # Scraping form
@@ -64,5 +66,24 @@ def render_admin_interface(scraping_service, knowledge_service):
             else:
                 st.error(f"❌ {result.get('error', 'Unknown error')}")
 
+def render_cache_stats(knowledge_service):
+    stats = knowledge_service.get_cache_stats()
+    exact, semantic = stats["exact"], stats["semantic"]
+    with st.expander("💾 Answer Cache"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Exact Hit Rate", f"{exact['hit_rate']:.0%}")
+        with col2:
+            st.metric("Semantic Hit Rate", f"{semantic['hit_rate']:.0%}")
+        with col3:
+            st.metric("False Hits", f"{semantic['false_hits']} / {semantic['audits']} audited")
+        with col4:
+            st.metric("Cached Answers", exact['disk_items'] + semantic['items'])
+        st.caption(f"Semantic threshold {semantic['threshold']:.2f} • "
+                   f"false-hit rate {semantic['false_hit_rate']:.0%} of audited hits")
+        flights = stats["single_flight"]
+        st.caption(f"In-flight sharing: {flights['shared']} of {flights['calls']} questions "
+                   f"joined an answer already being generated")
+
 def render_quick_actions(scraping_service):
     pass
@@ -1,14 +1,27 @@
 ﻿"""Chat interface"""
 import streamlit as st
+from src.search.photo_marker import PHOTO_MARKER, split_photo_marker
+
+def render_answer(content):
+    text, photo_url = split_photo_marker(content)
+    st.markdown(text.strip())
+    if photo_url.startswith("http"):
+        st.image(photo_url, width=300)
+
 def render_chat_interface(chat_service, knowledge_service):
     st.header(" Chat")
     for msg in chat_service.get_history():
         with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
+            render_answer(msg["content"])
     if prompt := st.chat_input("Ask about team..."):
         chat_service.add_message("user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
         with st.chat_message("assistant"):
-            response = chat_service.process_message(prompt)
-            st.markdown(response)
+            placeholder = st.empty()
+            response = ""
+            for piece in chat_service.stream_message(prompt):
+                response += piece
+                placeholder.markdown(response.partition(PHOTO_MARKER)[0] + " ▌")
+            placeholder.empty()
+            render_answer(response)
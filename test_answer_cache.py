@@ -0,0 +1,130 @@
+"""Test that cached answers are invalidated by profile summary changes"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, fake chat model, caches kept in memory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import sqlite3
+import tempfile
+import types
+
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(tempfile.mkdtemp(), "embedding_cache.db"))
+
+import database
+import vector_db
+from database import init_database, insert_profiles, get_profiles_by_ids
+from src.search.answer_cache import AnswerCache, profile_fingerprint
+from src.search.semantic_cache import SemanticAnswerCache
+
+PROFILE = {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+           'bio': 'Jane leads engineering. She joined in 2015 after a decade in fintech.'}
+
+
+def _new_db():
+    path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    init_database(path)
+    insert_profiles([PROFILE], path)
+    return path
+
+
+def test_fingerprint_includes_summary():
+    before = dict(PROFILE, id=1, summary="Jane leads engineering.")
+    after = dict(before, summary="Jane leads engineering and security.")
+    assert profile_fingerprint([before]) != profile_fingerprint([after])
+
+
+def test_summary_change_invalidates_cached_answer():
+    path = _new_db()
+    cache = AnswerCache(db_path=None)
+    profiles = get_profiles_by_ids([1], db_path=path)
+    cache.put("who is jane", profiles, "gpt-3.5-turbo", "Jane Doe is the CTO.")
+    assert cache.get("who is jane", profiles, "gpt-3.5-turbo") == "Jane Doe is the CTO."
+
+    # Summaries are rewritten without touching updated_at
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE profiles SET summary = 'Jane runs security.' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    profiles = get_profiles_by_ids([1], db_path=path)
+    print(f"Summary now: {profiles[0]['summary']!r}")
+    assert cache.get("who is jane", profiles, "gpt-3.5-turbo") is None
+
+
+def test_profile_edit_invalidates_generated_answer():
+    path = _new_db()
+    prompts = []
+
+    def create(messages, **kwargs):
+        prompts.append(messages[-1]['content'])
+        role = "CTO" if "Chief Technology Officer" in prompts[-1] else "CISO"
+        message = types.SimpleNamespace(content=f"Jane Doe is the {role}.")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    exact = AnswerCache(db_path=None)
+    semantic = SemanticAnswerCache(db_path=None, audit_rate=0.0)
+    patches = {
+        'openai': types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create))),
+        'get_answer_cache': lambda: exact,
+        'get_semantic_cache': lambda: semantic,
+    }
+    saved = {name: getattr(vector_db, name) for name in patches}
+    for name, value in patches.items():
+        setattr(vector_db, name, value)
+    try:
+        for _ in range(2):
+            answer = vector_db.generate_ai_answer("who is jane", get_profiles_by_ids([1], db_path=path))
+            assert answer.startswith("Jane Doe is the CTO.")
+        assert len(prompts) == 1
+
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE profiles SET role = 'Chief Information Security Officer' WHERE id = 1")
+        conn.commit()
+        conn.close()
+
+        answer = vector_db.generate_ai_answer("who is jane", get_profiles_by_ids([1], db_path=path))
+    finally:
+        for name, value in saved.items():
+            setattr(vector_db, name, value)
+
+    print(f"Model calls: {len(prompts)}, answer after edit: {answer!r}")
+    assert len(prompts) == 2
+    assert answer.startswith("Jane Doe is the CISO.")
+
+
+def test_init_database_skips_summary_backfill_on_rerun():
+    path = _new_db()
+    calls = []
+    original = database.update_profile_summaries
+    database.update_profile_summaries = lambda *args, **kwargs: calls.append(args) or 0
+    try:
+        init_database(path)
+    finally:
+        database.update_profile_summaries = original
+    assert calls == []
+
+
+def test_init_database_backfills_summaries_once_for_old_databases():
+    # A database from before summaries existed
+    path = _new_db()
+    conn = sqlite3.connect(path)
+    conn.execute("ALTER TABLE profiles DROP COLUMN summary")
+    conn.commit()
+    conn.close()
+
+    init_database(path)
+    assert get_profiles_by_ids([1], db_path=path)[0]['summary']
+
+
+if __name__ == "__main__":
+    print("Testing Answer Cache Invalidation\n")
+    print("=" * 80)
+    for test in (test_fingerprint_includes_summary,
+                 test_summary_change_invalidates_cached_answer,
+                 test_profile_edit_invalidates_generated_answer,
+                 test_init_database_skips_summary_backfill_on_rerun,
+                 test_init_database_backfills_summaries_once_for_old_databases):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
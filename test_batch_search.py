@@ -0,0 +1,90 @@
+"""Test that batched vector searches return exactly what one-at-a-time searches return"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import tempfile
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import numpy as np
+
+import vector_db
+from database import init_database, insert_profiles
+from src.search.vector_index import VectorIndex
+
+QUERIES = [
+    "Who leads engineering?",
+    "finance and accounting",
+    "",
+    "brand and communications",
+    "Who runs the platform team?",
+]
+
+
+def _index():
+    """Random vectors where some IDs own several rows, as chunked items do"""
+    rng = np.random.default_rng(0)
+    ids = np.repeat(np.arange(300), rng.integers(1, 5, size=300))
+    departments = [('Finance', 'Technology', 'Sales')[item_id % 3] for item_id in ids]
+    matrix = rng.standard_normal((len(ids), 32)).astype(np.float32)
+    return VectorIndex(ids, matrix, metadata={'department': departments}), rng
+
+
+def test_index_batch_matches_single_queries():
+    index, rng = _index()
+    queries = list(rng.standard_normal((20, 32)).astype(np.float32))
+    # An empty and a wrong-sized query get empty results without disturbing the others
+    queries[3] = np.empty(0, dtype=np.float32)
+    queries[7] = np.ones(16, dtype=np.float32)
+
+    for filters in (None, {'department': 'Finance'}, {'department': ['Sales', 'Technology']}):
+        batch = index.search_many(queries, k=10, filters=filters)
+        single = [index.search(query, k=10, filters=filters) for query in queries]
+        for batch_result, single_result in zip(batch, single):
+            assert [item_id for item_id, _ in batch_result] == [item_id for item_id, _ in single_result]
+            np.testing.assert_allclose([score for _, score in batch_result],
+                                       [score for _, score in single_result], atol=1e-5)
+        assert batch[3] == [] and batch[7] == []
+        assert all(len(result) == 10 for i, result in enumerate(batch) if i not in (3, 7))
+
+
+def test_vector_search_many_matches_vector_search_profiles():
+    db_path = os.path.join(TMP, "profiles.db")
+    init_database(db_path)
+    insert_profiles([
+        {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+         'bio': 'Jane leads engineering, platform and infrastructure teams.'},
+        {'name': 'Raj Patel', 'role': 'Chief Financial Officer', 'department': 'Finance',
+         'bio': 'Raj oversees finance, accounting and investor relations.'},
+        {'name': 'Ana Lopez', 'role': 'Head of Marketing', 'department': 'Marketing',
+         'bio': 'Ana runs brand, communications and growth marketing.'},
+        {'name': 'Tom Berg', 'role': 'Engineering Manager', 'department': 'Technology',
+         'bio': 'Tom manages the platform engineering team.'},
+    ], db_path)
+    vector_db.update_vector_database(db_path)
+
+    for department in (None, 'Technology'):
+        batch = vector_db.vector_search_many(QUERIES, limit=3, db_path=db_path, department=department)
+        single = [vector_db.vector_search_profiles(query, limit=3, db_path=db_path, department=department)
+                  if query else [] for query in QUERIES]
+        print(f"{department}: {[[p['name'] for p in results] for results in batch]}")
+        for batch_results, single_results in zip(batch, single):
+            assert [p['id'] for p in batch_results] == [p['id'] for p in single_results]
+            np.testing.assert_allclose([p['similarity'] for p in batch_results],
+                                       [p['similarity'] for p in single_results], atol=1e-5)
+        assert batch[0] and batch[2] == []
+
+
+if __name__ == "__main__":
+    print("Testing Batch Vector Search\n")
+    print("=" * 80)
+    for test in (test_index_batch_matches_single_queries,
+                 test_vector_search_many_matches_vector_search_profiles):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,237 @@
+"""Test chunking of long texts and scoring parents by their best chunk (max-sim)"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import sys
+import tempfile
+import types
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import numpy as np
+
+from src.search import indexing, vector_index
+from src.search.ann_backends import create_backend, normalize_rows
+from src.search.chunking import chunk_text
+from src.search.vector_index import VectorIndex
+
+SENTENCES = [f"Sentence number {i} talks about topic {i} in some detail." for i in range(40)]
+TEXT = " ".join(SENTENCES)
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("Jane leads engineering.") == ["Jane leads engineering."]
+    assert chunk_text("   ") == []
+    assert chunk_text(TEXT, max_chars=0) == [TEXT]
+
+
+def test_chunks_fit_and_overlap():
+    chunks = chunk_text(TEXT, max_chars=200, overlap=80)
+    print(f"{len(chunks)} chunks: {[len(chunk) for chunk in chunks]}")
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    # Every sentence is kept, and each chunk starts with the previous one's last sentence
+    assert all(any(sentence in chunk for chunk in chunks) for sentence in SENTENCES)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last = previous.rsplit(". ", 1)[-1]
+        assert chunk.startswith(last)
+
+
+def test_long_sentence_is_cut_at_words():
+    words = " ".join(f"word{i}" for i in range(100))
+    chunks = chunk_text(words, max_chars=50, overlap=0)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == words.split()
+
+
+def _chunked_index(backend=None):
+    """Random rows where IDs own between one and six chunks"""
+    rng = np.random.default_rng(1)
+    ids = np.repeat(np.arange(200), rng.integers(1, 7, size=200))
+    rng.shuffle(ids)
+    departments = [('Finance', 'Technology')[item_id % 2] for item_id in ids]
+    matrix = rng.standard_normal((len(ids), 24)).astype(np.float32)
+    if backend is not None:
+        backend = create_backend(backend)
+        backend.build(normalize_rows(matrix))
+    index = VectorIndex(ids, matrix, backend=backend, metadata={'department': departments})
+    return index, ids, departments, rng
+
+
+def _brute_force(index, ids, query, k, keep=None):
+    """Each ID's best row score, highest k first"""
+    scores = index.matrix @ (query / np.linalg.norm(query))
+    best = {}
+    for row, item_id in enumerate(ids):
+        if keep is None or keep[row]:
+            best[int(item_id)] = max(best.get(int(item_id), -np.inf), float(scores[row]))
+    return sorted(best.items(), key=lambda pair: -pair[1])[:k]
+
+
+def test_parent_scored_by_best_chunk():
+    index, ids, departments, rng = _chunked_index()
+    keep = np.array([department == 'Finance' for department in departments])
+    original = vector_index.VECTOR_FILTER_EXACT_MAX
+    try:
+        # 0 treats every filtered set as too large to score on its own
+        for exact_max in (original, 0):
+            vector_index.VECTOR_FILTER_EXACT_MAX = exact_max
+            for query in rng.standard_normal((10, 24)).astype(np.float32):
+                for filters, mask in ((None, None), ({'department': 'Finance'}, keep)):
+                    results = index.search(query, k=10, filters=filters)
+                    expected = _brute_force(index, ids, query, 10, mask)
+                    assert [item_id for item_id, _ in results] == [item_id for item_id, _ in expected]
+                    np.testing.assert_allclose([score for _, score in results],
+                                               [score for _, score in expected], atol=1e-5)
+    finally:
+        vector_index.VECTOR_FILTER_EXACT_MAX = original
+
+
+def test_many_chunks_do_not_crowd_out_other_ids():
+    for backend in (None, 'float16'):
+        rng = np.random.default_rng(2)
+        query = rng.standard_normal(16).astype(np.float32)
+        # ID 0 has 60 chunks, all closer to the query than anything else
+        near = query + 0.05 * rng.standard_normal((60, 16)).astype(np.float32)
+        far = rng.standard_normal((40, 16)).astype(np.float32)
+        matrix = np.vstack([near, far])
+        ids = np.r_[np.zeros(60, dtype=np.int64), np.arange(1, 41)]
+        built = None
+        if backend:
+            built = create_backend(backend)
+            built.build(normalize_rows(matrix))
+        index = VectorIndex(ids, matrix, backend=built)
+
+        results = index.search(query, k=5)
+        print(f"{backend or 'exact'}: {[item_id for item_id, _ in results]}")
+        assert len(results) == 5
+        assert results[0][0] == 0
+        assert len({item_id for item_id, _ in results}) == 5
+
+
+def test_approximate_backend_matches_exact_ids():
+    exact, ids, _, rng = _chunked_index()
+    approximate, _, _, _ = _chunked_index('float16')
+    for query in rng.standard_normal((10, 24)).astype(np.float32):
+        assert ([item_id for item_id, _ in approximate.search(query, k=10)] ==
+                [item_id for item_id, _ in exact.search(query, k=10)])
+
+
+class FakeSession:
+    """Just enough of a SQLAlchemy session to record what the indexer writes"""
+
+    def __init__(self, item, rows):
+        self.item = item
+        self.rows = rows
+        self.added = []
+        self.commits = 0
+        self.rolled_back = False
+        self.fail_on_commit = False
+
+    def query(self, model):
+        session = self
+
+        class Query:
+            def filter(self, *conditions):
+                return self
+
+            def first(self):
+                return session.item
+
+            def delete(self):
+                session.deleted = len(session.rows)
+
+        return Query()
+
+    def add(self, row):
+        self.added.append(row)
+
+    def commit(self):
+        if self.fail_on_commit:
+            raise RuntimeError("disk full")
+        self.commits += 1
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+
+def _indexer(session):
+    """ContentIndexer over stand-in models, repository and vector search"""
+    models = types.ModuleType("database.models")
+
+    class Column:
+        def __eq__(self, other):
+            return True
+
+    class KnowledgeItem:
+        id = Column()
+
+    class SearchIndex:
+        knowledge_item_id = Column()
+
+        def __init__(self, **fields):
+            self.__dict__.update(fields)
+
+    models.KnowledgeItem, models.SearchIndex = KnowledgeItem, SearchIndex
+    sys.modules['database.models'] = models
+    repository = types.SimpleNamespace(get_session=lambda: session)
+    vector_search = types.SimpleNamespace(model_name=indexing.EMBEDDING_MODEL)
+    return indexing.ContentIndexer(repository, vector_search)
+
+
+def test_indexer_embeds_chunks_in_one_batch_and_one_transaction():
+    item = types.SimpleNamespace(title="Handbook", content=TEXT, category=None)
+    session = FakeSession(item, rows=["old"])
+    batches = []
+    original = indexing.create_embeddings_batch
+
+    def counting(texts, model=indexing.EMBEDDING_MODEL):
+        batches.append(len(texts))
+        return original(texts, model)
+
+    cwd = os.getcwd()
+    os.chdir(TMP)
+    indexing.create_embeddings_batch = counting
+    try:
+        assert _indexer(session).index_knowledge_item(1)
+        chunks = len(session.added)
+        # Unchanged text comes from the cache the second time
+        assert _indexer(FakeSession(item, rows=[])).index_knowledge_item(1)
+
+        failing = FakeSession(item, rows=["old"])
+        failing.fail_on_commit = True
+        assert not _indexer(failing).index_knowledge_item(1)
+    finally:
+        indexing.create_embeddings_batch = original
+        sys.modules.pop('database.models', None)
+        os.chdir(cwd)
+
+    print(f"{chunks} chunks, embedding batches: {batches}")
+    assert chunks == len(chunk_text(TEXT)) > 1
+    assert batches == [chunks]
+    assert session.commits == 1 and session.deleted == 1
+    assert all(row.scope == 'general' and row.embedding for row in session.added)
+    assert failing.rolled_back
+
+
+if __name__ == "__main__":
+    print("Testing Chunking and Max-Sim Search\n")
+    print("=" * 80)
+    for test in (test_short_text_is_one_chunk,
+                 test_chunks_fit_and_overlap,
+                 test_long_sentence_is_cut_at_words,
+                 test_parent_scored_by_best_chunk,
+                 test_many_chunks_do_not_crowd_out_other_ids,
+                 test_approximate_backend_matches_exact_ids,
+                 test_indexer_embeds_chunks_in_one_batch_and_one_transaction):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,90 @@
+"""Test token-budgeted embedding batches and the per-text fallback when a batch fails"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: fake providers, no API calls
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import threading
+
+from src.search import indexing
+from src.search.async_embedding_client import AsyncEmbeddingClient
+from src.search.embedding_providers import EmbeddingProvider
+from src.search.indexing import batch_by_token_budget, create_embeddings_batch, estimate_tokens
+
+
+class PoisonProvider(EmbeddingProvider):
+    """Embeds each text as [its length], but rejects any request containing "poison" """
+
+    def __init__(self):
+        super().__init__("poison")
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def embed(self, texts, timeout=None):
+        with self._lock:
+            self.requests.append(list(texts))
+        if any("poison" in text for text in texts):
+            raise ValueError("invalid input")
+        return [[float(len(text))] for text in texts]
+
+
+def _embed_with(provider, texts, **kwargs):
+    """Run create_embeddings_batch against a fake provider"""
+    client = AsyncEmbeddingClient(max_retries=0)
+    client.provider = provider
+    original = indexing.get_embedding_client
+    indexing.get_embedding_client = lambda model: client
+    try:
+        return create_embeddings_batch(texts, **kwargs)
+    finally:
+        indexing.get_embedding_client = original
+
+
+def test_batches_respect_token_and_item_limits():
+    texts = ["x" * 400] * 5 + ["y" * 40] * 6
+    batches = batch_by_token_budget(texts, max_tokens=250, max_items=4)
+    print(f"Batches: {batches}")
+    # Every text is in exactly one batch, in order
+    assert [i for batch in batches for i in batch] == list(range(len(texts)))
+    for batch in batches:
+        assert len(batch) <= 4
+        tokens = sum(estimate_tokens(texts[i]) for i in batch)
+        assert tokens <= 250 or len(batch) == 1
+    assert batches[:3] == [[0, 1], [2, 3], [4, 5, 6, 7]]
+
+
+def test_oversized_text_gets_its_own_batch():
+    texts = ["short", "z" * 10000, "short"]
+    assert batch_by_token_budget(texts, max_tokens=100) == [[0], [1], [2]]
+    assert batch_by_token_budget([]) == []
+
+
+def test_failed_batch_falls_back_to_single_texts():
+    provider = PoisonProvider()
+    texts = ["alpha", "poison pill", "beta", "gamma", "delta"]
+    embeddings = _embed_with(provider, texts, max_items=2)
+    print(f"Requests: {provider.requests}")
+    assert embeddings == [[5.0], [], [4.0], [5.0], [5.0]]
+    # Three batches, then the failed first batch again one text at a time
+    assert len(provider.requests) == 3 + 2
+    assert ["alpha"] in provider.requests and ["poison pill"] in provider.requests
+
+
+def test_inputs_are_cleaned_and_capped():
+    provider = PoisonProvider()
+    embeddings = _embed_with(provider, ["line one\nline two  ", "w" * 40000])
+    assert provider.requests == [["line one line two", "w" * indexing.EMBEDDING_MAX_INPUT_CHARS]]
+    assert embeddings == [[17.0], [float(indexing.EMBEDDING_MAX_INPUT_CHARS)]]
+
+
+if __name__ == "__main__":
+    print("Testing Embedding Batches\n")
+    print("=" * 80)
+    for test in (test_batches_respect_token_and_item_limits,
+                 test_oversized_text_gets_its_own_batch,
+                 test_failed_batch_falls_back_to_single_texts,
+                 test_inputs_are_cleaned_and_capped):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
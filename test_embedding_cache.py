@@ -0,0 +1,105 @@
+"""Test the embedding cache tiers: LRU eviction, SQLite hits and size limits"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import tempfile
+import time
+
+from src.search.embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-3-small"
+
+
+def _vector(seed, dimensions=8):
+    return [float(seed + i) for i in range(dimensions)]
+
+
+def test_least_recently_used_entry_leaves_memory_first():
+    cache = EmbeddingCache(db_path=None, memory_items=2)
+    cache.put("a", MODEL, _vector(1))
+    cache.put("b", MODEL, _vector(2))
+    assert cache.get("a", MODEL) == _vector(1)
+    # "b" is now the least recently used
+    cache.put("c", MODEL, _vector(3))
+
+    assert cache.get("b", MODEL) is None
+    assert cache.get("a", MODEL) == _vector(1)
+    assert cache.get("c", MODEL) == _vector(3)
+    stats = cache.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['memory_items'] == 2
+    assert (stats['memory_hits'], stats['misses']) == (3, 1)
+
+
+def test_sqlite_tier_serves_entries_after_restart():
+    path = os.path.join(tempfile.mkdtemp(), "embedding_cache.db")
+    first = EmbeddingCache(db_path=path, memory_items=1)
+    first.put("Who is the CEO?", MODEL, _vector(1))
+    first.put("Who is the CTO?", MODEL, _vector(2))
+    # Pushed out of memory by the second entry, still on disk
+    assert first.get("who is the  ceo?", MODEL) == _vector(1)
+    assert first.get_stats()['disk_hits'] == 1
+
+    restarted = EmbeddingCache(db_path=path)
+    assert restarted.get("Who is the CTO?", MODEL) == _vector(2)
+    assert restarted.get("Who is the CTO?", MODEL) == _vector(2)
+    assert restarted.get("Who is the CTO?", "another-model") is None
+    stats = restarted.get_stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_sqlite_tier_drops_least_recently_used_over_its_limit():
+    path = os.path.join(tempfile.mkdtemp(), "embedding_cache.db")
+    probe = EmbeddingCache(db_path=path)
+    probe.put("probe", MODEL, _vector(0))
+    entry_bytes = probe.get_stats()['disk_bytes']
+    probe.clear()
+
+    cache = EmbeddingCache(db_path=path, memory_items=1, max_bytes=entry_bytes * 3)
+    for i in range(3):
+        cache.put(f"text {i}", MODEL, _vector(i))
+        # Distinct last_used times, so the eviction order is certain
+        time.sleep(0.01)
+    # Reading "text 0" makes "text 1" the oldest on disk
+    assert cache.get("text 0", MODEL) == _vector(0)
+    time.sleep(0.01)
+    cache.put("text 3", MODEL, _vector(3))
+
+    stats = cache.get_stats()
+    print(f"Stats: {stats}")
+    assert stats['evictions'] >= 1
+    assert stats['disk_bytes'] <= entry_bytes * 3
+    restarted = EmbeddingCache(db_path=path, max_bytes=entry_bytes * 3)
+    assert restarted.get("text 1", MODEL) is None
+    assert restarted.get("text 0", MODEL) == _vector(0)
+    assert restarted.get("text 3", MODEL) == _vector(3)
+
+
+def test_callers_cannot_change_cached_entries():
+    path = os.path.join(tempfile.mkdtemp(), "embedding_cache.db")
+    cache = EmbeddingCache(db_path=path, memory_items=4)
+    stored = _vector(1)
+    cache.put("a", MODEL, stored)
+    stored[0] = 99.0
+
+    for _ in range(2):
+        # First from memory, then from disk after memory is cleared
+        returned = cache.get("a", MODEL)
+        assert returned == _vector(1)
+        returned[0] = -1.0
+        returned.append(0.0)
+        assert cache.get("a", MODEL) == _vector(1)
+        cache._memory.clear()
+
+
+if __name__ == "__main__":
+    print("Testing Embedding Cache Tiers\n")
+    print("=" * 80)
+    for test in (test_least_recently_used_entry_leaves_memory_first,
+                 test_sqlite_tier_serves_entries_after_restart,
+                 test_sqlite_tier_drops_least_recently_used_over_its_limit,
+                 test_callers_cannot_change_cached_entries):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,118 @@
+"""Test embedding request timeouts, the concurrency limit and the query retry budget"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: fake providers, no API calls
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+
+import threading
+import time
+import types
+
+from src.search.async_embedding_client import AsyncEmbeddingClient
+from src.search.embedding_providers import EmbeddingProvider, OpenAIEmbeddingProvider
+
+
+class SlowProvider(EmbeddingProvider):
+    """Times out every request after `delay` seconds, counting requests in flight"""
+
+    def __init__(self, delay=0.05, error=None):
+        super().__init__("slow")
+        self.delay = delay
+        self.error = error or TimeoutError("request timed out")
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts, timeout=None):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.calls.append((threading.current_thread(), timeout))
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        raise self.error
+
+
+def _client(provider, **kwargs):
+    client = AsyncEmbeddingClient(backoff_base=0.01, backoff_max=0.02, **kwargs)
+    client.provider = provider
+    return client
+
+
+def test_timeouts_stay_within_concurrency_limit():
+    provider = SlowProvider()
+    client = _client(provider, max_concurrency=2, max_retries=2, timeout=0.05)
+    results = client.embed_batches_sync([[f"text {i}"] for i in range(6)])
+    print(f"Requests: {len(provider.calls)}, peak in flight: {provider.peak}")
+    assert results == [[]] * 6
+    assert len(provider.calls) == 6 * 3
+    assert provider.peak <= 2
+    # The provider gets the timeout, so the HTTP call itself is bounded
+    assert all(timeout == 0.05 for _, timeout in provider.calls)
+
+
+def test_query_uses_short_budget_on_calling_thread():
+    provider = SlowProvider(delay=0.01)
+    client = _client(provider, max_retries=6, query_max_retries=1, query_timeout=2.0)
+    start = time.perf_counter()
+    assert client.embed_query("who is the ceo") == []
+    elapsed = time.perf_counter() - start
+    print(f"Query attempts: {len(provider.calls)} in {elapsed:.2f}s")
+    assert len(provider.calls) == 2
+    assert elapsed < 1.0
+    assert all(thread is threading.current_thread() and timeout == 2.0 for thread, timeout in provider.calls)
+
+
+def test_query_gives_up_on_long_retry_after():
+    error = Exception("rate limited")
+    error.status_code = 429
+    error.response = types.SimpleNamespace(headers={'retry-after': '30'})
+    provider = SlowProvider(delay=0.0, error=error)
+    client = _client(provider, query_max_retries=3)
+    start = time.perf_counter()
+    assert client.embed_query("who is the ceo") == []
+    assert len(provider.calls) == 1
+    assert time.perf_counter() - start < 1.0
+
+
+def test_openai_provider_passes_timeout_and_disables_sdk_retries():
+    provider = OpenAIEmbeddingProvider("text-embedding-3-small")
+    assert provider._get_client().max_retries == 0
+
+    sent = {}
+
+    def create(**kwargs):
+        sent.update(kwargs)
+        return types.SimpleNamespace(data=[types.SimpleNamespace(index=0, embedding=[1.0, 0.0])])
+
+    provider._client = types.SimpleNamespace(embeddings=types.SimpleNamespace(create=create))
+    assert provider.embed(["hello"], timeout=3.0) == [[1.0, 0.0]]
+    assert sent['timeout'] == 3.0
+
+
+def test_incomplete_provider_fails_on_creation():
+    class Incomplete(EmbeddingProvider):
+        pass
+
+    try:
+        Incomplete("incomplete")
+    except TypeError:
+        return
+    raise AssertionError("a provider without embed() was created")
+
+
+if __name__ == "__main__":
+    print("Testing Embedding Client Limits\n")
+    print("=" * 80)
+    for test in (test_timeouts_stay_within_concurrency_limit,
+                 test_query_uses_short_budget_on_calling_thread,
+                 test_query_gives_up_on_long_retry_after,
+                 test_openai_provider_passes_timeout_and_disables_sdk_retries,
+                 test_incomplete_provider_fails_on_creation):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,105 @@
+"""Test embedding provider configuration and reduced-dimension local models"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import subprocess
+import sys
+import tempfile
+import types
+
+import numpy as np
+
+from src.search import embedding_providers
+from src.search.embedding_providers import SentenceTransformerProvider, projection_path
+from src.search.reduce_dimensions import fit_pca
+
+FULL_DIMENSIONS = 16
+
+
+class RecordingModel:
+    """Stands in for a sentence-transformers model, remembering the name it was loaded with"""
+
+    loaded = []
+
+    def __init__(self, name, device=None):
+        self.loaded.append(name)
+
+    def encode(self, texts, **kwargs):
+        rng = np.random.default_rng(len(texts))
+        vectors = rng.standard_normal((len(texts), FULL_DIMENSIONS)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_blank_embedding_dimensions_means_full_size():
+    # .env.example ships EMBEDDING_DIMENSIONS= with no value
+    for value in ("", "  "):
+        env = dict(os.environ, EMBEDDING_DIMENSIONS=value)
+        result = subprocess.run(
+            [sys.executable, "-c", "from src.search.embedding_providers import EMBEDDING_DIMENSIONS as d; print(d)"],
+            env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "None"
+
+
+def test_dotenv_settings_apply_to_search_modules():
+    # A .env choosing the hashing provider, with no OpenAI key anywhere
+    script = (
+        "import os, dotenv\n"
+        "dotenv.load_dotenv = lambda *a, **k: os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')\n"
+        "import vector_db\n"
+        "from src.search.embedding_providers import EMBEDDING_PROVIDER\n"
+        "print(EMBEDDING_PROVIDER, vector_db.EMBEDDING_MODEL)\n"
+    )
+    env = {key: value for key, value in os.environ.items()
+           if key not in ('EMBEDDING_PROVIDER', 'OPENAI_API_KEY')}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["hashing", "hashing-384"]
+
+
+def test_local_provider_with_dimension_suffix_loads_base_model():
+    directory = tempfile.mkdtemp()
+    original_dir = embedding_providers.PROJECTION_DIR
+    embedding_providers.PROJECTION_DIR = directory
+
+    sample = np.random.default_rng(0).standard_normal((64, FULL_DIMENSIONS)).astype(np.float32)
+    mean, components = fit_pca(sample, 4)
+    np.savez(projection_path("all-MiniLM-L6-v2", 4), mean=mean, components=components)
+
+    fakes = {
+        'sentence_transformers': types.SimpleNamespace(SentenceTransformer=RecordingModel),
+        'torch': types.SimpleNamespace(set_num_threads=lambda threads: None),
+    }
+    saved = {name: sys.modules.get(name) for name in fakes}
+    sys.modules.update(fakes)
+    try:
+        provider = embedding_providers._create_provider("local", "all-MiniLM-L6-v2@4")
+        assert isinstance(provider, SentenceTransformerProvider)
+        assert provider.model == "all-MiniLM-L6-v2@4"
+
+        vectors = provider.embed(["chief technology officer", "head of sales"])
+        print(f"Loaded {RecordingModel.loaded[-1]!r}, vectors of {len(vectors[0])}")
+        assert RecordingModel.loaded[-1] == "all-MiniLM-L6-v2"
+        assert [len(vector) for vector in vectors] == [4, 4]
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    finally:
+        embedding_providers.PROJECTION_DIR = original_dir
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+if __name__ == "__main__":
+    print("Testing Embedding Providers\n")
+    print("=" * 80)
+    for test in (test_blank_embedding_dimensions_means_full_size,
+                 test_dotenv_settings_apply_to_search_modules,
+                 test_local_provider_with_dimension_suffix_loads_base_model):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,126 @@
+"""Test that filtered searches apply the filter before the top-k"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import importlib.util
+import sys
+import tempfile
+import types
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import numpy as np
+import pytest
+
+from src.search import indexing, vector_index
+from src.search.ann_backends import create_backend, normalize_rows
+from src.search.vector_index import VectorIndex
+
+BACKENDS = ["exact", "int8", "float16"]
+if importlib.util.find_spec("faiss") is not None:
+    BACKENDS += ["flat", "hnsw"]
+
+
+def _skewed_index(backend):
+    """500 Technology rows close to the query, and 3 Finance rows far from it"""
+    rng = np.random.default_rng(3)
+    query = rng.standard_normal(32).astype(np.float32)
+    near = query + 0.1 * rng.standard_normal((500, 32)).astype(np.float32)
+    far = rng.standard_normal((3, 32)).astype(np.float32)
+    matrix = np.vstack([near, far])
+    ids = np.arange(len(matrix))
+    departments = ['Technology'] * 500 + ['Finance'] * 3
+    built = create_backend(backend)
+    built.build(normalize_rows(matrix))
+    index = VectorIndex(ids, matrix, backend=built, metadata={'department': departments})
+    return index, query, matrix
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("exact_max", [20000, 0])
+def test_filter_finds_the_few_matches_outside_the_top_k(backend, exact_max):
+    index, query, matrix = _skewed_index(backend)
+    original = vector_index.VECTOR_FILTER_EXACT_MAX
+    # 0 sends even small filtered sets to the backend instead of scoring them directly
+    vector_index.VECTOR_FILTER_EXACT_MAX = exact_max
+    try:
+        unfiltered = index.search(query, k=5)
+        results = index.search(query, k=5, filters={'department': 'Finance'})
+    finally:
+        vector_index.VECTOR_FILTER_EXACT_MAX = original
+
+    print(f"{backend} (exact max {exact_max}): {results}")
+    assert all(item_id < 500 for item_id, _ in unfiltered)
+    expected = np.argsort(-(normalize_rows(matrix[500:]) @ (query / np.linalg.norm(query)))) + 500
+    assert [item_id for item_id, _ in results] == expected.tolist()
+    assert index.search(query, k=5, filters={'department': 'Sales'}) == []
+
+
+class FakeSession:
+    """Returns fixed SearchIndex rows for the indexer's query"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *columns):
+        rows = self.rows
+
+        class Query:
+            def filter(self, *conditions):
+                return self
+
+            def all(self):
+                return rows
+
+        return Query()
+
+    def close(self):
+        pass
+
+
+def test_knowledge_index_keeps_the_common_dimension():
+    rng = np.random.default_rng(4)
+    rows = [(item_id, rng.standard_normal(16).tolist(), ('faq', 'policy')[item_id % 2])
+            for item_id in range(1, 21)]
+    # One leftover from another model, last in the table
+    rows.append((99, rng.standard_normal(8).tolist(), 'faq'))
+
+    models = types.ModuleType("database.models")
+    models.SearchIndex = types.SimpleNamespace(knowledge_item_id=None, embedding=None, scope=None)
+    sys.modules['database.models'] = models
+    cwd = os.getcwd()
+    os.chdir(TMP)
+    try:
+        indexer = indexing.ContentIndexer(
+            types.SimpleNamespace(get_session=lambda: FakeSession(rows)),
+            types.SimpleNamespace(model_name=indexing.EMBEDDING_MODEL))
+        index = indexer.build_vector_index()
+    finally:
+        sys.modules.pop('database.models', None)
+        os.chdir(cwd)
+
+    assert index.dimension == 16 and len(index) == 20
+    assert 99 not in index.ids
+    query = np.asarray(rows[2][1], dtype=np.float32)
+    results = index.search(query, k=3, filters={'scope': 'policy'})
+    assert results[0][0] == 3
+    assert all(item_id % 2 == 1 for item_id, _ in results)
+
+
+if __name__ == "__main__":
+    print("Testing Filtered Vector Search\n")
+    print("=" * 80)
+    for backend in BACKENDS:
+        for exact_max in (20000, 0):
+            print(f"\n[test_filter_finds_the_few_matches_outside_the_top_k ({backend}, {exact_max})]")
+            print("-" * 80)
+            test_filter_finds_the_few_matches_outside_the_top_k(backend, exact_max)
+            print("Result: ✅ PASS")
+    print("\n[test_knowledge_index_keeps_the_common_dimension]")
+    print("-" * 80)
+    test_knowledge_index_keeps_the_common_dimension()
+    print("Result: ✅ PASS")
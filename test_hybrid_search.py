@@ -0,0 +1,96 @@
+"""Test hybrid keyword + vector retrieval and the rank fusion behind it"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import tempfile
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import vector_db
+from database import init_database, insert_profiles
+from src.search.fusion import fuse_rankings
+
+DB_PATH = os.path.join(TMP, "profiles.db")
+init_database(DB_PATH)
+insert_profiles([
+    {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'bio': 'Jane leads engineering, platform and infrastructure teams.'},
+    {'name': 'Raj Patel', 'role': 'Chief Financial Officer', 'department': 'Finance',
+     'bio': 'Raj oversees finance, accounting and investor relations.'},
+    {'name': 'Ana Lopez', 'role': 'Head of Marketing', 'department': 'Marketing',
+     'bio': 'Ana runs brand, communications and growth marketing.'},
+    {'name': 'Siobhan Okonkwo', 'role': 'Analyst', 'department': 'Finance',
+     'bio': 'Works on quarterly reporting.'},
+    {'name': 'Tom Berg', 'role': 'Engineering Manager', 'department': 'Technology',
+     'bio': 'Tom manages the platform engineering team.'},
+], DB_PATH)
+vector_db.update_vector_database(DB_PATH)
+
+KEYWORD = [(1, 9.0), (2, 5.0), (3, 1.0)]
+VECTOR = [(2, 0.9), (4, 0.8), (1, 0.7)]
+
+
+def test_rrf_rewards_agreement_and_ignores_scores():
+    fused = fuse_rankings([KEYWORD, VECTOR], method="rrf")
+    print(f"RRF: {fused}")
+    # 2 is near the top of both lists, 4 and 3 appear in one list only
+    assert [item_id for item_id, _ in fused] == [2, 1, 4, 3]
+
+    rescaled = fuse_rankings([[(i, s * 1000) for i, s in KEYWORD], [(i, s / 1000) for i, s in VECTOR]], method="rrf")
+    assert rescaled == fused
+
+
+def test_rrf_weights_favour_a_retriever():
+    fused = fuse_rankings([KEYWORD, VECTOR], method="rrf", weights=[3.0, 1.0])
+    assert [item_id for item_id, _ in fused][:2] == [1, 2]
+
+
+def test_weighted_fusion_normalizes_scores():
+    fused = dict(fuse_rankings([KEYWORD, VECTOR], method="weighted"))
+    # Top of one list (1.0) + bottom of the other (0.0)
+    assert abs(fused[1] - 1.0) < 1e-9
+    assert abs(fused[3] - 0.0) < 1e-9
+
+
+def test_exact_name_ranks_first():
+    results = vector_db.hybrid_search_profiles("Siobhan Okonkwo", limit=3, db_path=DB_PATH)
+    print(f"Results: {[(p['name'], round(p['hybrid_score'], 4)) for p in results]}")
+    assert results[0]['name'] == 'Siobhan Okonkwo'
+    assert 'hybrid_score' in results[0]
+
+
+def test_department_filter_and_failed_retriever():
+    results = vector_db.hybrid_search_profiles("platform engineering", limit=5, db_path=DB_PATH,
+                                               department='Technology')
+    assert results and {p['department'] for p in results} == {'Technology'}
+
+    original = vector_db.vector_search_ids
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("embedding API down")
+
+    vector_db.vector_search_ids = unavailable
+    try:
+        results = vector_db.hybrid_search_profiles("Okonkwo", limit=3, db_path=DB_PATH)
+    finally:
+        vector_db.vector_search_ids = original
+    # The keyword ranking is used on its own
+    assert [p['name'] for p in results] == ['Siobhan Okonkwo']
+
+
+if __name__ == "__main__":
+    print("Testing Hybrid Search\n")
+    print("=" * 80)
+    for test in (test_rrf_rewards_agreement_and_ignores_scores,
+                 test_rrf_weights_favour_a_retriever,
+                 test_weighted_fusion_normalizes_scores,
+                 test_exact_name_ranks_first,
+                 test_department_filter_and_failed_retriever):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,80 @@
+"""Test that re-indexing only embeds new or changed profiles"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import sqlite3
+import tempfile
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import vector_db
+from database import init_database, insert_profiles
+
+PROFILES = [
+    {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'bio': 'Jane leads engineering, platform and infrastructure teams.'},
+    {'name': 'Raj Patel', 'role': 'Chief Financial Officer', 'department': 'Finance',
+     'bio': 'Raj oversees finance, accounting and investor relations.'},
+    {'name': 'Ana Lopez', 'role': 'Head of Marketing', 'department': 'Marketing',
+     'bio': 'Ana runs brand, communications and growth marketing.'},
+]
+
+
+def _embedded_texts(update):
+    """Run update() and return the texts sent for embedding"""
+    sent = []
+    original = vector_db.create_embeddings_batch
+
+    def counting(texts, model=vector_db.EMBEDDING_MODEL):
+        sent.extend(texts)
+        return original(texts, model)
+
+    vector_db.create_embeddings_batch = counting
+    try:
+        stats = update()
+    finally:
+        vector_db.create_embeddings_batch = original
+    return stats, sent
+
+
+def test_unchanged_profiles_are_skipped():
+    db_path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    init_database(db_path)
+    insert_profiles(PROFILES, db_path)
+
+    stats, sent = _embedded_texts(lambda: vector_db.update_vector_database(db_path))
+    print(f"First run: {stats}")
+    assert (stats['embedded'], stats['skipped']) == (3, 0)
+    assert len(sent) == 3
+
+    stats, sent = _embedded_texts(lambda: vector_db.update_vector_database(db_path))
+    print(f"Second run: {stats}")
+    assert (stats['embedded'], stats['skipped']) == (0, 3)
+    assert sent == []
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE profiles SET bio = 'Raj now also runs procurement.' WHERE name = 'Raj Patel'")
+    conn.commit()
+    conn.close()
+    stats, sent = _embedded_texts(lambda: vector_db.update_vector_database(db_path))
+    print(f"After one edit: {stats}")
+    assert (stats['embedded'], stats['skipped']) == (1, 2)
+    assert len(sent) == 1 and "procurement" in sent[0]
+
+    stats, sent = _embedded_texts(lambda: vector_db.update_vector_database(db_path, force=True))
+    assert (stats['embedded'], stats['skipped']) == (3, 0)
+    assert len(sent) == 3
+
+
+if __name__ == "__main__":
+    print("Testing Incremental Embedding Updates\n")
+    print("=" * 80)
+    for test in (test_unchanged_profiles_are_skipped,):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,90 @@
+"""Test that the compiled intent classifier agrees with the old keyword scans"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import random
+import re
+import time
+
+from src.search.intent_classifier import (
+    EXTERNAL_COMPANIES, GENERAL_KEYWORDS, OUT_OF_SCOPE_PATTERNS, SINGLE_PERSON_KEYWORDS,
+    SINGULAR_ROLE_KEYWORDS, TEAM_KEYWORDS, VOCABULARIES, QueryIntent, classify_query
+)
+
+QUERIES = [
+    "Who is the CEO?",
+    "Tell me about the head of marketing",
+    "List all members of the technology team",
+    "What does Google do?",
+    "What's the weather like in London tomorrow?",
+    "Show me the people in finance",
+    "Can you describe the Chief Financial Officer's background and responsibilities?",
+    "picture of the president",
+    "How do I write a python program to sort a list?",
+    "Which department is Sarah in and what is her email address?",
+    "whoever leads the membership drive",
+    "metadata about facebook and meta",
+    "",
+]
+
+
+def legacy_classify(query):
+    """The separate any(k in text) scans the classifier replaced"""
+    query_lower = query.lower()
+    team = any(keyword in query_lower for keyword in TEAM_KEYWORDS)
+    return QueryIntent(
+        team=team,
+        out_of_scope=not team and any(re.search(pattern, query_lower) for pattern in OUT_OF_SCOPE_PATTERNS),
+        external_company=next((c for c in EXTERNAL_COMPANIES if c in query_lower), None),
+        single_person=any(keyword in query_lower for keyword in SINGLE_PERSON_KEYWORDS),
+        general=any(keyword in query_lower for keyword in GENERAL_KEYWORDS),
+        singular_role=any(keyword in query_lower for keyword in SINGULAR_ROLE_KEYWORDS),
+    )
+
+
+def _fuzz_queries(count=3000, seed=0):
+    """Random run-together fragments of the vocabularies, to hit overlapping keywords"""
+    rng = random.Random(seed)
+    words = [keyword for vocabulary in VOCABULARIES.values() for keyword in vocabulary]
+    words += ['weather', 'python', 'movie', 'the', 'of', 'x', 'ab', 'ship', 's']
+    queries = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 5)):
+            word = rng.choice(words)
+            if rng.random() < 0.3:
+                # Cut keywords apart so prefixes and suffixes meet
+                cut = rng.randint(0, len(word))
+                word = word[:cut] if rng.random() < 0.5 else word[cut:]
+            parts.append(word.upper() if rng.random() < 0.1 else word)
+        queries.append(rng.choice(["", " "]).join(parts))
+    return queries
+
+
+def test_matches_old_scans_on_sample_queries():
+    for query in QUERIES:
+        assert classify_query(query) == legacy_classify(query), query
+
+
+def test_matches_old_scans_on_fuzzed_queries():
+    for query in _fuzz_queries():
+        assert classify_query.__wrapped__(query) == legacy_classify(query), query
+
+
+if __name__ == "__main__":
+    print("Testing Intent Classifier\n")
+    print("=" * 80)
+    for test in (test_matches_old_scans_on_sample_queries, test_matches_old_scans_on_fuzzed_queries):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
+
+    # Uncached timing, per query
+    repeat = 2000
+    for name, classify in (("keyword scans", legacy_classify), ("compiled regex", classify_query.__wrapped__)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in QUERIES:
+                classify(query)
+        print(f"  {name:14s} {(time.perf_counter() - start) * 1e6 / (repeat * len(QUERIES)):.2f} us/query")
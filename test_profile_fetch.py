@@ -0,0 +1,58 @@
+"""Test that full profile rows come back in the order of the vector matches"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import tempfile
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import vector_db
+from database import init_database, insert_profiles, get_profiles_by_ids
+
+DB_PATH = os.path.join(TMP, "profiles.db")
+init_database(DB_PATH)
+insert_profiles([
+    {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'bio': 'Jane leads engineering, platform and infrastructure teams.'},
+    {'name': 'Raj Patel', 'role': 'Chief Financial Officer', 'department': 'Finance',
+     'bio': 'Raj oversees finance, accounting and investor relations.'},
+    {'name': 'Ana Lopez', 'role': 'Head of Marketing', 'department': 'Marketing',
+     'bio': 'Ana runs brand, communications and growth marketing.'},
+    {'name': 'Tom Berg', 'role': 'Engineering Manager', 'department': 'Technology',
+     'bio': 'Tom manages the platform engineering team.'},
+], DB_PATH)
+
+
+def test_rows_follow_the_requested_order():
+    names = {1: 'Jane Doe', 2: 'Raj Patel', 3: 'Ana Lopez', 4: 'Tom Berg'}
+    for ids in ([3, 1, 4, 2], [4, 3, 2, 1], [2]):
+        assert [p['name'] for p in get_profiles_by_ids(ids, db_path=DB_PATH)] == [names[i] for i in ids]
+    # Missing IDs are left out without disturbing the rest
+    assert [p['id'] for p in get_profiles_by_ids([4, 99, 1], db_path=DB_PATH)] == [4, 1]
+    assert get_profiles_by_ids([], db_path=DB_PATH) == []
+
+
+def test_search_results_keep_similarity_order():
+    vector_db.update_vector_database(DB_PATH)
+    for query in ("platform engineering", "finance and accounting", "brand marketing"):
+        matches = vector_db.vector_search_ids(query, limit=4, db_path=DB_PATH)
+        results = vector_db.vector_search_profiles(query, limit=4, db_path=DB_PATH)
+        print(f"{query}: {[(p['name'], round(p['similarity'], 3)) for p in results]}")
+        assert [p['id'] for p in results] == [profile_id for profile_id, _ in matches]
+        similarities = [p['similarity'] for p in results]
+        assert similarities == sorted(similarities, reverse=True)
+
+
+if __name__ == "__main__":
+    print("Testing Profile Fetch Order\n")
+    print("=" * 80)
+    for test in (test_rows_follow_the_requested_order,
+                 test_search_results_keep_similarity_order):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
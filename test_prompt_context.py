@@ -0,0 +1,125 @@
+"""Test that the prompt context fits its token budget, with and without tiktoken"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import contextlib
+import re
+
+import pytest
+
+from src.search import prompt_context
+from src.search.prompt_context import build_profile_context, count_tokens
+
+BIO = " ".join(f"Led project {i} across several regions and delivered measurable growth." for i in range(40))
+PROFILES = [
+    {'name': f'Person {i}', 'role': 'Director', 'department': 'Operations',
+     'contact': f'person{i}@example.com', 'bio': BIO}
+    for i in range(8)
+]
+
+
+class WordEncoding:
+    """Reversible word-level tokenizer standing in for a tiktoken encoding"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.words = []
+
+    def encode(self, text):
+        tokens = []
+        for piece in re.findall(r"\s*\S+|\s+", text):
+            if piece not in self.vocab:
+                self.vocab[piece] = len(self.words)
+                self.words.append(piece)
+            tokens.append(self.vocab[piece])
+        return tokens
+
+    def decode(self, tokens):
+        return "".join(self.words[token] for token in tokens)
+
+
+@contextlib.contextmanager
+def _tokenizer(mode):
+    """Count tokens by estimate, with an encoding object, or with the real tiktoken"""
+    original_tiktoken, original_encoding = prompt_context.tiktoken, prompt_context._encoding
+    original_encoding.cache_clear()
+    if mode == "estimate":
+        prompt_context.tiktoken = None
+    elif mode == "encoding":
+        encoding = WordEncoding()
+        prompt_context._encoding = lambda model: encoding
+    elif prompt_context.tiktoken is None or prompt_context._encoding("gpt-3.5-turbo") is None:
+        pytest.skip("tiktoken or its encoding files are not available")
+    try:
+        yield
+    finally:
+        prompt_context.tiktoken, prompt_context._encoding = original_tiktoken, original_encoding
+        original_encoding.cache_clear()
+
+
+MODES = ["estimate", "encoding", "tiktoken"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_context_stays_within_budget(mode):
+    with _tokenizer(mode):
+        for budget in (60, 150, 400, 1200):
+            context, stats = build_profile_context(PROFILES, budget)
+            print(f"{mode} budget {budget}: {stats}")
+            assert count_tokens(context) <= budget
+            assert stats['tokens'] <= budget
+            assert stats['included'] + stats['omitted'] == len(PROFILES)
+            # Most relevant first
+            assert context.startswith("Person 1: Person 0\n")
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_bios_are_cut_to_fit(mode):
+    with _tokenizer(mode):
+        context, stats = build_profile_context(PROFILES[:1], 120)
+        assert "Background: Led project 0" in context
+        assert "..." in context and BIO not in context
+        assert stats['truncated'] == 1
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_summary_stands_in_for_bio(mode):
+    summary = "Runs operations in Europe and Asia."
+    with _tokenizer(mode):
+        context, _ = build_profile_context([dict(PROFILES[0], summary=summary)], 400)
+        assert f"Background: {summary}\n" in context
+        assert "Led project" not in context
+
+
+def test_unloadable_encoding_falls_back_to_estimate():
+    class Offline:
+        @staticmethod
+        def encoding_for_model(model):
+            raise ConnectionError("encoding download failed")
+
+    original = prompt_context.tiktoken
+    prompt_context._encoding.cache_clear()
+    prompt_context.tiktoken = Offline
+    try:
+        assert count_tokens("abcdefgh") == 2
+    finally:
+        prompt_context.tiktoken = original
+        prompt_context._encoding.cache_clear()
+
+
+if __name__ == "__main__":
+    print("Testing Prompt Context Budget\n")
+    print("=" * 80)
+    for test in (test_context_stays_within_budget, test_bios_are_cut_to_fit, test_summary_stands_in_for_bio):
+        for mode in MODES:
+            print(f"\n[{test.__name__} ({mode})]")
+            print("-" * 80)
+            try:
+                test(mode)
+                print("Result: ✅ PASS")
+            except pytest.skip.Exception as e:
+                print(f"Result: skipped ({e})")
+    print(f"\n[{test_unloadable_encoding_falls_back_to_estimate.__name__}]")
+    print("-" * 80)
+    test_unloadable_encoding_falls_back_to_estimate()
+    print("Result: ✅ PASS")
@@ -0,0 +1,66 @@
+"""Test structured questions answered from SQLite by the query router"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import sys
+import tempfile
+
+# The router must not need the scraper's dependencies to answer a chat question
+for module in ('requests', 'bs4', 'selenium', 'enhanced_scraper'):
+    sys.modules[module] = None
+
+from database import init_database, insert_profiles
+from src.search.photo_marker import PHOTO_MARKER, split_photo_marker
+from src.search.query_router import route_query
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "profiles.db")
+init_database(DB_PATH)
+insert_profiles([
+    {'name': 'Jane Doe', 'role': 'Chief Executive Officer', 'department': 'Executive',
+     'photo_url': 'https://example.com/jane.jpg'},
+    {'name': 'Raj Patel', 'role': 'Software Engineer', 'department': 'Technology'},
+    {'name': 'Ana Lopez', 'role': 'Engineering Manager', 'department': 'Technology'},
+], DB_PATH)
+
+
+def test_department_resolved_through_role_categories():
+    # "engineering" is not a department name; the synonym map sends it to Technology
+    routed = route_query("List the engineering team", DB_PATH)
+    print(routed.answer)
+    assert routed.intent == 'department'
+    assert sorted(routed.profile_ids) == [2, 3]
+
+
+def test_count_and_departments():
+    assert route_query("How many people are in Technology?", DB_PATH).answer == "There are 2 people in Technology."
+    assert route_query("what departments are there?", DB_PATH).intent == 'departments'
+
+
+def test_department_words_resolve_only_as_whole_phrases():
+    # "directors" contains "cto", which must not make it the Technology team
+    for query in ("Who are the directors?", "List the directors", "show me the board of directors",
+                  "list the doctors", "who are the contractors"):
+        assert route_query(query, DB_PATH) is None, query
+
+
+def test_title_answer_carries_photo_marker():
+    routed = route_query("Who is the CEO?", DB_PATH)
+    assert PHOTO_MARKER in routed.answer
+    assert split_photo_marker(routed.answer)[1] == 'https://example.com/jane.jpg'
+
+
+def test_open_questions_fall_through():
+    assert route_query("Who is the CTO?", DB_PATH) is None
+    assert route_query("What does Jane think about remote work?", DB_PATH) is None
+
+
+if __name__ == "__main__":
+    print("Testing Query Router\n")
+    print("=" * 80)
+    for test in (test_department_resolved_through_role_categories, test_count_and_departments,
+                 test_department_words_resolve_only_as_whole_phrases,
+                 test_title_answer_carries_photo_marker, test_open_questions_fall_through):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,88 @@
+"""Test that the resident vector index is reused until the profiles table changes"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches and index snapshots in a temporary directory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import sqlite3
+import tempfile
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(TMP, "embedding_cache.db"))
+os.environ.setdefault('VECTOR_INDEX_DIR', os.path.join(TMP, "embeddings"))
+
+import vector_db
+from database import init_database, insert_profiles
+from src.search.vector_index import ProfileVectorIndex
+
+PROFILES = [
+    {'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'bio': 'Jane leads engineering, platform and infrastructure teams.'},
+    {'name': 'Raj Patel', 'role': 'Chief Financial Officer', 'department': 'Finance',
+     'bio': 'Raj oversees finance, accounting and investor relations.'},
+]
+
+
+def _counting_index(db_path):
+    """Profile index that records each full load from SQLite"""
+    index = ProfileVectorIndex(db_path)
+    loads = []
+    original = index._load
+
+    def load(version):
+        loads.append(version)
+        return original(version)
+
+    index._load = load
+    return index, loads
+
+
+def _version(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT version FROM profiles_version WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_index_rebuilds_only_when_profiles_version_changes():
+    db_path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    init_database(db_path)
+    insert_profiles(PROFILES, db_path)
+    vector_db.update_vector_database(db_path)
+    query = vector_db.get_embedding("platform engineering")
+
+    index, loads = _counting_index(db_path)
+    first = index.refresh()
+    assert len(first) == 2
+    for _ in range(3):
+        index.search(query, k=2)
+    assert index.refresh() is first
+    assert loads == [_version(db_path)]
+
+    # A new embedded profile bumps the version and shows up in the next search
+    insert_profiles([{'name': 'Tom Berg', 'role': 'Engineering Manager', 'department': 'Technology',
+                      'bio': 'Tom manages the platform engineering team.'}], db_path)
+    vector_db.update_vector_database(db_path)
+    results = index.search(query, k=3)
+    print(f"Loads: {loads}, results: {results}")
+    assert len(loads) == 2 and loads[-1] == _version(db_path)
+    assert len(index.refresh()) == 3 and len(results) == 3
+
+    # Deleting a profile removes it without a restart
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM profiles WHERE name = 'Raj Patel'")
+    conn.commit()
+    conn.close()
+    assert len(index.refresh()) == 2
+    assert len(loads) == 3
+
+
+if __name__ == "__main__":
+    print("Testing Resident Vector Index\n")
+    print("=" * 80)
+    for test in (test_index_rebuilds_only_when_profiles_version_changes,):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
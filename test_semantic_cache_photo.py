@@ -0,0 +1,77 @@
+"""Test semantic cache hits: photo decision for the new wording, one embedding model per entry"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, caches kept in memory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import vector_db
+from src.search.answer_cache import AnswerCache
+from src.search.semantic_cache import SemanticAnswerCache
+
+PROFILES = [
+    {'id': 1, 'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'photo_url': 'https://example.com/jane.jpg'},
+    {'id': 2, 'name': 'Raj Patel', 'role': 'Engineering Manager', 'department': 'Technology',
+     'photo_url': 'https://example.com/raj.jpg'},
+]
+ANSWER = "Jane Doe leads the technology organization as Chief Technology Officer."
+
+
+def _use_memory_caches():
+    """Fresh in-memory caches, and one embedding for every question so paraphrases always hit"""
+    exact = AnswerCache(db_path=None)
+    semantic = SemanticAnswerCache(db_path=None, audit_rate=0.0)
+    vector_db.get_answer_cache = lambda: exact
+    vector_db.get_semantic_cache = lambda: semantic
+    vector_db.get_embedding = lambda text, model=vector_db.EMBEDDING_MODEL: [1.0, 0.0, 0.0]
+
+
+def _answer_for(cached_query, new_query):
+    """Cache an answer for one question, then look up a paraphrase of it"""
+    _use_memory_caches()
+    cached = ANSWER + vector_db._photo_marker(cached_query, ANSWER, PROFILES)
+    vector_db._store_answer(cached_query, PROFILES, cached)
+    return cached, vector_db._cached_answer(new_query, PROFILES)
+
+
+def test_general_then_single_person():
+    cached, served = _answer_for("list the technology leaders", "tell me about the technology leader")
+    print(f"Cached for general question has photo: {vector_db.PHOTO_MARKER in cached}")
+    print(f"Served for single-person paraphrase:   {served!r}")
+    assert vector_db.PHOTO_MARKER not in cached
+    assert served.endswith(f"{vector_db.PHOTO_MARKER}https://example.com/jane.jpg")
+
+
+def test_single_person_then_general():
+    cached, served = _answer_for("tell me about the technology leader", "list the technology leaders")
+    print(f"Cached for single-person question has photo: {vector_db.PHOTO_MARKER in cached}")
+    print(f"Served for general paraphrase:               {served!r}")
+    assert vector_db.PHOTO_MARKER in cached
+    assert served == ANSWER
+
+
+def test_streamed_hit_matches():
+    _answer_for("list the technology leaders", "tell me about the technology leader")
+    streamed = "".join(vector_db.stream_ai_answer("tell me about the technology leader", PROFILES))
+    assert streamed.endswith(f"{vector_db.PHOTO_MARKER}https://example.com/jane.jpg")
+
+
+def test_other_embedding_model_never_matches():
+    # Same size, same vector, different models: not comparable
+    cache = SemanticAnswerCache(db_path=None, audit_rate=0.0)
+    vector = [0.6, 0.8, 0.0]
+    cache.put("who is the cto", vector, "hashing-384", PROFILES, "gpt-3.5-turbo", ANSWER)
+    assert cache.get(vector, "all-MiniLM-L6-v2", PROFILES, "gpt-3.5-turbo") is None
+    assert cache.get(vector, "hashing-384@256", PROFILES, "gpt-3.5-turbo") is None
+    assert cache.get(vector, "hashing-384", PROFILES, "gpt-3.5-turbo").answer == ANSWER
+
+
+if __name__ == "__main__":
+    print("Testing Photo Decision on Semantic Cache Hits\n")
+    print("=" * 80)
+    for test in (test_general_then_single_person, test_single_person_then_general, test_streamed_hit_matches,
+                 test_other_embedding_model_never_matches):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
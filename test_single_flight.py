@@ -0,0 +1,149 @@
+"""Test that concurrent identical questions share one answer"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import threading
+import time
+
+from src.search.single_flight import FlightError, SingleFlight, question_key
+from src.services.chat_service import ChatService
+from src.services.knowledge_service import KnowledgeService
+
+CALLERS = 8
+
+
+def _wait_for_calls(group, calls, timeout=2.0):
+    """Block until `calls` callers have joined, so they all share the flight"""
+    deadline = time.monotonic() + timeout
+    while group.get_stats()['calls'] < calls:
+        assert time.monotonic() < deadline, "callers never joined"
+        time.sleep(0.005)
+
+
+def _run_callers(target, count=CALLERS):
+    """Start count threads together; return their results (or exceptions) in order"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def caller(slot):
+        barrier.wait()
+        try:
+            results[slot] = target()
+        except Exception as e:
+            results[slot] = e
+
+    threads = [threading.Thread(target=caller, args=(slot,)) for slot in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_answer():
+    group = SingleFlight(timeout=2.0)
+    release = threading.Event()
+    produced = []
+
+    def answer():
+        produced.append(1)
+        release.wait(2)
+        return "Jane Doe is the CTO."
+
+    threads, results = _run_callers(lambda: group.do(("who is the cto",), answer))
+    _wait_for_calls(group, CALLERS)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    print(f"Answers produced: {len(produced)}, stats: {group.get_stats()}")
+    assert len(produced) == 1
+    assert results == ["Jane Doe is the CTO."] * CALLERS
+    assert group.get_stats()['shared'] == CALLERS - 1
+    assert group.in_flight() == 0
+
+
+def test_late_joiner_replays_stream():
+    group = SingleFlight(timeout=2.0)
+    first_piece = threading.Event()
+    release = threading.Event()
+
+    def produce():
+        yield "Jane "
+        first_piece.set()
+        release.wait(2)
+        yield "Doe"
+
+    early = group.stream(("key",), produce)
+    assert next(early) == "Jane "
+    first_piece.wait(2)
+
+    # Joins after the first piece went out, and still gets all of it
+    late = group.stream(("key",), produce)
+    release.set()
+    assert "Jane " + "".join(early) == "Jane Doe"
+    assert "".join(late) == "Jane Doe"
+
+
+def test_failure_reaches_every_caller_as_its_own_error():
+    group = SingleFlight(timeout=2.0)
+    release = threading.Event()
+
+    def produce():
+        yield "partial "
+        release.wait(2)
+        raise ValueError("model unavailable")
+
+    def caller():
+        return "".join(group.stream(("key",), produce))
+
+    threads, results = _run_callers(caller)
+    _wait_for_calls(group, CALLERS)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert all(isinstance(result, FlightError) for result in results)
+    assert all(isinstance(result.__cause__, ValueError) for result in results)
+    assert len({id(result) for result in results}) == CALLERS
+    assert group.in_flight() == 0
+
+
+def test_follower_gives_up_after_timeout():
+    group = SingleFlight(timeout=0.1)
+    release = threading.Event()
+
+    def produce():
+        release.wait(2)
+        yield "too late"
+
+    group.stream(("key",), produce)
+    follower = group.stream(("key",), produce)
+    start = time.perf_counter()
+    try:
+        next(follower)
+        raise AssertionError("follower did not time out")
+    except TimeoutError:
+        pass
+    finally:
+        release.set()
+    assert time.perf_counter() - start < 1.0
+
+
+def test_services_do_not_share_flights():
+    message = "Who is the CTO?"
+    keys = {ChatService()._flight_key(message, None), KnowledgeService()._flight_key(message, None),
+            question_key(message, "chat_app", "data/leadership.db", None)}
+    assert len(keys) == 3
+
+
+if __name__ == "__main__":
+    print("Testing Single-Flight Answers\n")
+    print("=" * 80)
+    for test in (test_concurrent_calls_share_one_answer,
+                 test_late_joiner_replays_stream,
+                 test_failure_reaches_every_caller_as_its_own_error,
+                 test_follower_gives_up_after_timeout,
+                 test_services_do_not_share_flights):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
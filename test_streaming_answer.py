@@ -0,0 +1,124 @@
+"""Test that streamed answers match the stored answer and end cleanly on errors"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings, fake chat model, caches kept in memory
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import contextlib
+import tempfile
+import types
+
+os.environ.setdefault('EMBEDDING_CACHE_PATH', os.path.join(tempfile.mkdtemp(), "embedding_cache.db"))
+
+import vector_db
+from src.search.answer_cache import AnswerCache
+from src.search.semantic_cache import SemanticAnswerCache
+from src.services.chat_service import ChatService
+
+PROFILES = [
+    {'id': 1, 'name': 'Jane Doe', 'role': 'Chief Technology Officer', 'department': 'Technology',
+     'photo_url': 'https://example.com/jane.jpg'},
+    {'id': 2, 'name': 'Raj Patel', 'role': 'Engineering Manager', 'department': 'Technology'},
+]
+QUERY = "Tell me about the CTO"
+# What the model sends, whitespace and empty deltas included
+DELTAS = ["", "\n ", " Jane", " Doe", " is the", " CTO.", "\n\n", "", "  ", "\n"]
+
+
+def _chunk(content):
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=content))])
+
+
+def _fake_openai(deltas, fail_after=None):
+    """An openai module whose chat model answers with deltas, streamed or whole"""
+    def create(stream=False, **kwargs):
+        if not stream:
+            message = types.SimpleNamespace(content="".join(deltas))
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+        def chunks():
+            for index, delta in enumerate(deltas):
+                if index == fail_after:
+                    raise ConnectionError("stream dropped")
+                yield _chunk(delta)
+        return chunks()
+
+    return types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+
+
+@contextlib.contextmanager
+def _offline(deltas, fail_after=None):
+    """Fake chat model and fresh in-memory caches, restored afterwards"""
+    exact = AnswerCache(db_path=None)
+    semantic = SemanticAnswerCache(db_path=None, audit_rate=0.0)
+    patches = {
+        'openai': _fake_openai(deltas, fail_after),
+        'get_answer_cache': lambda: exact,
+        'get_semantic_cache': lambda: semantic,
+    }
+    saved = {name: getattr(vector_db, name) for name in patches}
+    for name, value in patches.items():
+        setattr(vector_db, name, value)
+    try:
+        yield exact
+    finally:
+        for name, value in saved.items():
+            setattr(vector_db, name, value)
+
+
+def test_stream_equals_stored_and_generated_answer():
+    with _offline(DELTAS) as cache:
+        pieces = list(vector_db.stream_ai_answer(QUERY, PROFILES))
+        stored = cache.get(QUERY, PROFILES, vector_db.ANSWER_MODEL)
+    with _offline(DELTAS):
+        generated = vector_db.generate_ai_answer(QUERY, PROFILES)
+
+    print(f"Pieces: {pieces!r}")
+    assert all(pieces)
+    assert "".join(pieces) == stored == generated
+    assert stored.startswith("Jane Doe is the CTO.\n\n" + vector_db.PHOTO_MARKER)
+
+
+def test_cached_stream_equals_first_stream():
+    with _offline(DELTAS):
+        first = "".join(vector_db.stream_ai_answer(QUERY, PROFILES))
+        again = list(vector_db.stream_ai_answer(QUERY, PROFILES))
+    assert all(again)
+    assert "".join(again) == first
+
+
+def test_dropped_stream_yields_no_empty_pieces():
+    general = "List the technology leaders"
+    with _offline(DELTAS, fail_after=5) as cache:
+        pieces = list(vector_db.stream_ai_answer(general, PROFILES))
+        assert cache.get(general, PROFILES, vector_db.ANSWER_MODEL) is None
+    print(f"Pieces before the drop: {pieces!r}")
+    assert pieces == ["Jane", " Doe", " is the"]
+
+
+def test_service_keeps_partial_answer_without_apology():
+    service = ChatService(db_path="unused.db")
+
+    def partial_then_fail(message, department=None):
+        yield "Jane Doe is"
+        raise ConnectionError("stream dropped")
+
+    service._stream_answer = partial_then_fail
+    pieces = list(service.stream_message("who leads technology?"))
+    assert pieces == ["Jane Doe is"]
+
+    service._stream_answer = lambda message, department=None: (_ for _ in ()).throw(ConnectionError("down"))
+    assert list(service.stream_message("who leads finance?")) == ["I encountered an error. Please try again."]
+
+
+if __name__ == "__main__":
+    print("Testing Streamed Answers\n")
+    print("=" * 80)
+    for test in (test_stream_equals_stored_and_generated_answer,
+                 test_cached_stream_equals_first_stream,
+                 test_dropped_stream_yields_no_empty_pieces,
+                 test_service_keeps_partial_answer_without_apology):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
@@ -0,0 +1,120 @@
+"""Test that vector store snapshots stay consistent under concurrent saves"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import glob
+import json
+import tempfile
+import threading
+
+import numpy as np
+
+from src.search import vector_store
+from src.search.vector_store import load_vectors, map_vectors, read_meta, save_vectors
+
+
+def _snapshot(writer, rows=64, dimensions=8):
+    """Rows whose ids and values both identify the writer"""
+    return [writer] * rows, np.full((rows, dimensions), float(writer), dtype=np.float32)
+
+
+def test_round_trip_and_old_generations_removed():
+    path = os.path.join(tempfile.mkdtemp(), "store")
+    grace = vector_store.STORE_GC_GRACE_SECONDS
+    vector_store.STORE_GC_GRACE_SECONDS = -1
+    try:
+        save_vectors(path, *_snapshot(1), model="test")
+        meta = save_vectors(path, *_snapshot(2), model="test")
+    finally:
+        vector_store.STORE_GC_GRACE_SECONDS = grace
+
+    stored = load_vectors(path)
+    assert read_meta(path)['generation'] == meta['generation']
+    assert stored.ids.tolist() == [2] * 64 and float(stored.vectors[0, 0]) == 2.0
+    assert len(glob.glob(f"{path}.*.vectors.npy")) == 1
+    assert not glob.glob(f"{path}*.tmp")
+
+
+def test_concurrent_saves_never_mix_snapshots():
+    path = os.path.join(tempfile.mkdtemp(), "store")
+    save_vectors(path, *_snapshot(0))
+    errors = []
+    mixed = []
+    done = threading.Event()
+
+    def writer(number):
+        try:
+            for _ in range(20):
+                save_vectors(path, *_snapshot(number))
+                # map_vectors hands back the caller's own snapshot
+                stored = map_vectors(path, *_snapshot(number))
+                if stored.ids[0] != number or stored.vectors[0, 0] != number:
+                    mixed.append(("map", number))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        while not done.is_set():
+            stored = load_vectors(path)
+            if stored is not None and float(stored.vectors[-1, -1]) != float(stored.ids[0]):
+                mixed.append(("load", int(stored.ids[0])))
+
+    writers = [threading.Thread(target=writer, args=(number,)) for number in range(1, 5)]
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    print(f"Errors: {errors}, mixed snapshots: {mixed[:5]}")
+    assert errors == []
+    assert mixed == []
+    assert load_vectors(path) is not None
+
+
+def test_columns_are_stored_as_arrays_next_to_the_vectors():
+    path = os.path.join(tempfile.mkdtemp(), "store")
+    departments = ['Finance', None, 'Technology'] * 20 + ['Sales'] * 4
+    chunks = list(range(64))
+    # Another store whose name starts with this one's must survive its clean-up
+    save_vectors(f"{path}.reference", *_snapshot(9))
+    grace = vector_store.STORE_GC_GRACE_SECONDS
+    vector_store.STORE_GC_GRACE_SECONDS = -1
+    try:
+        save_vectors(path, *_snapshot(1), columns={'department': departments, 'chunk': chunks})
+        meta = save_vectors(path, *_snapshot(2), columns={'department': departments, 'chunk': chunks})
+    finally:
+        vector_store.STORE_GC_GRACE_SECONDS = grace
+
+    header = read_meta(path)
+    assert header['columns'] == ['department', 'chunk']
+    assert 'Finance' not in json.dumps(header)
+    assert header['created_at'].endswith("+00:00")
+    assert len(glob.glob(f"{path}.*.column-department.npy")) == 1
+    assert os.path.exists(vector_store.store_paths(path, meta['generation'], ['chunk'])['column-chunk'])
+
+    stored = load_vectors(path)
+    assert stored.column_values('department') == departments
+    assert stored.column_values('chunk') == chunks
+    assert load_vectors(f"{path}.reference").ids.tolist() == [9] * 64
+
+    try:
+        save_vectors(path, *_snapshot(3), columns={'department': departments[:10]})
+        raise AssertionError("a short column was accepted")
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    print("Testing Vector Store Snapshots\n")
+    print("=" * 80)
+    for test in (test_round_trip_and_old_generations_removed,
+                 test_concurrent_saves_never_mix_snapshots,
+                 test_columns_are_stored_as_arrays_next_to_the_vectors):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
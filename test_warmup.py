@@ -0,0 +1,85 @@
+"""Test warm-up department preloading and overlapping background index rebuilds"""
+import os
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+# Runs offline: local embeddings
+os.environ.setdefault('EMBEDDING_PROVIDER', 'hashing')
+
+import tempfile
+import threading
+import time
+
+import database
+from database import init_database, insert_profiles
+from src.search import warmup
+from src.search.vector_index import ProfileVectorIndex
+
+
+def _new_db():
+    path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    init_database(path)
+    insert_profiles([
+        {'name': 'Jane Doe', 'role': 'CTO', 'department': 'Technology'},
+        {'name': 'Raj Patel', 'role': 'CFO', 'department': 'Finance'},
+    ], path)
+    return path
+
+
+def test_departments_served_from_warm_up_until_profiles_change():
+    path = _new_db()
+    result = warmup.warm_up(path, background=False)
+    assert sorted(result['departments']) == ['Finance', 'Technology']
+
+    calls = []
+    original = database.get_departments
+    database.get_departments = lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs)
+    try:
+        assert sorted(warmup.get_cached_departments(path)) == ['Finance', 'Technology']
+        assert calls == []
+
+        insert_profiles([{'name': 'Ana Lopez', 'role': 'CMO', 'department': 'Marketing'}], path)
+        assert 'Marketing' in warmup.get_cached_departments(path)
+        assert calls == [1]
+    finally:
+        database.get_departments = original
+
+
+def test_overlapping_rebuilds_run_one_at_a_time():
+    index = ProfileVectorIndex(_new_db())
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_update(force=False):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.1)
+        with lock:
+            running.pop()
+        return index._index
+
+    index._update = slow_update
+    first = index.refresh_in_background()
+    # Warm-up and update_vector_database asking at the same time
+    second = index.refresh_in_background()
+    time.sleep(0.05)
+    assert second is first
+    assert index._rebuilding.is_set()
+
+    first.join(timeout=2)
+    print(f"Rebuild passes: {len(peak)}, most at once: {max(peak)}")
+    # The second request reruns the rebuild once, never concurrently
+    assert len(peak) == 2
+    assert max(peak) == 1
+    assert not index._rebuilding.is_set()
+
+
+if __name__ == "__main__":
+    print("Testing Startup Warm-up\n")
+    print("=" * 80)
+    for test in (test_departments_served_from_warm_up_until_profiles_change,
+                 test_overlapping_rebuilds_run_one_at_a_time):
+        print(f"\n[{test.__name__}]")
+        print("-" * 80)
+        test()
+        print("Result: ✅ PASS")
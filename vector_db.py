@@ -1,40 +1,80 @@
 """
 Vector Database with OpenAI Embeddings for Enhanced Q&A
-Uses OpenAI's text-embedding-3-small model for semantic search
+Uses OpenAI's text-embedding-3-small model for semantic search by default;
+a local sentence-transformers model or a deterministic hashing embedder
+can be selected with EMBEDDING_PROVIDER
 """
 
 import openai
 import numpy as np
 import sqlite3
 import logging
-from typing import List, Dict, Any, Optional
-import json
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
-from datetime import datetime
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables before the search modules read their settings
 load_dotenv()
 
+from database import get_profiles_by_ids, keyword_search_profiles
+from src.search.fusion import fuse_rankings
+from src.search.chunking import chunk_text
+from src.search.vector_codec import encode_embedding, decode_json_embedding
+from src.search.vector_index import get_profile_index
+from src.search.embedding_cache import get_embedding_cache
+from src.search.answer_cache import get_answer_cache
+from src.search.semantic_cache import get_semantic_cache, SemanticHit
+from src.search.intent_classifier import classify_query
+from src.search.photo_marker import PHOTO_MARKER, split_photo_marker
+from src.search.prompt_context import (
+    build_profile_context, count_message_tokens, PROMPT_TOKEN_BUDGET, ANSWER_MAX_TOKENS
+)
+from src.search.embedding_providers import get_embedding_provider, EMBEDDING_PROVIDER
+from src.search.async_embedding_client import get_embedding_client
+from src.search.indexing import create_embeddings_batch
+
 # Configure OpenAI API
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please create a .env file with your API key.")
+    if EMBEDDING_PROVIDER == "openai":
+        raise ValueError("OPENAI_API_KEY not found in environment variables. Please create a .env file with your API key.")
+    logger.warning("OPENAI_API_KEY not set: embeddings are local, but AI answers will fall back to plain listings")
 openai.api_key = OPENAI_API_KEY
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 DATABASE_PATH = "data/leadership.db"
+EMBEDDING_MODEL = get_embedding_provider().model
+
+# Hybrid retrieval: candidates taken from each retriever before fusion,
+# and how much each one counts
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+
+# Runs the keyword and vector retrievers side by side
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+# Re-answers a sample of semantic cache hits off the request path
+_audit_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-audit")
 
 
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
+def get_embedding(text: str, model: str = EMBEDDING_MODEL) -> List[float]:
     """
-    Get embedding for text using OpenAI API.
+    Get embedding for text using the configured embedding provider.
+    
+    Results are cached by model and normalized text, so repeated
+    questions don't make another API call. Throttled or transient
+    failures get one quick retry (EMBEDDING_QUERY_MAX_RETRIES) before
+    giving up.
     
     Args:
         text: Text to embed
-        model: OpenAI embedding model
+        model: Embedding model
         
     Returns:
         List of embedding values
@@ -45,16 +85,61 @@ def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[floa
         if not text:
             return []
         
-        response = openai.embeddings.create(
-            input=text,
-            model=model
-        )
-        return response.data[0].embedding
+        # Reuse embeddings for repeated or equivalent text
+        cache = get_embedding_cache()
+        cached = cache.get(text, model)
+        if cached is not None:
+            return cached
+        
+        # Short retry budget: a user is waiting on this
+        embedding = get_embedding_client(model).embed_query(text)
+        if not embedding:
+            return []
+        cache.put(text, model, embedding)
+        return embedding
     except Exception as e:
         logger.error(f"Error getting embedding: {e}")
         return []
 
 
+def get_embeddings(texts: List[str], model: str = EMBEDDING_MODEL) -> List[List[float]]:
+    """
+    Get embeddings for many short texts (e.g. queries), using the cache.
+    
+    Cached and duplicate texts are not sent again; everything else is
+    embedded with batched requests.
+    
+    Args:
+        texts: Texts to embed
+        model: Embedding model
+        
+    Returns:
+        List of embeddings aligned with texts (empty list for blank or
+        failed texts)
+    """
+    cache = get_embedding_cache()
+    cleaned = [text.replace("\n", " ").strip() for text in texts]
+    
+    found: Dict[str, List[float]] = {}
+    missing = []
+    for text in dict.fromkeys(cleaned):
+        if not text:
+            continue
+        cached = cache.get(text, model)
+        if cached is not None:
+            found[text] = cached
+        else:
+            missing.append(text)
+    
+    if missing:
+        for text, embedding in zip(missing, create_embeddings_batch(missing, model=model)):
+            if embedding:
+                cache.put(text, model, embedding)
+                found[text] = embedding
+    
+    return [found.get(text, []) for text in cleaned]
+
+
 def create_profile_embedding(profile: Dict[str, Any]) -> str:
     """
     Create a comprehensive text representation of a profile for embedding.
@@ -88,34 +173,206 @@ def create_profile_embedding(profile: Dict[str, Any]) -> str:
     return " | ".join(parts)
 
 
-def update_vector_database(db_path: str = DATABASE_PATH) -> None:
+def create_profile_chunks(profile: Dict[str, Any]) -> List[str]:
     """
-    Update the vector database with embeddings for all profiles.
+    Split a profile into the texts that get their own vectors.
+    
+    The first chunk is the full profile text with the start of the
+    biography. Each further piece of a long biography becomes its own
+    chunk, prefixed with name and role so it still says who it is about.
+    Profiles with a short biography produce one chunk identical to
+    create_profile_embedding.
     
     Args:
-        db_path: Path to SQLite database
+        profile: Profile dictionary
+        
+    Returns:
+        List of chunk texts (empty if the profile has no text)
+    """
+    bio_chunks = chunk_text(profile.get('bio') or "")
+    if len(bio_chunks) <= 1:
+        text = create_profile_embedding(profile)
+        return [text] if text.strip() else []
+    
+    chunks = [create_profile_embedding({**profile, 'bio': bio_chunks[0]})]
+    prefix = " | ".join(
+        f"{label}: {profile[field]}" for label, field in (("Name", 'name'), ("Role", 'role'))
+        if profile.get(field)
+    )
+    for bio_chunk in bio_chunks[1:]:
+        chunks.append(f"{prefix} | Biography: {bio_chunk}" if prefix else f"Biography: {bio_chunk}")
+    return chunks
+
+
+def compute_content_hash(text: str, model: str = EMBEDDING_MODEL) -> str:
     """
-    logger.info("Updating vector database with OpenAI embeddings...")
+    Hash the embedding text together with the model that embeds it.
     
+    A profile only needs re-embedding when this hash changes, i.e. when
+    its text changed or a different embedding model is configured.
+    
+    Args:
+        text: Text that is sent to the embedding model
+        model: Embedding model name
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+def ensure_embedding_columns(cursor: sqlite3.Cursor) -> None:
+    """
+    Add the embedding columns to the profiles table if they don't exist.
+    
+    Args:
+        cursor: Cursor on the profiles database
+    """
+    cursor.execute("PRAGMA table_info(profiles)")
+    existing = {row[1] for row in cursor.fetchall()}
+    
+    for column, column_type in [("embedding", "TEXT"),
+                                ("embedding_vector", "BLOB"),
+                                ("embedding_hash", "TEXT"),
+                                ("embedding_model", "TEXT")]:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE profiles ADD COLUMN {column} {column_type}")
+            logger.info(f"Added {column} column to database")
+
+
+def ensure_chunk_table(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the table holding extra chunk vectors for long profiles.
+    
+    The first chunk of every profile lives in profiles.embedding_vector;
+    profile_chunks holds chunks 1..n with their parent profile_id. A
+    trigger removes a profile's chunks when the profile is deleted.
+    
+    Args:
+        cursor: Cursor on the profiles database
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS profile_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            embedding_vector BLOB NOT NULL,
+            embedding_model TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_profile_chunks_profile
+        ON profile_chunks(profile_id)
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS profile_chunks_cleanup AFTER DELETE ON profiles BEGIN
+            DELETE FROM profile_chunks WHERE profile_id = old.id;
+        END
+    """)
+
+
+def migrate_json_embeddings(db_path: str = DATABASE_PATH) -> int:
+    """
+    Convert legacy JSON embeddings to the binary float32 format.
+    
+    Rows that have a JSON array in the embedding column but no
+    embedding_vector are re-encoded, and the JSON text is cleared so the
+    old ~30KB-per-row representation no longer takes up space.
+    
+    Args:
+        db_path: Path to SQLite database
+        
+    Returns:
+        Number of rows migrated
+    """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Add embedding column if it doesn't exist
-    try:
-        cursor.execute("ALTER TABLE profiles ADD COLUMN embedding TEXT")
-        conn.commit()
-        logger.info("Added embedding column to database")
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
+    ensure_embedding_columns(cursor)
+    
+    cursor.execute("""
+        SELECT id, embedding, embedding_model
+        FROM profiles
+        WHERE embedding IS NOT NULL AND embedding_vector IS NULL
+    """)
+    rows = cursor.fetchall()
+    
+    updates = []
+    for profile_id, embedding_json, model in rows:
+        vector = decode_json_embedding(embedding_json)
+        if vector is None:
+            logger.warning(f"Dropping unreadable JSON embedding for profile {profile_id}")
+            continue
+        updates.append((encode_embedding(vector, model or EMBEDDING_MODEL), profile_id))
+    
+    cursor.executemany(
+        "UPDATE profiles SET embedding_vector = ?, embedding = NULL WHERE id = ?",
+        updates
+    )
+    # Clear anything left over, e.g. unreadable JSON
+    cursor.execute("UPDATE profiles SET embedding = NULL WHERE embedding IS NOT NULL")
+    conn.commit()
+    conn.close()
+    
+    if updates:
+        logger.info(f"Migrated {len(updates)} JSON embeddings to binary format")
+    return len(updates)
+
+
+def update_vector_database(db_path: str = DATABASE_PATH, batch: bool = True,
+                           force: bool = False) -> Dict[str, int]:
+    """
+    Update the vector database with embeddings for new or changed profiles.
+    
+    Each profile stores a hash of its embedding text and model. Profiles
+    whose hash still matches are skipped, so re-indexing after a scrape
+    only sends new or edited profiles to the embedding API.
+    
+    Long biographies are split into chunks (see create_profile_chunks);
+    the first chunk's vector is stored on the profile and the rest in
+    profile_chunks.
+    
+    Args:
+        db_path: Path to SQLite database
+        batch: Send many profiles per embedding request (set False to
+            embed one profile per request)
+        force: Re-embed every profile even if its hash is unchanged
+        
+    Returns:
+        Dictionary with total, embedded, skipped and failed counts, plus
+        the number of extra chunk vectors written
+    """
+    logger.info(f"Updating vector database with {EMBEDDING_MODEL} embeddings...")
+    
+    stats = {
+        'total': 0,
+        'embedded': 0,
+        'skipped': 0,
+        'failed': 0,
+        'chunks': 0
+    }
+    
+    # Bring any JSON embeddings from older versions over to the binary format
+    migrate_json_embeddings(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    ensure_chunk_table(cursor)
     
     # Get all profiles
-    cursor.execute("SELECT id, name, role, bio, department, contact, linkedin FROM profiles")
+    cursor.execute("""
+        SELECT id, name, role, bio, department, contact, linkedin, embedding_vector, embedding_hash
+        FROM profiles
+    """)
     profiles = cursor.fetchall()
+    stats['total'] = len(profiles)
     
-    updated_count = 0
+    # Work out which profiles are new or changed
+    profile_ids = []
+    profile_names = []
+    profile_chunks = []
+    hashes = []
     for profile_data in profiles:
-        profile_id = profile_data[0]
         profile = {
             'name': profile_data[1],
             'role': profile_data[2],
@@ -124,162 +381,290 @@ def update_vector_database(db_path: str = DATABASE_PATH) -> None:
             'contact': profile_data[5],
             'linkedin': profile_data[6]
         }
+        chunks = create_profile_chunks(profile)
+        if not chunks:
+            logger.warning(f"Skipping profile {profile_data[0]} with no text to embed")
+            stats['failed'] += 1
+            continue
         
-        # Create embedding text
-        embedding_text = create_profile_embedding(profile)
-        
-        # Get embedding
-        embedding = get_embedding(embedding_text)
+        content_hash = compute_content_hash("\n".join(chunks))
+        if not force and profile_data[7] is not None and profile_data[8] == content_hash:
+            stats['skipped'] += 1
+            continue
         
-        if embedding:
-            # Store embedding as JSON
-            embedding_json = json.dumps(embedding)
-            cursor.execute(
-                "UPDATE profiles SET embedding = ? WHERE id = ?",
-                (embedding_json, profile_id)
+        profile_ids.append(profile_data[0])
+        profile_names.append(profile['name'])
+        profile_chunks.append(chunks)
+        hashes.append(content_hash)
+    
+    # Get embeddings for every chunk of every changed profile
+    texts = [chunk for chunks in profile_chunks for chunk in chunks]
+    if batch:
+        embeddings = create_embeddings_batch(texts, EMBEDDING_MODEL)
+    else:
+        embeddings = [get_embedding(text) for text in texts]
+    
+    # Store embeddings as float32 BLOBs in a single transaction
+    updates = []
+    chunk_rows = []
+    offset = 0
+    for profile_id, name, content_hash, chunks in zip(profile_ids, profile_names, hashes, profile_chunks):
+        chunk_embeddings = embeddings[offset:offset + len(chunks)]
+        offset += len(chunks)
+        if chunk_embeddings and all(chunk_embeddings):
+            blob = encode_embedding(chunk_embeddings[0], EMBEDDING_MODEL)
+            updates.append((blob, content_hash, EMBEDDING_MODEL, profile_id))
+            chunk_rows.extend(
+                (profile_id, chunk_index, encode_embedding(embedding, EMBEDDING_MODEL), EMBEDDING_MODEL)
+                for chunk_index, embedding in enumerate(chunk_embeddings[1:], 1)
             )
-            updated_count += 1
-            logger.info(f"Updated embedding for: {profile['name']}")
+        else:
+            logger.warning(f"No embedding created for: {name}")
+            stats['failed'] += 1
     
+    cursor.executemany(
+        "DELETE FROM profile_chunks WHERE profile_id = ?",
+        [(update[3],) for update in updates]
+    )
+    cursor.executemany(
+        "INSERT INTO profile_chunks (profile_id, chunk_index, embedding_vector, embedding_model) "
+        "VALUES (?, ?, ?, ?)",
+        chunk_rows
+    )
+    cursor.executemany(
+        "UPDATE profiles SET embedding_vector = ?, embedding_hash = ?, embedding_model = ? WHERE id = ?",
+        updates
+    )
     conn.commit()
     conn.close()
     
-    logger.info(f"Updated {updated_count} profile embeddings")
+    stats['embedded'] = len(updates)
+    stats['chunks'] = len(chunk_rows)
+    
+    # Rebuild the search index (and its snapshot) now rather than on the next query
+    if updates:
+        get_profile_index(db_path, model=EMBEDDING_MODEL).refresh_in_background()
+    logger.info(f"Embedding update complete: {stats}")
+    return stats
 
 
-def cosine_similarity(a: List[float], b: List[float]) -> float:
+def cosine_similarity(a, b) -> float:
     """Calculate cosine similarity between two vectors."""
-    if not a or not b:
+    if a is None or b is None or len(a) == 0 or len(b) == 0:
         return 0.0
     
-    a = np.array(a)
-    b = np.array(b)
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
     
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
 
-def vector_search_profiles(query: str, limit: int = 5, db_path: str = DATABASE_PATH) -> List[Dict[str, Any]]:
+def vector_search_ids(query: str, limit: int = 5, db_path: str = DATABASE_PATH,
+                      department: Optional[str] = None) -> List[Tuple[int, float]]:
     """
-    Search profiles using vector similarity with OpenAI embeddings.
+    Rank profile IDs by vector similarity without reading profile rows.
     
     Args:
         query: Search query
         limit: Maximum number of results
         db_path: Path to SQLite database
+        department: Only return profiles from this department
         
     Returns:
-        List of matching profiles with similarity scores
+        List of (profile id, cosine similarity) pairs, best first
     """
-    logger.info(f"Vector search for: {query}")
-    
-    # Get query embedding
     query_embedding = get_embedding(query)
     if not query_embedding:
         logger.error("Could not get embedding for query")
         return []
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    return get_profile_index(db_path, model=EMBEDDING_MODEL).search(
+        query_embedding, k=limit, filters={'department': department})
+
+
+def vector_search_profiles(query: str, limit: int = 5, db_path: str = DATABASE_PATH,
+                           department: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Search profiles using vector similarity over stored embeddings.
     
-    # Get all profiles with embeddings
-    cursor.execute("""
-        SELECT id, name, role, bio, photo_url, contact, phone, linkedin, twitter, 
-               department, profile_url, embedding
-        FROM profiles 
-        WHERE embedding IS NOT NULL
-    """)
+    Scoring runs against the process-resident profile index, which keeps
+    every embedding in one normalized matrix and reloads it only when the
+    profiles table changes. Full rows are then fetched for the top
+    results only.
     
-    profiles = cursor.fetchall()
-    conn.close()
+    A department filter is applied inside the index before ranking, so
+    it returns the best matches within that department rather than the
+    overall top results that happen to be in it.
     
-    if not profiles:
-        logger.warning("No profiles with embeddings found")
+    Args:
+        query: Search query
+        limit: Maximum number of results
+        db_path: Path to SQLite database
+        department: Only return profiles from this department
+        
+    Returns:
+        List of matching profiles with similarity scores
+    """
+    logger.info(f"Vector search for: {query}")
+    
+    matches = vector_search_ids(query, limit=limit, db_path=db_path, department=department)
+    if not matches:
+        if department:
+            logger.warning(f"No profiles with embeddings found in department '{department}'")
+        else:
+            logger.warning("No profiles with embeddings found")
         return []
     
-    # Calculate similarities
-    results = []
-    for profile_data in profiles:
-        embedding_json = profile_data[11]  # embedding column
+    # Only materialize the winning rows
+    scores = dict(matches)
+    results = get_profiles_by_ids([profile_id for profile_id, _ in matches], db_path=db_path)
+    for profile in results:
+        profile['similarity'] = scores[profile['id']]
+    
+    logger.info(f"Found {len(results)} results, returning top {limit}")
+    return results
+
+
+def vector_search_many(queries: List[str], limit: int = 5, db_path: str = DATABASE_PATH,
+                       department: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Run many vector searches at once.
+    
+    All queries are embedded with batched requests and scored against
+    the profile index together, and every matching row is read from the
+    database once, so a batch of evaluation questions costs one pass
+    over the data instead of one per question.
+    
+    Args:
+        queries: Search queries
+        limit: Maximum number of results per query
+        db_path: Path to SQLite database
+        department: Only return profiles from this department
         
-        try:
-            profile_embedding = json.loads(embedding_json)
-            similarity = cosine_similarity(query_embedding, profile_embedding)
-            
-            profile = {
-                'id': profile_data[0],
-                'name': profile_data[1],
-                'role': profile_data[2],
-                'bio': profile_data[3],
-                'photo_url': profile_data[4],
-                'contact': profile_data[5],
-                'phone': profile_data[6],
-                'linkedin': profile_data[7],
-                'twitter': profile_data[8],
-                'department': profile_data[9],
-                'profile_url': profile_data[10],
-                'similarity': similarity
-            }
-            
-            results.append(profile)
-            
-        except Exception as e:
-            logger.error(f"Error processing embedding for profile {profile_data[1]}: {e}")
-            continue
+    Returns:
+        One list of matching profiles (with 'similarity') per query,
+        in the same order as queries
+    """
+    logger.info(f"Batch vector search for {len(queries)} queries")
+    if not queries:
+        return []
     
-    # Sort by similarity and return top results
-    results.sort(key=lambda x: x['similarity'], reverse=True)
+    embeddings = get_embeddings(queries)
+    matches = get_profile_index(db_path, model=EMBEDDING_MODEL).search_many(
+        embeddings, k=limit, filters={'department': department})
     
-    logger.info(f"Found {len(results)} results, returning top {limit}")
-    return results[:limit]
+    profile_ids = list(dict.fromkeys(profile_id for query_matches in matches
+                                     for profile_id, _ in query_matches))
+    profiles = {profile['id']: profile for profile in get_profiles_by_ids(profile_ids, db_path=db_path)}
+    
+    results = []
+    for query_matches in matches:
+        query_results = []
+        for profile_id, score in query_matches:
+            if profile_id in profiles:
+                profile = dict(profiles[profile_id])
+                profile['similarity'] = score
+                query_results.append(profile)
+        results.append(query_results)
+    return results
 
 
-def generate_ai_answer(query: str, profiles: List[Dict[str, Any]]) -> str:
+def hybrid_search_profiles(query: str, limit: int = 5, db_path: str = DATABASE_PATH,
+                           department: Optional[str] = None,
+                           fusion: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Generate an AI-powered answer using OpenAI with relevant profiles.
+    Search profiles with FTS5 bm25 and vector similarity at the same time.
+    
+    Both retrievers run concurrently, so latency is roughly the slower of
+    the two. Their rankings are fused (reciprocal rank fusion by default),
+    which keeps exact names and keywords at the top while still finding
+    paraphrased matches. If one retriever fails, the other's ranking is
+    used on its own.
     
     Args:
-        query: User question
-        profiles: Relevant profiles from vector search
+        query: Search query
+        limit: Maximum number of results
+        db_path: Path to SQLite database
+        department: Only return profiles from this department
+        fusion: rrf or weighted (defaults to HYBRID_FUSION)
         
     Returns:
-        AI-generated answer with proper formatting
+        List of matching profiles with 'similarity' (cosine, when the
+        vector retriever found the profile) and 'hybrid_score'
     """
-    if not profiles:
-        return "I couldn't find any relevant team members for your question."
+    logger.info(f"Hybrid search for: {query}")
+    depth = max(limit, HYBRID_CANDIDATES)
     
-    # Check for obviously out-of-scope questions about other companies
+    keyword_future = _retrieval_pool.submit(
+        keyword_search_profiles, query, depth, department, db_path)
+    vector_future = _retrieval_pool.submit(
+        vector_search_ids, query, depth, db_path, department)
+    
+    rankings = []
+    for name, future in (("keyword", keyword_future), ("vector", vector_future)):
+        try:
+            rankings.append(future.result())
+        except Exception as e:
+            logger.error(f"{name.capitalize()} retrieval failed: {e}")
+            rankings.append([])
+    keyword_matches, vector_matches = rankings
+    
+    fused = fuse_rankings(
+        [keyword_matches, vector_matches],
+        method=fusion,
+        weights=[HYBRID_KEYWORD_WEIGHT, HYBRID_VECTOR_WEIGHT]
+    )[:limit]
+    if not fused:
+        return []
+    
+    similarities = dict(vector_matches)
+    hybrid_scores = dict(fused)
+    results = get_profiles_by_ids([profile_id for profile_id, _ in fused], db_path=db_path)
+    for profile in results:
+        if profile['id'] in similarities:
+            profile['similarity'] = similarities[profile['id']]
+        profile['hybrid_score'] = hybrid_scores[profile['id']]
+    
+    logger.info(f"Hybrid search fused {len(keyword_matches)} keyword and "
+                f"{len(vector_matches)} vector matches into {len(results)} results")
+    return results
+
+
+ANSWER_MODEL = "gpt-3.5-turbo"
+
+ANSWER_SYSTEM_PROMPT = "You are a corporate assistant for a SPECIFIC company's team database. You can ONLY answer questions about people in the provided database. If asked about anyone or anything not in the database (like Microsoft, Google, other companies, external people), you MUST refuse and say you only have information about the team members in this specific database. NEVER use external knowledge. NEVER hallucinate. Be strict about this."
+
+
+def _external_company_refusal(query: str, profiles: List[Dict[str, Any]]) -> Optional[str]:
+    """Refusal for questions about other companies, or None if the question is in scope."""
     query_lower = query.lower()
-    external_companies = ['microsoft', 'google', 'amazon', 'apple', 'meta', 'facebook', 
-                         'tesla', 'netflix', 'ibm', 'oracle', 'salesforce', 'adobe']
+    company_mentioned = classify_query(query).external_company
     
     # If question mentions external company and no profile names match
-    mentions_external = any(company in query_lower for company in external_companies)
     mentions_any_profile = any(profile['name'].lower() in query_lower for profile in profiles[:3])
     
-    if mentions_external and not mentions_any_profile:
+    if company_mentioned and not mentions_any_profile:
         # Question is likely about an external company
-        company_mentioned = next((c for c in external_companies if c in query_lower), "that company")
         return f"I can only answer questions about the team members in this database. I don't have information about {company_mentioned.title()} or external companies. Please ask about our team members instead."
+    return None
+
+
+def _build_answer_messages(query: str, profiles: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Chat messages asking the model to answer from the given profiles.
     
-    # Prepare context from profiles (clean format without boxes)
-    context = ""
-    for i, profile in enumerate(profiles, 1):
-        context += f"Person {i}: {profile['name']}\n"
-        if profile.get('role'):
-            context += f"Position: {profile['role']}\n"
-        if profile.get('department'):
-            context += f"Department: {profile['department']}\n"
-        if profile.get('bio'):
-            bio_preview = profile['bio'][:300] + "..." if len(profile['bio']) > 300 else profile['bio']
-            context += f"Background: {bio_preview}\n"
-        if profile.get('contact'):
-            context += f"Email: {profile['contact']}\n"
-        if profile.get('linkedin'):
-            context += f"LinkedIn: {profile['linkedin']}\n"
-        context += "\n"
+    Profiles are added in relevance order until the prompt budget is
+    used up; ANSWER_MAX_TOKENS is kept free for the answer.
     
+    Args:
+        query: User question
+        profiles: Relevant profiles, most relevant first
+        
+    Returns:
+        System and user messages
+    """
     # Create prompt for OpenAI
-    prompt = f"""You are answering questions ONLY about the team members listed below. 
+    template = """You are answering questions ONLY about the team members listed below. 
 
 Question: {query}
 
@@ -301,134 +686,332 @@ FORMATTING RULES:
 
 Answer:"""
     
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a corporate assistant for a SPECIFIC company's team database. You can ONLY answer questions about people in the provided database. If asked about anyone or anything not in the database (like Microsoft, Google, other companies, external people), you MUST refuse and say you only have information about the team members in this specific database. NEVER use external knowledge. NEVER hallucinate. Be strict about this."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        answer = response.choices[0].message.content.strip()
-        
-        # Add photo information if the answer is about a specific person
-        # IMPROVED: Check if answer mentions a single person prominently
-        query_lower = query.lower()
-        answer_lower = answer.lower()
-        
-        # Keywords that indicate asking about a SPECIFIC person (singular)
-        single_person_keywords = ['who is', 'about', 'tell me about', 'what about', 
-                                   'describe', 'info on', 'details about', 'information about', 
-                                   'photo of', 'picture of']
-        
-        # General/plural keywords that indicate asking about MULTIPLE people (no photo)
-        general_keywords = ['list', 'show all', 'give me all', 'who are', 'all the', 
-                           'show me the', 'list all', 'find all', 'get all', 'members']
-        
-        # Role-specific queries (asking for THE specific person with that title)
-        singular_role_keywords = ['the ceo', 'the cto', 'the president', 'the director', 
-                                  'the head', 'the chief', 'the manager', 'the lead']
-        
-        has_person_keyword = any(keyword in query_lower for keyword in single_person_keywords)
-        has_general_keyword = any(keyword in query_lower for keyword in general_keywords)
-        has_singular_role = any(keyword in query_lower for keyword in singular_role_keywords)
+    def messages(context: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
+            {"role": "user", "content": template.format(query=query, context=context)}
+        ]
+    
+    fixed_tokens = count_message_tokens(messages(""), ANSWER_MODEL)
+    context_budget = max(0, PROMPT_TOKEN_BUDGET - ANSWER_MAX_TOKENS - fixed_tokens)
+    context, stats = build_profile_context(profiles, context_budget, ANSWER_MODEL)
+    
+    logger.info(f"Prompt: {fixed_tokens} instruction + {stats['tokens']}/{context_budget} context tokens, "
+                f"{stats['included']}/{len(profiles)} profiles ({stats['truncated']} bios cut, "
+                f"{stats['omitted']} left out), {ANSWER_MAX_TOKENS} reserved for the answer")
+    result = messages(context)
+    logger.debug(f"Prompt for {query!r}:\n{result[1]['content']}")
+    return result
+
+
+def _photo_marker(query: str, answer: str, profiles: List[Dict[str, Any]]) -> str:
+    """
+    Photo marker to append to an answer about one specific person.
+    
+    Args:
+        query: User question
+        answer: Complete AI answer
+        profiles: Profiles the answer was generated from
         
-        # Check if answer focuses on ONE specific person
-        single_person_focused = False
-        if profiles:
-            # Count how many different people are mentioned in the answer
-            people_mentioned = 0
-            for profile in profiles[:5]:  # Check top 5 profiles
-                if profile.get('name'):
-                    name_parts = [part for part in profile['name'].lower().split() if len(part) > 3]
-                    if any(part in answer_lower for part in name_parts):
-                        people_mentioned += 1
-            
-            # If only ONE person mentioned in answer, it's focused on them
-            single_person_focused = (people_mentioned == 1)
+    Returns:
+        "\\n\\n📸PHOTO📸<url>", or an empty string when no photo should be shown
+    """
+    # Add photo information if the answer is about a specific person
+    # IMPROVED: Check if answer mentions a single person prominently
+    answer_lower = answer.lower()
+    
+    # Specific person (singular), multiple people (no photo), or THE <role>
+    intent = classify_query(query)
+    has_person_keyword = intent.single_person
+    has_general_keyword = intent.general
+    has_singular_role = intent.singular_role
+    
+    # Check if answer focuses on ONE specific person
+    single_person_focused = False
+    if profiles:
+        # Count how many different people are mentioned in the answer
+        people_mentioned = 0
+        for profile in profiles[:5]:  # Check top 5 profiles
+            if profile.get('name'):
+                name_parts = [part for part in profile['name'].lower().split() if len(part) > 3]
+                if any(part in answer_lower for part in name_parts):
+                    people_mentioned += 1
         
-        # ONLY show photo if:
-        # 1. Exactly ONE profile found (definitely specific), OR
-        # 2. Query has specific person keywords AND answer focuses on one person, OR
-        # 3. Query asks for singular role (THE CEO) AND answer focuses on one person
-        # BUT NOT if query has general/plural keywords
-        should_show_photo = (
-            not has_general_keyword and (
-                len(profiles) == 1 or 
-                (has_person_keyword and single_person_focused) or
-                (has_singular_role and single_person_focused)
-            )
+        # If only ONE person mentioned in answer, it's focused on them
+        single_person_focused = (people_mentioned == 1)
+    
+    # ONLY show photo if:
+    # 1. Exactly ONE profile found (definitely specific), OR
+    # 2. Query has specific person keywords AND answer focuses on one person, OR
+    # 3. Query asks for singular role (THE CEO) AND answer focuses on one person
+    # BUT NOT if query has general/plural keywords
+    should_show_photo = (
+        not has_general_keyword and (
+            len(profiles) == 1 or 
+            (has_person_keyword and single_person_focused) or
+            (has_singular_role and single_person_focused)
         )
-        
-        # Log decision for debugging
-        if has_general_keyword:
-            logger.info(f"❌ No photo: General/plural query detected")
-        elif not single_person_focused and len(profiles) > 1:
-            logger.info(f"❌ No photo: Answer mentions multiple people ({len(profiles)} profiles)")
-        elif should_show_photo:
-            logger.info(f"✅ Show photo: Single person query/answer")
-        
-        if should_show_photo and profiles:
-            # Find which profile the answer is actually about by checking name mentions
-            profile_to_show = None
-            
-            # Check which profile's name is mentioned in the answer
-            for profile in profiles:
-                if profile.get('name'):
-                    name = profile['name'].lower()
-                    # Check for full name or significant name parts
-                    name_parts = [part for part in name.split() if len(part) > 2]
-                    
-                    # If 2+ name parts are mentioned, it's definitely about this person
-                    matches = sum(1 for part in name_parts if part in answer_lower)
-                    if matches >= 2:
-                        profile_to_show = profile
-                        logger.info(f"Photo match: Answer mentions {profile['name']} ({matches} name parts)")
-                        break
-                    # Or if full first+last name match (for shorter names)
-                    elif matches >= 1 and len(name_parts) <= 2:
-                        profile_to_show = profile
-                        logger.info(f"Photo match: Answer mentions {profile['name']}")
-                        break
-            
-            # Fallback to first profile if no clear match
-            if not profile_to_show:
-                profile_to_show = profiles[0]
-                logger.info(f"Photo default: Using first profile {profiles[0].get('name')}")
+    )
+    
+    # Log decision for debugging
+    if has_general_keyword:
+        logger.info(f"❌ No photo: General/plural query detected")
+    elif not single_person_focused and len(profiles) > 1:
+        logger.info(f"❌ No photo: Answer mentions multiple people ({len(profiles)} profiles)")
+    elif should_show_photo:
+        logger.info(f"✅ Show photo: Single person query/answer")
+    
+    if not (should_show_photo and profiles):
+        return ""
+    
+    # Find which profile the answer is actually about by checking name mentions
+    profile_to_show = None
+    
+    # Check which profile's name is mentioned in the answer
+    for profile in profiles:
+        if profile.get('name'):
+            name = profile['name'].lower()
+            # Check for full name or significant name parts
+            name_parts = [part for part in name.split() if len(part) > 2]
             
-            # Add the correct photo
-            if profile_to_show.get('photo_url'):
-                answer += f"\n\n📸PHOTO📸{profile_to_show['photo_url']}"
-            else:
-                # Log if photo is missing for debugging
-                logger.warning(f"No photo URL available for {profile_to_show.get('name', 'Unknown')}")
+            # If 2+ name parts are mentioned, it's definitely about this person
+            matches = sum(1 for part in name_parts if part in answer_lower)
+            if matches >= 2:
+                profile_to_show = profile
+                logger.info(f"Photo match: Answer mentions {profile['name']} ({matches} name parts)")
+                break
+            # Or if full first+last name match (for shorter names)
+            elif matches >= 1 and len(name_parts) <= 2:
+                profile_to_show = profile
+                logger.info(f"Photo match: Answer mentions {profile['name']}")
+                break
+    
+    # Fallback to first profile if no clear match
+    if not profile_to_show:
+        profile_to_show = profiles[0]
+        logger.info(f"Photo default: Using first profile {profiles[0].get('name')}")
+    
+    # Add the correct photo
+    if profile_to_show.get('photo_url'):
+        return f"\n\n{PHOTO_MARKER}{profile_to_show['photo_url']}"
+    
+    # Log if photo is missing for debugging
+    logger.warning(f"No photo URL available for {profile_to_show.get('name', 'Unknown')}")
+    return ""
+
+
+def _fallback_answer(profiles: List[Dict[str, Any]]) -> str:
+    """Plain listing of the top profiles, used when the AI answer fails."""
+    response = f"I found {len(profiles)} relevant team member(s):\n\n"
+    for i, profile in enumerate(profiles[:3], 1):
+        response += f"**{profile['name']}**"
+        if profile.get('role'):
+            response += f" - {profile['role']}"
+        response += "\n"
+        if profile.get('department'):
+            response += f"Department: {profile['department']}\n"
+        if profile.get('bio'):
+            bio_short = profile['bio'][:150] + "..." if len(profile['bio']) > 150 else profile['bio']
+            response += f"{bio_short}\n"
+        response += "\n"
+    
+    # Add photo for single person using same marker
+    if len(profiles) == 1 and profiles[0].get('photo_url'):
+        response += f"{PHOTO_MARKER}{profiles[0]['photo_url']}"
+    
+    return response
+
+
+def _complete_answer(query: str, profiles: List[Dict[str, Any]]) -> str:
+    """Ask the chat model for an answer and add the photo marker."""
+    response = openai.chat.completions.create(
+        model=ANSWER_MODEL,
+        messages=_build_answer_messages(query, profiles),
+        max_tokens=ANSWER_MAX_TOKENS,
+        temperature=0.7
+    )
+    
+    answer = response.choices[0].message.content.strip()
+    return answer + _photo_marker(query, answer, profiles)
+
+
+def _cached_answer(query: str, profiles: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Look up an answer in the exact cache, then the semantic cache.
+    
+    Args:
+        query: User question
+        profiles: Profiles retrieved for the question
+        
+    Returns:
+        Cached answer, or None if the model has to be asked
+    """
+    # Same question over the same (unchanged) profiles: reuse the answer
+    cached = get_answer_cache().get(query, profiles, ANSWER_MODEL)
+    if cached is not None:
+        logger.info("Answer served from cache")
+        return cached
+    
+    # A paraphrase of an earlier question over the same profiles
+    semantic_cache = get_semantic_cache()
+    if not semantic_cache.enabled:
+        return None
+    hit = semantic_cache.get(get_embedding(query), EMBEDDING_MODEL, profiles, ANSWER_MODEL)
+    if hit is None:
+        return None
+    
+    logger.info(f"Answer served from semantic cache: {query!r} matched {hit.query!r} "
+                f"(similarity {hit.similarity:.3f})")
+    if hit.audit:
+        _audit_pool.submit(_audit_semantic_hit, query, profiles, hit)
+    # The photo decision depends on how this question is worded, not the cached one
+    text = split_photo_marker(hit.answer)[0]
+    return text + _photo_marker(query, text, profiles)
+
+
+def _store_answer(query: str, profiles: List[Dict[str, Any]], answer: str) -> None:
+    """Put a complete model answer in the exact and semantic caches."""
+    get_answer_cache().put(query, profiles, ANSWER_MODEL, answer)
+    semantic_cache = get_semantic_cache()
+    if semantic_cache.enabled:
+        semantic_cache.put(query, get_embedding(query), EMBEDDING_MODEL, profiles, ANSWER_MODEL, answer)
+
+
+def _audit_semantic_hit(query: str, profiles: List[Dict[str, Any]], hit: SemanticHit) -> None:
+    """
+    Re-answer a question that was served from the semantic cache and
+    report how closely the fresh answer agrees with the cached one.
+    """
+    try:
+        fresh = _complete_answer(query, profiles)
+        agreement = cosine_similarity(get_embedding(split_photo_marker(fresh)[0]),
+                                      get_embedding(split_photo_marker(hit.answer)[0]))
+        get_semantic_cache().record_audit(hit, agreement)
+        # The fresh answer is right for this exact question either way
+        get_answer_cache().put(query, profiles, ANSWER_MODEL, fresh)
+    except Exception as e:
+        logger.warning(f"Semantic cache audit failed: {e}")
+
+
+def generate_ai_answer(query: str, profiles: List[Dict[str, Any]]) -> str:
+    """
+    Generate an AI-powered answer using OpenAI with relevant profiles.
+    
+    Args:
+        query: User question
+        profiles: Relevant profiles from vector search
         
+    Returns:
+        AI-generated answer with proper formatting
+    """
+    if not profiles:
+        return "I couldn't find any relevant team members for your question."
+    
+    # Check for obviously out-of-scope questions about other companies
+    refusal = _external_company_refusal(query, profiles)
+    if refusal:
+        return refusal
+    
+    cached = _cached_answer(query, profiles)
+    if cached is not None:
+        return cached
+    
+    try:
+        answer = _complete_answer(query, profiles)
+        _store_answer(query, profiles, answer)
         return answer
         
     except Exception as e:
         logger.error(f"Error generating AI answer: {e}")
         # Fallback to simple clean answer
-        response = f"I found {len(profiles)} relevant team member(s):\n\n"
-        for i, profile in enumerate(profiles[:3], 1):
-            response += f"**{profile['name']}**"
-            if profile.get('role'):
-                response += f" - {profile['role']}"
-            response += "\n"
-            if profile.get('department'):
-                response += f"Department: {profile['department']}\n"
-            if profile.get('bio'):
-                bio_short = profile['bio'][:150] + "..." if len(profile['bio']) > 150 else profile['bio']
-                response += f"{bio_short}\n"
-            response += "\n"
+        return _fallback_answer(profiles)
+
+
+def stream_ai_answer(query: str, profiles: List[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Stream an AI-powered answer token by token as OpenAI produces it.
+    
+    Joined together, the yielded pieces equal the answer that is cached,
+    stripped like generate_ai_answer's: leading whitespace is dropped and
+    whitespace is held back until more text follows it. The photo marker
+    is decided from the complete answer, so it arrives as the last piece
+    once the stream has finished. No piece is empty.
+    
+    Args:
+        query: User question
+        profiles: Relevant profiles from vector search
         
-        # Add photo for single person using same marker
-        if len(profiles) == 1 and profiles[0].get('photo_url'):
-            response += f"📸PHOTO📸{profiles[0]['photo_url']}"
+    Yields:
+        Pieces of the answer text, then the photo marker if any
+    """
+    if not profiles:
+        yield "I couldn't find any relevant team members for your question."
+        return
+    
+    refusal = _external_company_refusal(query, profiles)
+    if refusal:
+        yield refusal
+        return
+    
+    cached = _cached_answer(query, profiles)
+    if cached is not None:
+        if cached:
+            yield cached
+        return
+    
+    start = time.perf_counter()
+    parts: List[str] = []
+    # Whitespace not yet sent, in case it turns out to be trailing
+    pending = ""
+    try:
+        stream = openai.chat.completions.create(
+            model=ANSWER_MODEL,
+            messages=_build_answer_messages(query, profiles),
+            max_tokens=ANSWER_MAX_TOKENS,
+            temperature=0.7,
+            stream=True
+        )
         
-        return response
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if not parts:
+                # Match generate_ai_answer, which strips the completed answer
+                delta = delta.lstrip()
+            text = (pending + delta).rstrip()
+            pending = (pending + delta)[len(text):]
+            if not text:
+                continue
+            if not parts:
+                logger.info(f"First answer token after {time.perf_counter() - start:.2f}s")
+            parts.append(text)
+            yield text
+            
+    except Exception as e:
+        logger.error(f"Error streaming AI answer: {e}")
+        if not parts:
+            yield _fallback_answer(profiles)
+            return
+        # Keep what already reached the user rather than repeating it,
+        # but do not cache a cut-off answer
+        marker = _photo_marker(query, "".join(parts), profiles)
+        if marker:
+            yield marker
+        return
+    
+    answer = "".join(parts)
+    logger.info(f"Streamed answer of {len(answer)} characters in {time.perf_counter() - start:.2f}s")
+    marker = _photo_marker(query, answer, profiles)
+    if marker:
+        yield marker
+    try:
+        _store_answer(query, profiles, answer + marker)
+    except Exception as e:
+        # The answer has already been delivered in full
+        logger.warning(f"Could not cache streamed answer: {e}")
 
 
 if __name__ == "__main__":